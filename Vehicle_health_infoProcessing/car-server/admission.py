@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+# How often buckets of vehicles that have gone quiet are dropped
+BUCKET_SWEEP_INTERVAL_S = 60.0
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at rate tokens per second up to burst tokens.
+    """
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """
+        Seconds until one token is available (0 when there is one now).
+        """
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Decides whether a vehicle frame may be scored.
+
+    Every vehicle has a token bucket: a frame that finds a token is accepted, one
+    whose token arrives within max_delay is held back until then (delayed), and
+    any other frame is shed with a retry-after hint. Independently, frames are shed
+    while more than max_pending_rows rows are queued or being scored, so no vehicle
+    can grow the inference queue without bound.
+    """
+
+    def __init__(self, rate=5.0, burst=10.0, max_delay_ms=100.0, max_pending_rows=4096, overload_retry_ms=1000.0):
+        # An empty bucket that never refills would shed every frame with an infinite retry-after
+        if rate <= 0:
+            raise ValueError(f"Admission rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = burst
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_pending_rows = max_pending_rows
+        self.overload_retry_ms = overload_retry_ms
+        self.pending_rows = 0
+        self.accepted = 0
+        self.delayed = 0
+        self.shed_rate_limited = 0
+        self.shed_overloaded = 0
+        self._buckets = {}
+        self._last_sweep = time.monotonic()
+
+    async def admit(self, vehicle_id, rows=1):
+        """
+        Admit a frame of `rows` samples. Returns None once it may be scored (call
+        release(rows) when done), or the number of milliseconds the vehicle should
+        wait before sending again.
+        """
+        if self.pending_rows + rows > self.max_pending_rows and self.pending_rows > 0:
+            self.shed_overloaded += 1
+            return self.overload_retry_ms
+
+        now = time.monotonic()
+        self._sweep(now)
+        bucket = self._buckets.get(vehicle_id)
+        if bucket is None:
+            bucket = self._buckets[vehicle_id] = TokenBucket(self.rate, self.burst, now)
+        wait = bucket.wait_time(now)
+        if wait > self.max_delay:
+            self.shed_rate_limited += 1
+            return wait * 1000.0
+
+        # Take the token now (possibly going into debt) so concurrent frames queue behind it
+        bucket.tokens -= 1
+        self.pending_rows += rows
+        if wait > 0:
+            self.delayed += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.release(rows)
+                raise
+        self.accepted += 1
+        return None
+
+    def release(self, rows=1):
+        self.pending_rows -= rows
+
+    def _sweep(self, now):
+        # A bucket that would be full again carries no state worth keeping
+        if now - self._last_sweep < BUCKET_SWEEP_INTERVAL_S:
+            return
+        self._last_sweep = now
+        for vehicle_id, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self._buckets[vehicle_id]
+
+    def stats(self):
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "max_delay_ms": self.max_delay * 1000.0,
+            "max_pending_rows": self.max_pending_rows,
+            "pending_rows": self.pending_rows,
+            "tracked_vehicles": len(self._buckets),
+            # Accepted frames include the delayed ones
+            "accepted": self.accepted,
+            "delayed": self.delayed,
+            "shed": self.shed_rate_limited + self.shed_overloaded,
+            "shed_rate_limited": self.shed_rate_limited,
+            "shed_overloaded": self.shed_overloaded,
+        }
@@ -0,0 +1,151 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import warnings
+import numpy as np
+from models import PredictiveMaintenanceModel, EngineConditionPredictor
+from neighbors import TreeIndex, RandomProjectionForestIndex
+from tree_ensemble import ArrayVotingClassifier
+
+warnings.filterwarnings("ignore")
+
+# Probe rows used to check exported models against the pickled ones
+PROBE_PREDICTIVE_INPUT = [[298.5, 309.0, 1500, 45, 10, 10.5, 67500], [300, 350, 1500, 50, 200, 50, 75_000]]
+PROBE_ENGINE_INPUT = [[600, 3.5, 12, 3, 80, 80], [700, 2.493591821, 11.79092738, 3.178980794, 84.14416293, 81.6321865]]
+
+
+def export_artifacts(output_dir, engine_index='kd_tree', n_trees=8):
+    """
+    Convert the pickled car-server models into .npy arrays that can be memory-mapped.
+    """
+    predictive_model = PredictiveMaintenanceModel()
+    engine_condition_predictor = EngineConditionPredictor()
+    if predictive_model.preprocess_weights is None:
+        raise ValueError("PCA and scaler could not be compiled into one transform; cannot export")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Failure-type model: compiled preprocessing, ensemble arrays and class names
+    np.save(os.path.join(output_dir, 'failure_preprocess_weights.npy'), predictive_model.preprocess_weights)
+    np.save(os.path.join(output_dir, 'failure_preprocess_bias.npy'), predictive_model.preprocess_bias)
+    np.save(os.path.join(output_dir, 'failure_classes.npy'), predictive_model.failure_classes.astype(str))
+    ensemble = ArrayVotingClassifier.from_sklearn(predictive_model.model)
+    ensemble.save(os.path.join(output_dir, 'failure_ensemble'))
+
+    # Engine-condition model: fused scaling coefficients and the neighbour training set
+    np.save(os.path.join(output_dir, 'engine_feature_scale.npy'), engine_condition_predictor.feature_scale)
+    np.save(os.path.join(output_dir, 'engine_feature_offset.npy'), engine_condition_predictor.feature_offset)
+    with open(os.path.join(output_dir, 'engine.json'), 'w') as f:
+        json.dump({
+            'feature_labels': engine_condition_predictor.featureLabels,
+            'feature_clip': list(engine_condition_predictor.feature_clip) if engine_condition_predictor.feature_clip else None,
+        }, f, indent=2)
+    if engine_index == 'rp_forest':
+        index = RandomProjectionForestIndex.from_model(engine_condition_predictor.model, n_trees=n_trees)
+    else:
+        index = TreeIndex.from_model(engine_condition_predictor.model, algorithm=engine_index)
+    index.save(os.path.join(output_dir, 'engine_index'))
+
+    # The mapped models must give the same answers as the pickled ones
+    mapped_predictive = PredictiveMaintenanceModel.from_artifacts(output_dir)
+    mapped_engine = EngineConditionPredictor.from_artifacts(output_dir)
+    rng = np.random.default_rng(0)
+    probe = predictive_model.transform_batch(PROBE_PREDICTIVE_INPUT)
+    probe = np.vstack([probe, rng.standard_normal((256, probe.shape[1]))])
+    if not np.allclose(mapped_predictive.model.predict_proba(probe), predictive_model.model.predict_proba(probe)):
+        raise ValueError("Exported ensemble does not match ensemble_model.pkl")
+    if list(mapped_predictive.predict_failure_batch(PROBE_PREDICTIVE_INPUT)) != \
+            list(predictive_model.predict_failure_batch(PROBE_PREDICTIVE_INPUT)):
+        raise ValueError("Exported failure model does not match the pickled one")
+    if engine_index != 'rp_forest' and list(mapped_engine.predict_condition_batch(PROBE_ENGINE_INPUT)) != \
+            list(engine_condition_predictor.predict_condition_batch(PROBE_ENGINE_INPUT)):
+        raise ValueError("Exported engine-condition model does not match knn_model.pkl")
+
+
+def _memory_kb():
+    """
+    Return this process's resident set size and proportional set size in kB.
+    """
+    usage = {}
+    for path, fields in (('/proc/self/status', ('VmRSS',)), ('/proc/self/smaps_rollup', ('Pss',))):
+        with open(path) as f:
+            for line in f:
+                name = line.split(':')[0]
+                if name in fields:
+                    usage[name] = int(line.split()[1])
+    return usage.get('VmRSS', 0), usage.get('Pss', 0)
+
+
+def _measure_worker(artifact_dir, ready, done, results):
+    warnings.filterwarnings("ignore")
+    started = time.perf_counter()
+    if artifact_dir:
+        predictive_model = PredictiveMaintenanceModel.from_artifacts(artifact_dir)
+        engine_condition_predictor = EngineConditionPredictor.from_artifacts(artifact_dir)
+    else:
+        predictive_model = PredictiveMaintenanceModel()
+        engine_condition_predictor = EngineConditionPredictor()
+    load_seconds = time.perf_counter() - started
+
+    # Touch the models the way serving does before measuring
+    predictive_model.predict_failure_batch(PROBE_PREDICTIVE_INPUT * 64)
+    engine_condition_predictor.predict_condition_batch(PROBE_ENGINE_INPUT * 64)
+    ready.wait()
+    rss, pss = _memory_kb()
+    results.put({'load_seconds': load_seconds, 'rss_kb': rss, 'pss_kb': pss})
+    done.wait()
+
+
+def report_rss(workers, artifact_dir=None):
+    """
+    Start `workers` processes that load the models and report their memory while all are alive.
+
+    With mapped artifacts every model array, the engine-condition neighbour tree included,
+    is a shared page-cache mapping. What each worker still pays for privately is the
+    interpreter with numpy, scipy and sklearn imported (most of its PSS), small Python
+    wrapper objects and the scratch buffers of each prediction batch.
+    """
+    context = multiprocessing.get_context('spawn')
+    ready = context.Barrier(workers + 1)
+    done = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=_measure_worker, args=(artifact_dir, ready, done, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    ready.wait()
+    measurements = [results.get() for _ in range(workers)]
+    done.set()
+    for process in processes:
+        process.join()
+    return measurements
+
+
+# Export the mmap artifact format, or compare worker memory between the two formats
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory-mapped model artifacts for car-server workers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write .npy artifacts from the .pkl models")
+    export_parser.add_argument("--output", default="artifacts")
+    export_parser.add_argument("--engine-index", choices=["kd_tree", "ball_tree", "rp_forest"], default="kd_tree")
+    export_parser.add_argument("--n-trees", type=int, default=8)
+    rss_parser = subparsers.add_parser("rss", help="Report per-worker memory for pickled and mapped models")
+    rss_parser.add_argument("--workers", type=int, default=4)
+    rss_parser.add_argument("--artifacts", default="artifacts")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        started = time.perf_counter()
+        export_artifacts(args.output, engine_index=args.engine_index, n_trees=args.n_trees)
+        print(f"Exported and verified artifacts in {args.output} ({time.perf_counter() - started:.1f}s)")
+    else:
+        print(f"{'format':<10}{'worker':>8}{'load s':>10}{'RSS MB':>10}{'PSS MB':>10}")
+        for label, artifact_dir in (("pickle", None), ("mmap", args.artifacts)):
+            measurements = report_rss(args.workers, artifact_dir)
+            for number, result in enumerate(measurements):
+                print(f"{label:<10}{number:>8}{result['load_seconds']:>10.3f}"
+                      f"{result['rss_kb'] / 1024:>10.1f}{result['pss_kb'] / 1024:>10.1f}")
+            total_pss = sum(result['pss_kb'] for result in measurements) / 1024
+            print(f"{label:<10}{'total':>8}{'':>10}{'':>10}{total_pss:>10.1f}")
+        print("mmap PSS left per worker is mostly the interpreter and numpy/scipy/sklearn imports, not model data")
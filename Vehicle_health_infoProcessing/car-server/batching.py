@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+import numpy as np
+from metrics import Histogram, BATCH_SIZE_BUCKETS, LATENCY_MS_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects prediction requests from all vehicle connections for a short window
+    and scores them with one batched call per model.
+
+    Requests are queued as blocks of rows: a single reading is a one-row block, and
+    a multi-sample frame from a vehicle stays together in one block so it is never
+    split across batches. max_batch_size counts rows, but a block larger than it is
+    still scored in one call.
+    """
+
+    def __init__(self, predict_batch, max_wait_ms=2.0, max_batch_size=256, max_in_flight=1):
+        # Coroutine predict_batch(predictive_inputs, engine_inputs) -> (failures, conditions)
+        self.predict_batch = predict_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max_in_flight
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(LATENCY_MS_BUCKETS)
+        self._queue = None
+        self._queued_rows = 0
+        self._carry = None
+        self._batch_full = None
+        self._in_flight = None
+        self._task = None
+        self._batch_tasks = set()
+
+    async def start(self):
+        """
+        Start the background task that drains the queue.
+        """
+        self._queue = asyncio.Queue()
+        self._batch_full = asyncio.Event()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the background task and fail any requests still waiting.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._batch_tasks):
+            task.cancel()
+        if self._carry is not None:
+            self._queue.put_nowait(self._carry)
+            self._carry = None
+        while self._queue is not None and not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+
+    async def submit(self, predictive_input, engine_condition_input):
+        """
+        Queue one instance for scoring and wait for its (failure, condition) result.
+        """
+        predictive_row = np.asarray(predictive_input, dtype=float).reshape(1, -1)
+        engine_row = np.asarray(engine_condition_input, dtype=float).reshape(1, -1)
+        failures, conditions = await self.submit_many(predictive_row, engine_row)
+        return failures[0], conditions[0]
+
+    async def submit_many(self, predictive_inputs, engine_condition_inputs):
+        """
+        Queue a block of instances, scored together, and wait for its (failures, conditions) arrays.
+        """
+        predictive_inputs = np.asarray(predictive_inputs, dtype=float)
+        engine_condition_inputs = np.asarray(engine_condition_inputs, dtype=float)
+        if predictive_inputs.ndim != 2 or predictive_inputs.shape[1] != 7 or \
+                engine_condition_inputs.ndim != 2 or engine_condition_inputs.shape[1] != 6:
+            raise ValueError("Expected 7 predictive model inputs and 6 engine condition inputs per sample")
+        if predictive_inputs.shape[0] != engine_condition_inputs.shape[0] or predictive_inputs.shape[0] == 0:
+            raise ValueError("Expected the same, non-zero number of predictive and engine condition samples")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((predictive_inputs, engine_condition_inputs, future, time.perf_counter()))
+        self._queued_rows += predictive_inputs.shape[0]
+        if self._queued_rows >= self.max_batch_size:
+            self._batch_full.set()
+        return await future
+
+    def queue_depth(self):
+        """
+        Rows waiting for a batch.
+        """
+        return self._queued_rows + (self._carry[0].shape[0] if self._carry is not None else 0)
+
+    def stats(self):
+        """
+        Return the batch-size and queue-wait distributions.
+        """
+        return {
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self.queue_depth(),
+            "batches_in_flight": len(self._batch_tasks),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+    async def _run(self):
+        while True:
+            # A block that did not fit into the previous batch starts this one
+            if self._carry is not None:
+                batch, self._carry = [self._carry], None
+            else:
+                batch = [await self._queue.get()]
+                self._queued_rows -= batch[0][0].shape[0]
+            rows = batch[0][0].shape[0]
+
+            # Give other connections a short window to add to the batch
+            if rows + self._queued_rows < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+
+            # Wait for a free inference slot; frames keep queueing meanwhile and join this batch
+            await self._in_flight.acquire()
+            while rows < self.max_batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                self._queued_rows -= item[0].shape[0]
+                if rows + item[0].shape[0] > self.max_batch_size:
+                    self._carry = item
+                    break
+                batch.append(item)
+                rows += item[0].shape[0]
+
+            task = asyncio.create_task(self._process(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task):
+        self._batch_tasks.discard(task)
+        self._in_flight.release()
+
+    async def _process(self, batch):
+        # Drop requests whose callers have already gone away
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        for _, _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000.0)
+        predictive_inputs = np.concatenate([item[0] for item in batch])
+        engine_inputs = np.concatenate([item[1] for item in batch])
+        self.batch_sizes.observe(predictive_inputs.shape[0])
+        try:
+            failures, conditions = await self.predict_batch(predictive_inputs, engine_inputs)
+        except asyncio.CancelledError:
+            for _, _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Batched prediction failed: {e}")
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Hand each block of results back to the connection that queued it
+        start = 0
+        for block, _, future, _ in batch:
+            end = start + block.shape[0]
+            if not future.done():
+                future.set_result((failures[start:end], conditions[start:end]))
+            start = end
@@ -0,0 +1,175 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+from benchmark_protocol import telemetry
+from models import PredictiveMaintenanceModel, EngineConditionPredictor
+
+warnings.filterwarnings("ignore")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Timings this close to the baseline never count as regressions, whatever the relative change
+ABSOLUTE_SLACK = {"_ms": 1.0, "_us": 20.0}
+
+
+def best_time_per_call(call, argument, calls, rounds):
+    """
+    Microseconds per call, taking the fastest of several rounds to filter out scheduler noise.
+    """
+    call(argument)
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(calls):
+            call(argument)
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best * 1e6
+
+
+def allocated_bytes_per_call(call, argument, calls=20):
+    """
+    Peak memory allocated while the call runs (Python objects and numpy buffers), averaged over calls.
+    """
+    call(argument)
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(argument)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return float(np.median(peaks))
+
+
+def best_load_ms(load, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            load()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000.0
+
+
+def benchmark_predictor(name, load, predict_one, predict_batch, rows, args):
+    """
+    Load time, single-row and batch latency and allocations of one predictor.
+    """
+    results = {f"{name}.load_ms": best_load_ms(load, args.load_rounds)}
+    batch = rows[:args.batch_size]
+    single = rows[0]
+    results[f"{name}.single_us"] = best_time_per_call(predict_one, single, args.calls, args.rounds)
+    results[f"{name}.batch_us_per_row"] = (
+        best_time_per_call(predict_batch, batch, max(1, args.calls // 10), args.rounds) / len(batch))
+    results[f"{name}.single_alloc_bytes"] = allocated_bytes_per_call(predict_one, single)
+    results[f"{name}.batch_alloc_bytes_per_row"] = allocated_bytes_per_call(predict_batch, batch) / len(batch)
+    return results
+
+
+def run_benchmarks(args):
+    rng = random.Random(args.seed)
+    readings = [telemetry(rng) for _ in range(args.batch_size)]
+    predictive_rows = np.array([predictive for predictive, _ in readings])
+    engine_rows = np.array([engine for _, engine in readings])
+
+    results = {}
+    if os.path.exists("ensemble_model.pkl"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            predictive_model = PredictiveMaintenanceModel()
+        results.update(benchmark_predictor(
+            "predictive_maintenance", PredictiveMaintenanceModel, predictive_model.predict_failure,
+            predictive_model.predict_failure_batch, predictive_rows, args))
+    else:
+        print("ensemble_model.pkl not found; skipping PredictiveMaintenanceModel", file=sys.stderr)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine_condition_predictor = EngineConditionPredictor()
+    results.update(benchmark_predictor(
+        "engine_condition", EngineConditionPredictor, engine_condition_predictor.predict_condition,
+        engine_condition_predictor.predict_condition_batch, engine_rows, args))
+    return results
+
+
+def find_regressions(results, baseline, tolerance=0.35, alloc_tolerance=0.10):
+    """
+    Compare results with a baseline; every metric is lower-is-better.
+
+    Returns (metric, baseline value, current value, allowed value) for each metric
+    that grew beyond its tolerance. Metrics missing from either side are ignored.
+    """
+    regressions = []
+    for metric, expected in sorted(baseline.items()):
+        current = results.get(metric)
+        if current is None:
+            continue
+        if "alloc" in metric:
+            allowed = expected * (1 + alloc_tolerance)
+        else:
+            slack = next((value for unit, value in ABSOLUTE_SLACK.items() if unit in metric), 0.0)
+            allowed = max(expected * (1 + tolerance), expected + slack)
+        if current > allowed:
+            regressions.append((metric, expected, current, allowed))
+    return regressions
+
+
+def machine():
+    return {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "processor": platform.processor(), "cpus": os.cpu_count()}
+
+
+# Benchmark both predictors on the committed artifacts and gate on the stored baseline
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency, allocation and load-time benchmarks for models.py.")
+    parser.add_argument("--calls", type=int, default=200, help="Single-row calls per round")
+    parser.add_argument("--rounds", type=int, default=5, help="Timing rounds; the fastest is kept")
+    parser.add_argument("--load-rounds", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a metric regressed")
+    parser.add_argument("--tolerance", type=float, default=0.35, help="Allowed relative slowdown")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.10, help="Allowed relative allocation growth")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored["metrics"]
+        if stored.get("machine") != machine():
+            print("Baseline was recorded on a different machine; timings may not be comparable", file=sys.stderr)
+
+    print(f"{'metric':<48}{'current':>14}{'baseline':>14}{'change':>9}")
+    for metric, value in results.items():
+        expected = baseline.get(metric)
+        change = f"{(value / expected - 1) * 100:+.1f}%" if expected else ""
+        print(f"{metric:<48}{value:>14.2f}{expected if expected is not None else float('nan'):>14.2f}{change:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine(), "metrics": results}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    regressions = find_regressions(results, baseline, args.tolerance, args.alloc_tolerance)
+    for metric, expected, current, allowed in regressions:
+        print(f"REGRESSION {metric}: {current:.2f} > {allowed:.2f} (baseline {expected:.2f})")
+    if args.check and regressions and not args.save_baseline:
+        sys.exit(1)
@@ -0,0 +1,79 @@
+import argparse
+import json
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from models import EngineConditionPredictor
+from neighbors import TreeIndex, RandomProjectionForestIndex
+
+warnings.filterwarnings("ignore")
+
+
+def time_per_row(predict, features, single_rows):
+    """
+    Return (batch microseconds per row, single-row microseconds per call).
+    """
+    started = time.perf_counter()
+    predict(features)
+    batch_us = (time.perf_counter() - started) / features.shape[0] * 1e6
+
+    started = time.perf_counter()
+    for row in features[:single_rows]:
+        predict(row.reshape(1, -1))
+    single_us = (time.perf_counter() - started) / single_rows * 1e6
+    return batch_us, single_us
+
+
+# Compare neighbour-index backends against the pickled KNN model on engine_data.csv
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency and recall of engine-condition neighbour indexes.")
+    parser.add_argument("--data", default="../engine_health/engine_data.csv")
+    parser.add_argument("--single-rows", type=int, default=500, help="Rows timed one call at a time")
+    parser.add_argument("--n-trees", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--leaf-size", type=int, default=32)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    predictor = EngineConditionPredictor()
+    data = pd.read_csv(args.data)
+    features = predictor.transform_batch(data.drop(columns=["Engine Condition"]).to_numpy())
+    truth = data["Engine Condition"].to_numpy()
+
+    model = predictor.model
+    exact_neighbors = model.kneighbors(features, return_distance=False)[:, 0]
+    reference = model.predict(features)
+
+    candidates = [("knn_model.pkl", model, None)]
+    for algorithm in ("kd_tree", "ball_tree"):
+        candidates.append((algorithm, TreeIndex.from_model(model, algorithm=algorithm), None))
+    forest = RandomProjectionForestIndex.from_model(model, n_trees=max(args.n_trees), leaf_size=args.leaf_size)
+    for n_trees in args.n_trees:
+        candidates.append((f"rp_forest trees={n_trees} leaf={args.leaf_size}", forest, n_trees))
+
+    results = []
+    print(f"{'backend':<32}{'batch us/row':>14}{'single us':>12}{'recall@1':>10}{'agreement':>11}{'accuracy':>10}")
+    for name, index, search_trees in candidates:
+        if search_trees is not None:
+            index.search_trees = search_trees
+        batch_us, single_us = time_per_row(index.predict, features, args.single_rows)
+        predictions = index.predict(features)
+        if index is model:
+            recall = 1.0
+        else:
+            recall = float(np.mean(index.query(features, 1)[1][:, 0] == exact_neighbors))
+        result = {
+            "backend": name,
+            "batch_us_per_row": batch_us,
+            "single_us": single_us,
+            "recall_at_1": recall,
+            "agreement_with_model": float(np.mean(predictions == reference)),
+            "accuracy": float(np.mean(predictions == truth)),
+        }
+        results.append(result)
+        print(f"{name:<32}{batch_us:>14.2f}{single_us:>12.1f}{recall:>10.4f}"
+              f"{result['agreement_with_model']:>11.4f}{result['accuracy']:>10.4f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,75 @@
+import argparse
+import json
+import random
+import time
+import numpy as np
+from protocol import decode_binary_frame, decode_json_frame, encode_binary_frame, encode_binary_response
+
+
+def telemetry(rng):
+    """
+    One reading in the ranges the Raspberry Pi clients generate.
+    """
+    air_temp, process_temp = rng.uniform(298, 300), rng.uniform(308, 310)
+    rotational_speed, torque = rng.uniform(1400, 1600), rng.uniform(30, 60)
+    predictive = [air_temp, process_temp, rotational_speed, torque, rng.randint(0, 15),
+                  process_temp - air_temp, torque * rotational_speed]
+    engine = [rng.uniform(400, 900), rng.uniform(2, 6), rng.uniform(6, 20), rng.uniform(1, 5),
+              rng.uniform(70, 90), rng.uniform(70, 90)]
+    return predictive, engine
+
+
+def time_per_frame(handle, frames):
+    started = time.perf_counter()
+    for frame in frames:
+        handle(frame)
+    return (time.perf_counter() - started) / len(frames) * 1e6
+
+
+# Compare bytes on the wire and server-side CPU per message for the JSON and binary protocols
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Size and decode/encode cost of the /vehicle frame formats.")
+    parser.add_argument("--frames", type=int, default=50_000)
+    parser.add_argument("--vehicle-id", default="KA-01-AB-1234")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    readings = [telemetry(rng) for _ in range(args.frames)]
+    response = {"vehicle_id": args.vehicle_id, "Predicted Failure Type": "No Failure", "Predicted Engine Condition": "1"}
+
+    json_frames = [json.dumps({"vehicle_id": args.vehicle_id, "predictive_model_input": predictive,
+                               "engine_condition_input": engine}) for predictive, engine in readings]
+    # Only the first binary frame of a connection carries the vehicle ID
+    binary_frames = [encode_binary_frame(predictive, engine) for predictive, engine in readings]
+    first_binary_frame = encode_binary_frame(*readings[0], vehicle_id=args.vehicle_id)
+
+    def handle_json(frame):
+        decode_json_frame(frame)
+        return json.dumps(response)
+
+    def handle_binary(frame):
+        decode_binary_frame(frame, args.vehicle_id)
+        return encode_binary_response(response)
+
+    results = []
+    for name, frames, handle, first_size in (
+            ("json", json_frames, handle_json, len(json_frames[0].encode())),
+            ("binary", binary_frames, handle_binary, len(first_binary_frame))):
+        result = {
+            "protocol": name,
+            "request_bytes": float(np.mean([len(frame if isinstance(frame, bytes) else frame.encode()) for frame in frames])),
+            "first_request_bytes": first_size,
+            "response_bytes": len(handle(frames[0]) if name == "binary" else handle(frames[0]).encode()),
+            "server_us_per_message": time_per_frame(handle, frames),
+        }
+        results.append(result)
+
+    print(f"{'protocol':<10}{'request B':>11}{'first B':>9}{'response B':>12}{'server us/msg':>15}")
+    for result in results:
+        print(f"{result['protocol']:<10}{result['request_bytes']:>11.1f}{result['first_request_bytes']:>9}"
+              f"{result['response_bytes']:>12}{result['server_us_per_message']:>15.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import websockets
+
+FRAME = json.dumps({
+    "vehicle_id": "cold-start",
+    "predictive_model_input": [298.5, 309.0, 1500, 45, 10, 10.5, 67500],
+    "engine_condition_input": [600, 3.5, 12, 3, 80, 80],
+})
+
+
+def port_open(port):
+    with socket.socket() as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def ready(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=1) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError):
+        return False
+
+
+async def first_prediction(port):
+    """
+    Send one frame as soon as the port accepts connections and wait for its prediction.
+    """
+    async with websockets.connect(f"ws://127.0.0.1:{port}/vehicle") as ws:
+        await ws.send(FRAME)
+        return json.loads(await ws.recv())
+
+
+def cold_start(args, port):
+    """
+    Start a fresh server process and time, from exec, when it binds, answers a frame and reports ready.
+    """
+    env = dict(os.environ, INFERENCE_EXECUTOR=args.executor, INFERENCE_WORKERS=str(args.workers))
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "server.py", "--host", "127.0.0.1", "--port", str(port)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while not port_open(port):
+            if server.poll() is not None or time.perf_counter() - started > args.timeout:
+                raise RuntimeError("Server did not bind its port")
+            time.sleep(0.005)
+        bound = time.perf_counter() - started
+        reply = asyncio.run(first_prediction(port))
+        answered = time.perf_counter() - started
+        while not ready(port):
+            time.sleep(0.005)
+        return {"port_bound_s": bound, "first_prediction_s": answered,
+                "readyz_s": time.perf_counter() - started, "first_reply": reply}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# Measure car-server cold start end to end: process start, port bound, first prediction, ready
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start timings of the car server.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--executor", default="thread", choices=["inline", "thread", "process"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    runs = [cold_start(args, args.port) for _ in range(args.runs)]
+    print(f"{'run':<5}{'port bound s':>14}{'first prediction s':>20}{'readyz s':>10}")
+    for number, run in enumerate(runs):
+        print(f"{number:<5}{run['port_bound_s']:>14.3f}{run['first_prediction_s']:>20.3f}{run['readyz_s']:>10.3f}")
+    if "error" in runs[-1]["first_reply"]:
+        print(f"First frame was not scored: {runs[-1]['first_reply']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"executor": args.executor, "workers": args.workers, "runs": runs}, f, indent=2)
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBroker:
+    """
+    In-process broker for a single worker: published predictions go straight to its subscriber.
+    """
+
+    def __init__(self):
+        self._on_message = None
+
+    async def start(self, on_message):
+        self._on_message = on_message
+
+    async def stop(self):
+        self._on_message = None
+
+    async def publish(self, message):
+        await self._on_message(message)
+
+
+class UnixSocketBroker:
+    """
+    Worker side of the Unix-domain-socket broker.
+
+    Predictions are published to the hub as JSON lines; the hub sends every worker
+    the latest prediction of each vehicle on connect, then every new prediction
+    from any worker, so each worker can mirror the fleet-wide state.
+    """
+
+    def __init__(self, socket_path, reconnect_delay=1.0, connect_timeout=5.0):
+        self.socket_path = socket_path
+        self.reconnect_delay = reconnect_delay
+        self.connect_timeout = connect_timeout
+        self.dropped = 0
+        self._on_message = None
+        self._writer = None
+        self._task = None
+
+    async def start(self, on_message):
+        """
+        Start connecting, waiting at most connect_timeout for the fleet state; if the
+        hub is not up yet the worker starts anyway and keeps retrying in the background.
+        """
+        self._on_message = on_message
+        connected = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(connected))
+        try:
+            await asyncio.wait_for(asyncio.shield(connected), self.connect_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Broker at {self.socket_path} not reachable yet; starting without fleet state")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, message):
+        writer = self._writer
+        if writer is None:
+            # Hub is unreachable; the next prediction for this vehicle will replace it anyway
+            self.dropped += 1
+            return
+        try:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            # The hub went away; _run reconnects, and the vehicle's socket must not be closed for it
+            if self._writer is writer:
+                self._writer = None
+            self.dropped += 1
+
+    async def _run(self, connected):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            except OSError as e:
+                logger.warning(f"Cannot reach broker at {self.socket_path}: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            if not connected.done():
+                connected.set_result(None)
+            try:
+                async for line in reader:
+                    try:
+                        await self._on_message(json.loads(line))
+                    except Exception as e:
+                        # One bad message must not stop the fan-out of the ones after it
+                        logger.error(f"Failed to handle broker message: {e!r}")
+                logger.warning("Broker closed the connection")
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.warning(f"Lost connection to broker: {e}")
+            finally:
+                if self._writer is writer:
+                    self._writer = None
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+class BrokerHub:
+    """
+    Fan-out hub that the worker processes connect to over a Unix-domain socket.
+
+    Writes to workers never wait: a worker whose unsent backlog exceeds
+    max_buffer_bytes is disconnected, and gets the whole fleet again on reconnect.
+    """
+
+    def __init__(self, socket_path, max_buffer_bytes=4 * 1024 * 1024):
+        self.socket_path = socket_path
+        self.max_buffer_bytes = max_buffer_bytes
+        self.fleet = {}
+        self.workers = set()
+        self.slow_workers_dropped = 0
+        self._server = None
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_worker, self.socket_path)
+        logger.info(f"Broker listening on {self.socket_path}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self.workers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def _send(self, writer, data):
+        if writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+            logger.warning("Disconnecting a worker that stopped reading broker messages")
+            self.slow_workers_dropped += 1
+            self.workers.discard(writer)
+            writer.transport.abort()
+            return
+        writer.write(data)
+
+    async def _handle_worker(self, reader, writer):
+        # Bring the new worker up to date with the whole fleet before streaming updates
+        for message in self.fleet.values():
+            writer.write(json.dumps(message).encode() + b"\n")
+        self.workers.add(writer)
+        try:
+            await writer.drain()
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                    self.fleet[message["vehicle_id"]] = message
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.error(f"Ignoring malformed broker message: {e!r}")
+                    continue
+                for worker in list(self.workers):
+                    self._send(worker, line)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Worker connection lost: {e}")
+        finally:
+            self.workers.discard(writer)
+            writer.close()
+
+
+def create_broker(mode, socket_path):
+    """
+    Build the broker for the given mode: "local" or "unix".
+    """
+    if mode == "unix":
+        return UnixSocketBroker(socket_path)
+    if mode == "local":
+        return LocalBroker()
+    raise ValueError(f"Unknown broker mode: {mode}")
+
+
+def run_hub(socket_path):
+    """
+    Run a broker hub until the process is stopped.
+    """
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(BrokerHub(socket_path).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+# Run the hub on its own, e.g. when workers are started by an external process manager
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Unix-socket broker hub for car-server workers.")
+    parser.add_argument("--socket", default="/tmp/car-server-broker.sock")
+    args = parser.parse_args()
+    run_hub(args.socket)
@@ -0,0 +1,29 @@
+import argparse
+import time
+import joblib
+from neighbors import TreeIndex, RandomProjectionForestIndex
+
+# Build a neighbour index for EngineConditionPredictor from the training set inside knn_model.pkl
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an engine-condition neighbour index next to the model artifacts.")
+    parser.add_argument("--model", default="knn_model.pkl", help="Fitted KNeighborsClassifier to index")
+    parser.add_argument("--kind", choices=["kd_tree", "ball_tree", "rp_forest"], default="rp_forest")
+    parser.add_argument("--output", help="Index directory (default: neighbor_index_<kind>)")
+    parser.add_argument("--leaf-size", type=int, help="Points per leaf (default: 30 for trees, 32 for rp_forest)")
+    parser.add_argument("--n-trees", type=int, default=8, help="Number of random-projection trees")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    started = time.perf_counter()
+    if args.kind == "rp_forest":
+        index = RandomProjectionForestIndex.from_model(
+            model, n_trees=args.n_trees, leaf_size=args.leaf_size or 32, random_state=args.seed
+        )
+    else:
+        index = TreeIndex.from_model(model, algorithm=args.kind, leaf_size=args.leaf_size or 30)
+    build_seconds = time.perf_counter() - started
+
+    output = args.output or f"neighbor_index_{args.kind}"
+    index.save(output)
+    print(f"Built {args.kind} index over {index.data.shape[0]} points in {build_seconds:.2f}s and saved it to {output}")
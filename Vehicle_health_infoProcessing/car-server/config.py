@@ -0,0 +1,86 @@
+import os
+
+# Micro-batching of vehicle frames: how long to wait for more frames before
+# running a batch, and the largest batch scored in one predict call
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "2"))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "256"))
+
+# Where inference runs: "inline" (on the event loop), "thread" or "process" pool
+INFERENCE_EXECUTOR = os.environ.get("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+# Upper bound on batches being scored at once, and how long one batch may take
+INFERENCE_MAX_IN_FLIGHT = int(os.environ.get("INFERENCE_MAX_IN_FLIGHT", str(2 * INFERENCE_WORKERS)))
+INFERENCE_TIMEOUT_S = float(os.environ.get("INFERENCE_TIMEOUT_S", "5"))
+
+# Optional neighbour index directory for the engine-condition model (see build_index.py);
+# empty means the pickled KNeighborsClassifier. Search trees tune an rp_forest index's recall.
+ENGINE_NEIGHBOR_INDEX = os.environ.get("ENGINE_NEIGHBOR_INDEX", "")
+ENGINE_INDEX_SEARCH_TREES = int(os.environ.get("ENGINE_INDEX_SEARCH_TREES", "0")) or None
+
+# Directory of memory-mapped model arrays written by `python artifacts.py export`;
+# empty means the models are unpickled from the .pkl files
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", "")
+
+# Number of uvicorn worker processes started by `python server.py`
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", "1"))
+# How predictions reach monitors: "local" (single process) or "unix" (broker hub on a
+# Unix-domain socket shared by all workers; used automatically when SERVER_WORKERS > 1)
+BROKER = os.environ.get("BROKER", "local")
+BROKER_SOCKET = os.environ.get("BROKER_SOCKET", "/tmp/car-server-broker.sock")
+
+# Per-monitor send queue: how many messages may wait for a slow dashboard, and what
+# happens when it is full ("drop_oldest", "coalesce" to the latest per vehicle, "disconnect")
+MONITOR_QUEUE_SIZE = int(os.environ.get("MONITOR_QUEUE_SIZE", "1000"))
+MONITOR_OVERFLOW_POLICY = os.environ.get("MONITOR_OVERFLOW_POLICY", "coalesce")
+
+# "immediate" forwards every prediction to monitors as it arrives; "tick" sends one
+# batched frame per MONITOR_TICK_MS with only changed vehicles, plus a full snapshot
+# every MONITOR_RESYNC_TICKS ticks
+MONITOR_BROADCAST_MODE = os.environ.get("MONITOR_BROADCAST_MODE", "immediate")
+MONITOR_TICK_MS = float(os.environ.get("MONITOR_TICK_MS", "1000"))
+MONITOR_RESYNC_TICKS = int(os.environ.get("MONITOR_RESYNC_TICKS", "30"))
+
+# Optional cache of predictions keyed on inputs rounded to these per-feature resolutions
+# (one value for all features, or one per feature in model input order)
+PREDICTION_CACHE = os.environ.get("PREDICTION_CACHE", "0") == "1"
+PREDICTION_CACHE_TTL_S = float(os.environ.get("PREDICTION_CACHE_TTL_S", "300"))
+PREDICTION_CACHE_MAX_MB = float(os.environ.get("PREDICTION_CACHE_MAX_MB", "16"))
+PREDICTION_CACHE_PREDICTIVE_RESOLUTION = os.environ.get(
+    "PREDICTION_CACHE_PREDICTIVE_RESOLUTION", "0.1,0.1,1,0.1,1,0.1,10")
+PREDICTION_CACHE_ENGINE_RESOLUTION = os.environ.get(
+    "PREDICTION_CACHE_ENGINE_RESOLUTION", "1,0.01,0.01,0.01,0.1,0.1")
+
+# Recent readings and predictions kept per vehicle for /monitor history requests
+# (0 disables), and how many vehicles this worker keeps history for
+HISTORY_POINTS = int(os.environ.get("HISTORY_POINTS", "300"))
+HISTORY_MAX_VEHICLES = int(os.environ.get("HISTORY_MAX_VEHICLES", "10000"))
+
+# Append-only telemetry log of every scored reading (see telemetry_log.py); empty disables it.
+# Rows are group-committed every TELEMETRY_LOG_COMMIT_MS and segments rotate after
+# TELEMETRY_LOG_SEGMENT_ROWS rows; TELEMETRY_LOG_FSYNC=1 fsyncs every commit.
+TELEMETRY_LOG_DIR = os.environ.get("TELEMETRY_LOG_DIR", "")
+TELEMETRY_LOG_SEGMENT_ROWS = int(os.environ.get("TELEMETRY_LOG_SEGMENT_ROWS", "1000000"))
+TELEMETRY_LOG_COMMIT_MS = float(os.environ.get("TELEMETRY_LOG_COMMIT_MS", "100"))
+TELEMETRY_LOG_FSYNC = os.environ.get("TELEMETRY_LOG_FSYNC", "0") == "1"
+
+# Per-stage latency histograms and counters exported on /metrics; 0 removes the timing
+# calls from the request path entirely
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+# Models load in the background after the port is bound; vehicle frames arriving before
+# then wait up to STARTUP_WAIT_S, after which the vehicle is asked to retry in STARTUP_RETRY_MS
+STARTUP_WAIT_S = float(os.environ.get("STARTUP_WAIT_S", "5"))
+STARTUP_RETRY_MS = float(os.environ.get("STARTUP_RETRY_MS", "1000"))
+
+# Largest number of samples a vehicle may send in one multi-sample frame
+MAX_FRAME_SAMPLES = int(os.environ.get("MAX_FRAME_SAMPLES", "3600"))
+
+# Admission control: each vehicle may send ADMISSION_RATE_PER_S frames per second with
+# bursts of ADMISSION_BURST; a frame over the limit is held back up to ADMISSION_MAX_DELAY_MS,
+# otherwise it is answered with a retry-after message. Frames are also shed while more
+# than ADMISSION_MAX_PENDING_ROWS samples are waiting for or in inference.
+ADMISSION_RATE_PER_S = float(os.environ.get("ADMISSION_RATE_PER_S", "5"))
+ADMISSION_BURST = float(os.environ.get("ADMISSION_BURST", "10"))
+ADMISSION_MAX_DELAY_MS = float(os.environ.get("ADMISSION_MAX_DELAY_MS", "100"))
+ADMISSION_MAX_PENDING_ROWS = int(os.environ.get("ADMISSION_MAX_PENDING_ROWS", "4096"))
+ADMISSION_OVERLOAD_RETRY_MS = float(os.environ.get("ADMISSION_OVERLOAD_RETRY_MS", "1000"))
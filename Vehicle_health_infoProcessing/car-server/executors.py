@@ -0,0 +1,255 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import config
+
+
+class InferenceTimeoutError(Exception):
+    """
+    Raised when a batch of predictions does not finish within the configured timeout.
+    """
+
+
+def load_models():
+    """
+    Load both car-server models from the working directory, one per thread.
+    """
+    # Imported here so the server binds its socket without waiting for scikit-learn
+    from models import PredictiveMaintenanceModel, EngineConditionPredictor
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-load") as pool:
+        if config.ARTIFACT_DIR:
+            predictive_model = pool.submit(PredictiveMaintenanceModel.from_artifacts, config.ARTIFACT_DIR)
+            engine_condition_predictor = pool.submit(
+                EngineConditionPredictor.from_artifacts, config.ARTIFACT_DIR, search_trees=config.ENGINE_INDEX_SEARCH_TREES
+            )
+        else:
+            predictive_model = pool.submit(PredictiveMaintenanceModel)
+            engine_condition_predictor = pool.submit(
+                EngineConditionPredictor,
+                neighbor_index=config.ENGINE_NEIGHBOR_INDEX, search_trees=config.ENGINE_INDEX_SEARCH_TREES,
+            )
+        return predictive_model.result(), engine_condition_predictor.result()
+
+
+def run_predictions(predictive_model, engine_condition_predictor, predictive_inputs, engine_condition_inputs):
+    """
+    Score a batch of vehicle frames with both models.
+    """
+    predicted_failures = predictive_model.predict_failure_batch(predictive_inputs)
+    predicted_conditions = engine_condition_predictor.predict_condition_batch(engine_condition_inputs)
+    return predicted_failures, predicted_conditions
+
+
+def run_timed_predictions(predictive_model, engine_condition_predictor, predictive_inputs, engine_condition_inputs):
+    """
+    Same as run_predictions, one model step at a time, also returning the milliseconds spent in each step.
+    """
+    started = time.perf_counter()
+    features = predictive_model.transform_batch(predictive_inputs)
+    preprocessed = time.perf_counter()
+    predicted_failures = predictive_model.failure_classes[predictive_model.model.predict(features)]
+    classified = time.perf_counter()
+    engine_features = engine_condition_predictor.transform_batch(engine_condition_inputs)
+    engineered = time.perf_counter()
+    predicted_conditions = engine_condition_predictor.model.predict(engine_features)
+    finished = time.perf_counter()
+    timings = {
+        "failure_pca_scaling": (preprocessed - started) * 1000.0,
+        "failure_classifier": (classified - preprocessed) * 1000.0,
+        "engine_feature_engineering": (engineered - classified) * 1000.0,
+        "engine_knn": (finished - engineered) * 1000.0,
+    }
+    return predicted_failures, predicted_conditions, timings
+
+
+# Models owned by a process-pool worker, loaded once by _init_worker
+_worker_models = None
+# Shared by all workers of a pool at startup; see ProcessPoolInferenceExecutor._load
+_startup_barrier = None
+
+
+def _init_worker(startup_barrier=None):
+    global _worker_models, _startup_barrier
+    warnings.filterwarnings("ignore")
+    _startup_barrier = startup_barrier
+    _worker_models = load_models()
+
+
+def _worker_ready():
+    # Hold this worker until every worker has a ready task, so no worker can take two
+    if _startup_barrier is not None:
+        _startup_barrier.wait()
+    return os.getpid()
+
+
+def _predict_in_worker(predictive_inputs, engine_condition_inputs, timed=False):
+    predict = run_timed_predictions if timed else run_predictions
+    return predict(*_worker_models, predictive_inputs, engine_condition_inputs)
+
+
+class InferenceExecutor:
+    """
+    Base class for the executor layer: bounds in-flight work and applies timeouts.
+    """
+
+    def __init__(self, max_in_flight=8, timeout=5.0, stage_metrics=None):
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        # When set, model steps are timed into these StageMetrics
+        self.stage_metrics = stage_metrics
+        self.in_flight = 0
+        # Bumped every time the models are (re)loaded, so caches of their predictions can be dropped
+        self.model_version = 0
+        self.ready = False
+        self.load_seconds = None
+        self._slots = None
+
+    async def start(self):
+        """
+        Load the models without blocking the event loop; ready is set once predictions can run.
+        """
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        started = time.perf_counter()
+        await self._load()
+        self.load_seconds = time.perf_counter() - started
+        self.model_version += 1
+        self.ready = True
+
+    async def _load(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def run(self, predictive_inputs, engine_condition_inputs):
+        """
+        Run a batch of predictions, waiting for a free slot first.
+        """
+        await self._slots.acquire()
+        self.in_flight += 1
+        timed = self.stage_metrics is not None
+        # The slot is held until the work itself finishes, not until the caller stops waiting:
+        # a timed-out prediction keeps running on the pool and still counts against max_in_flight
+        work = asyncio.ensure_future(self._submit(predictive_inputs, engine_condition_inputs, timed))
+        work.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(work), self.timeout)
+        except asyncio.TimeoutError:
+            raise InferenceTimeoutError(f"Prediction did not finish within {self.timeout}s")
+        if not timed:
+            return result
+        failures, conditions, timings = result
+        for stage, milliseconds in timings.items():
+            self.stage_metrics.observe_ms(stage, milliseconds)
+        return failures, conditions
+
+    def _release(self, work):
+        self.in_flight -= 1
+        self._slots.release()
+        if not work.cancelled():
+            # Retrieve the error of abandoned work so it is not reported as never retrieved
+            work.exception()
+
+    async def _submit(self, predictive_inputs, engine_condition_inputs, timed):
+        raise NotImplementedError
+
+
+class InlineExecutor(InferenceExecutor):
+    """
+    Runs predictions directly on the event loop. Timeouts cannot interrupt inline work.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.models = None
+
+    async def _load(self):
+        self.models = await asyncio.to_thread(load_models)
+
+    async def _submit(self, predictive_inputs, engine_condition_inputs, timed):
+        predict = run_timed_predictions if timed else run_predictions
+        return predict(*self.models, predictive_inputs, engine_condition_inputs)
+
+
+class ThreadPoolInferenceExecutor(InferenceExecutor):
+    """
+    Runs predictions on a thread pool sharing the models loaded in this process.
+    """
+
+    def __init__(self, workers=None, **kwargs):
+        super().__init__(**kwargs)
+        self.models = None
+        self.workers = workers or os.cpu_count()
+        self._pool = None
+
+    async def _load(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self.models = await asyncio.get_running_loop().run_in_executor(self._pool, load_models)
+
+    async def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _submit(self, predictive_inputs, engine_condition_inputs, timed):
+        loop = asyncio.get_running_loop()
+        predict = run_timed_predictions if timed else run_predictions
+        return await loop.run_in_executor(
+            self._pool, predict, *self.models, predictive_inputs, engine_condition_inputs
+        )
+
+
+class ProcessPoolInferenceExecutor(InferenceExecutor):
+    """
+    Runs predictions on a process pool; every worker loads its own copy of the models once.
+    """
+
+    def __init__(self, workers=None, **kwargs):
+        super().__init__(**kwargs)
+        self.workers = workers or os.cpu_count()
+        self.worker_pids = []
+        self._pool = None
+
+    async def _load(self):
+        context = multiprocessing.get_context("spawn")
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(context.Barrier(self.workers),),
+        )
+        # One task per worker spawns them all at once, so they load their models in parallel.
+        # The tasks meet at a barrier, so each runs in a different worker and the pool is only
+        # ready once every worker has loaded its models
+        loop = asyncio.get_running_loop()
+        self.worker_pids = await asyncio.gather(
+            *[loop.run_in_executor(self._pool, _worker_ready) for _ in range(self.workers)])
+
+    async def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _submit(self, predictive_inputs, engine_condition_inputs, timed):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, _predict_in_worker, predictive_inputs, engine_condition_inputs, timed
+        )
+
+
+def create_executor(mode, workers=None, max_in_flight=8, timeout=5.0, stage_metrics=None):
+    """
+    Build the executor for the given mode: "inline", "thread" or "process".
+    """
+    options = {"max_in_flight": max_in_flight, "timeout": timeout, "stage_metrics": stage_metrics}
+    if mode == "process":
+        return ProcessPoolInferenceExecutor(workers=workers, **options)
+    if mode == "thread":
+        return ThreadPoolInferenceExecutor(workers=workers, **options)
+    if mode == "inline":
+        return InlineExecutor(**options)
+    raise ValueError(f"Unknown inference executor mode: {mode}")
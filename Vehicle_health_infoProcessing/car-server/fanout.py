@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict, deque
+from subscriptions import SubscriptionIndex
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Close code sent to monitors dropped by the "disconnect" policy (Try Again Later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class MonitorConnection:
+    """
+    Bounded send queue and writer task for one monitoring client.
+
+    Broadcasting only enqueues, so a slow dashboard never holds up vehicle
+    ingestion. When the queue is full the overflow policy decides what happens:
+    drop_oldest discards the oldest queued message, coalesce keeps only the latest
+    message per vehicle (dropping the oldest vehicle when a new one does not fit),
+    and disconnect closes the slow client.
+    """
+
+    def __init__(self, websocket, max_queue=1000, overflow_policy="coalesce", stage_metrics=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.stage_metrics = stage_metrics
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        # None receives every prediction; see MonitorFanout.subscribe
+        self.subscription = None
+        # Coalescing needs one slot per vehicle; the other policies keep plain arrival order
+        self._queue = OrderedDict() if overflow_policy == "coalesce" else deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, vehicle_id, message):
+        """
+        Queue a message without waiting; never blocks the caller. Messages without a
+        vehicle_id (batched frames) are never coalesced.
+        """
+        if self.closed:
+            return
+        if self.overflow_policy == "coalesce":
+            if vehicle_id is None:
+                vehicle_id = object()
+            if vehicle_id in self._queue:
+                self._queue[vehicle_id] = message
+                self.coalesced += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                self._queue.popitem(last=False)
+                self.dropped += 1
+            self._queue[vehicle_id] = message
+        else:
+            if len(self._queue) >= self.max_queue:
+                if self.overflow_policy == "disconnect":
+                    self.dropped += len(self._queue) + 1
+                    self._queue.clear()
+                    self.closed = True
+                    self._ready.set()
+                    return
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(message)
+        self._ready.set()
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    async def run(self):
+        """
+        Send queued messages until the client goes away or is disconnected for being slow.
+        """
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self.closed:
+                break
+            while self._queue:
+                if self.overflow_policy == "coalesce":
+                    _, message = self._queue.popitem(last=False)
+                else:
+                    message = self._queue.popleft()
+                started = time.perf_counter() if self.stage_metrics is not None else None
+                try:
+                    await self.websocket.send_text(message)
+                except Exception:
+                    self.closed = True
+                    return
+                self.sent += 1
+                if started is not None:
+                    self.stage_metrics.lap("monitor_send", started)
+
+        logger.warning(f"Disconnecting slow monitoring client: {self.websocket.client}")
+        try:
+            await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            "client": str(self.websocket.client),
+            "queue_depth": self.queue_depth(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "subscription": self.subscription.to_dict() if self.subscription else None,
+        }
+
+
+class MonitorFanout:
+    """
+    The monitoring clients connected to this worker.
+
+    Clients without a subscription receive everything; the others are looked up
+    in a SubscriptionIndex for each prediction.
+    """
+
+    def __init__(self, max_queue=1000, overflow_policy="coalesce", stage_metrics=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.stage_metrics = stage_metrics
+        self.monitors = set()
+        self.unfiltered = set()
+        self.index = SubscriptionIndex()
+
+    def connect(self, websocket, subscription=None):
+        monitor = MonitorConnection(websocket, self.max_queue, self.overflow_policy, self.stage_metrics)
+        self.monitors.add(monitor)
+        self.subscribe(monitor, subscription)
+        return monitor
+
+    def subscribe(self, monitor, subscription):
+        """
+        Replace the subscription of a monitor; None or an empty subscription receives everything.
+        """
+        if monitor.subscription is not None:
+            self.index.remove(monitor, monitor.subscription)
+        self.unfiltered.discard(monitor)
+        if subscription is None or subscription.is_empty():
+            monitor.subscription = None
+            self.unfiltered.add(monitor)
+        else:
+            monitor.subscription = subscription
+            self.index.add(monitor, subscription)
+
+    def disconnect(self, monitor):
+        monitor.closed = True
+        self.monitors.discard(monitor)
+        self.unfiltered.discard(monitor)
+        if monitor.subscription is not None:
+            self.index.remove(monitor, monitor.subscription)
+
+    def matching(self, monitor, responses):
+        """
+        Return the predictions a monitor is subscribed to.
+        """
+        if monitor.subscription is None:
+            return list(responses)
+        return [response for response in responses if monitor.subscription.matches(response)]
+
+    def broadcast(self, response):
+        """
+        Serialise a prediction once and queue it for every monitor subscribed to it.
+        """
+        targets = self.index.match(response) if len(self.unfiltered) < len(self.monitors) else ()
+        if not self.unfiltered and not targets:
+            return
+        message = json.dumps(response)
+        for monitor in self.unfiltered:
+            monitor.offer(response["vehicle_id"], message)
+        for monitor in targets:
+            monitor.offer(response["vehicle_id"], message)
+
+    def broadcast_frame(self, frame_type, responses):
+        """
+        Queue a {"type": frame_type, "vehicles": [...]} frame for every monitor, with each
+        monitor's vehicles narrowed to its subscription. Empty deltas are not sent.
+        """
+        if self.unfiltered:
+            message = json.dumps({"type": frame_type, "vehicles": responses})
+            for monitor in self.unfiltered:
+                monitor.offer(None, message)
+        if len(self.unfiltered) == len(self.monitors):
+            return
+
+        per_monitor = defaultdict(list)
+        for response in responses:
+            for monitor in self.index.match(response):
+                per_monitor[monitor].append(response)
+        for monitor in self.monitors - self.unfiltered:
+            vehicles = per_monitor.get(monitor)
+            if vehicles or frame_type == "snapshot":
+                monitor.offer(None, json.dumps({"type": frame_type, "vehicles": vehicles or []}))
+
+    def __len__(self):
+        return len(self.monitors)
+
+    def queue_depth(self):
+        return sum(monitor.queue_depth() for monitor in self.monitors)
+
+    def stats(self):
+        return {
+            "overflow_policy": self.overflow_policy,
+            "max_queue": self.max_queue,
+            "clients": [monitor.stats() for monitor in self.monitors],
+        }
+
+
+def prediction_key(response):
+    return response["Predicted Failure Type"], response["Predicted Engine Condition"]
+
+
+class TickBroadcaster:
+    """
+    Sends monitors one batched frame per tick instead of one message per vehicle frame.
+
+    A {"type": "delta"} frame lists only vehicles whose predicted failure type or
+    engine condition changed since they were last broadcast; every resync_ticks
+    ticks a {"type": "snapshot"} frame with the whole fleet is sent instead, which
+    also repairs any delta a monitor's queue had to drop.
+    """
+
+    def __init__(self, fanout, fleet, interval_ms=1000, resync_ticks=30):
+        self.fanout = fanout
+        self.fleet = fleet
+        self.interval = interval_ms / 1000.0
+        self.resync_ticks = resync_ticks
+        self.ticks = 0
+        self._pending = {}
+        self._broadcast = {}
+        self._task = None
+
+    def update(self, response):
+        """
+        Record the latest prediction of a vehicle for the next tick.
+        """
+        self._pending[response["vehicle_id"]] = response
+
+    def snapshot_frame(self, monitor=None):
+        vehicles = list(self.fleet.values())
+        if monitor is not None:
+            vehicles = self.fanout.matching(monitor, vehicles)
+        return json.dumps({"type": "snapshot", "vehicles": vehicles})
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def tick(self):
+        """
+        Build and queue this tick's frame, if there is anything to send.
+        """
+        self.ticks += 1
+        pending, self._pending = self._pending, {}
+        changed = []
+        for vehicle_id, response in pending.items():
+            key = prediction_key(response)
+            if self._broadcast.get(vehicle_id) != key:
+                self._broadcast[vehicle_id] = key
+                changed.append(response)
+
+        if not self.fanout:
+            return
+        if self.resync_ticks and self.ticks % self.resync_ticks == 0:
+            self.fanout.broadcast_frame("snapshot", list(self.fleet.values()))
+        elif changed:
+            self.fanout.broadcast_frame("delta", changed)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.tick()
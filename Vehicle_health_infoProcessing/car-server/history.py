@@ -0,0 +1,121 @@
+from collections import OrderedDict
+import numpy as np
+
+PREDICTIVE_VALUES = 7
+ENGINE_VALUES = 6
+
+
+class LabelTable:
+    """
+    Interns prediction labels as small integer codes so the ring buffers can store them in numpy arrays.
+    """
+
+    def __init__(self):
+        self.labels = []
+        self._codes = {}
+
+    def code(self, label):
+        label = str(label)
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def decode(self, codes):
+        return [self.labels[code] for code in codes]
+
+
+class VehicleRing:
+    """
+    Fixed-size ring buffer of one vehicle's recent readings, stored as one array per field.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.inputs = np.zeros((capacity, PREDICTIVE_VALUES + ENGINE_VALUES), dtype=np.float32)
+        self.failure_codes = np.zeros(capacity, dtype=np.int16)
+        self.condition_codes = np.zeros(capacity, dtype=np.int16)
+        self.count = 0
+        self.head = 0
+
+    def append(self, timestamps, inputs, failure_codes, condition_codes):
+        """
+        Write n rows at the head, overwriting the oldest ones once the buffer is full.
+        """
+        n = len(timestamps)
+        if n > self.capacity:
+            timestamps, inputs = timestamps[-self.capacity:], inputs[-self.capacity:]
+            failure_codes, condition_codes = failure_codes[-self.capacity:], condition_codes[-self.capacity:]
+            n = self.capacity
+        positions = (self.head + np.arange(n)) % self.capacity
+        self.timestamps[positions] = timestamps
+        self.inputs[positions] = inputs
+        self.failure_codes[positions] = failure_codes
+        self.condition_codes[positions] = condition_codes
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def latest(self, points):
+        """
+        Return the positions of the last `points` rows, oldest first.
+        """
+        points = min(points, self.count)
+        return (self.head - points + np.arange(points)) % self.capacity
+
+
+class TelemetryHistory:
+    """
+    The last `capacity` readings and predictions of every vehicle seen by this worker.
+
+    Vehicles beyond max_vehicles are dropped least recently updated first.
+    """
+
+    def __init__(self, capacity=300, max_vehicles=10000):
+        self.capacity = capacity
+        self.max_vehicles = max_vehicles
+        self.failure_labels = LabelTable()
+        self.condition_labels = LabelTable()
+        self._rings = OrderedDict()
+
+    def record(self, vehicle_id, timestamps, predictive_inputs, engine_condition_inputs, failures, conditions):
+        """
+        Append a frame's readings (one row per sample) and the predictions made for them.
+        """
+        ring = self._rings.get(vehicle_id)
+        if ring is None:
+            ring = self._rings[vehicle_id] = VehicleRing(self.capacity)
+            if len(self._rings) > self.max_vehicles:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(vehicle_id)
+        inputs = np.hstack([np.reshape(predictive_inputs, (-1, PREDICTIVE_VALUES)),
+                            np.reshape(engine_condition_inputs, (-1, ENGINE_VALUES))])
+        ring.append(
+            np.asarray(timestamps, dtype=float),
+            inputs,
+            [self.failure_labels.code(failure) for failure in failures],
+            [self.condition_labels.code(condition) for condition in conditions],
+        )
+
+    def replay(self, vehicle_id, points):
+        """
+        Return the last `points` rows of a vehicle as one dict of columns, or None if it has none.
+        """
+        ring = self._rings.get(vehicle_id)
+        if ring is None:
+            return None
+        positions = ring.latest(points)
+        inputs = ring.inputs[positions].astype(float)
+        return {
+            "vehicle_id": vehicle_id,
+            "timestamps": ring.timestamps[positions].tolist(),
+            "predictive_model_input": inputs[:, :PREDICTIVE_VALUES].tolist(),
+            "engine_condition_input": inputs[:, PREDICTIVE_VALUES:].tolist(),
+            "Predicted Failure Type": self.failure_labels.decode(ring.failure_codes[positions]),
+            "Predicted Engine Condition": self.condition_labels.decode(ring.condition_codes[positions]),
+        }
+
+    def __len__(self):
+        return len(self._rings)
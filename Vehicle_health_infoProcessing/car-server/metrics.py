@@ -0,0 +1,149 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+
+class Histogram:
+    """
+    Cumulative bucket histogram used to track latency and size distributions.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        Record a single observation.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the bucket counts (upper bound of the matching bucket).
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def state(self):
+        """
+        Return a consistent (bucket counts, count, sum) triple.
+        """
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def snapshot(self):
+        """
+        Return the histogram as a JSON-serialisable dictionary.
+        """
+        counts, total, value_sum = self.state()
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "count": total,
+            "sum": value_sum,
+            "mean": value_sum / total if total else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+# Bucket layouts shared by the server components
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+LATENCY_MS_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+
+class StageMetrics:
+    """
+    Per-stage latency histograms and event counters for the request path.
+
+    lap(stage, started) records the time since `started` and returns the current
+    clock, so consecutive stages can be timed with one perf_counter call each.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = defaultdict(int)
+
+    def observe_ms(self, stage, milliseconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages.setdefault(stage, Histogram(LATENCY_MS_BUCKETS))
+        histogram.observe(milliseconds)
+
+    def lap(self, stage, started):
+        now = time.perf_counter()
+        self.observe_ms(stage, (now - started) * 1000.0)
+        return now
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def snapshot(self):
+        return {
+            "stages_ms": {stage: histogram.snapshot() for stage, histogram in sorted(self.stages.items())},
+            "counters": dict(self.counters),
+        }
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def _prometheus_histogram(lines, name, labels, histogram, scale=1.0):
+    counts, total, value_sum = histogram.state()
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = label_text + "," if label_text else ""
+    suffix = "{" + label_text + "}" if label_text else ""
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + [float("inf")], counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{prefix}le="{_format_value(bound * scale)}"}} {cumulative}')
+    lines.append(f"{name}_sum{suffix} {_format_value(value_sum * scale)}")
+    lines.append(f"{name}_count{suffix} {total}")
+
+
+def prometheus_text(stage_metrics, gauges, histograms, prefix="car_server"):
+    """
+    Render metrics in the Prometheus text exposition format.
+
+    gauges maps a name to (help, value); histograms maps a name to (help, Histogram,
+    scale), where scale converts the recorded unit into the exported one.
+    """
+    lines = []
+    if stage_metrics is not None:
+        name = f"{prefix}_stage_duration_seconds"
+        lines += [f"# HELP {name} Time spent in each stage of the request path.", f"# TYPE {name} histogram"]
+        for stage, histogram in sorted(stage_metrics.stages.items()):
+            _prometheus_histogram(lines, name, {"stage": stage}, histogram, scale=0.001)
+        for counter, value in sorted(stage_metrics.counters.items()):
+            name = f"{prefix}_{counter}_total"
+            help_text = counter.replace("_", " ").capitalize() + "."
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"]
+    for gauge, (help_text, value) in gauges.items():
+        name = f"{prefix}_{gauge}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+    for histogram_name, (help_text, histogram, scale) in histograms.items():
+        name = f"{prefix}_{histogram_name}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        _prometheus_histogram(lines, name, {}, histogram, scale)
+    return "\n".join(lines) + "\n"
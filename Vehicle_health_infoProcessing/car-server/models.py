@@ -1,44 +1,104 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, accuracy_score
-from sklearn.decomposition import PCA
-from sklearn.ensemble import IsolationForest
-from imblearn.over_sampling import SMOTE  # For oversampling minority classes
 import joblib
+import json
+import os
+from neighbors import load_index
+from tree_ensemble import ArrayVotingClassifier
 
 class PredictiveMaintenanceModel:
-    def __init__(self, model_file='ensemble_model.pkl', scaler_file='ensemble_scaler.pkl', pca_file='pca.pkl', label_encoder_file='label_encoder.pkl', smote_file='smote.pkl'):
-        # Load saved models and preprocessing steps
+    def __init__(self, model_file='ensemble_model.pkl', scaler_file='ensemble_scaler.pkl', pca_file='pca.pkl', label_encoder_file='label_encoder.pkl'):
+        # Load saved models and preprocessing steps (smote.pkl is only used in training)
         self.model = joblib.load(model_file)
         self.scaler = joblib.load(scaler_file)
         self.pca = joblib.load(pca_file)
         self.label_encoder = joblib.load(label_encoder_file)
-        self.smote = joblib.load(smote_file)
-        
+        self.failure_classes = self.label_encoder.classes_
+        self.compile_preprocessing()
+
         print("Model and preprocessing steps loaded successfully.")
 
+    @classmethod
+    def from_artifacts(cls, directory, mmap_mode='r'):
+        """
+        Load the model from arrays written by artifacts.py, memory-mapped so that
+        worker processes share the pages instead of holding private copies.
+        """
+        model = cls.__new__(cls)
+        model.model = ArrayVotingClassifier.load(os.path.join(directory, 'failure_ensemble'), mmap_mode=mmap_mode)
+        model.preprocess_weights = np.load(os.path.join(directory, 'failure_preprocess_weights.npy'), mmap_mode=mmap_mode)
+        model.preprocess_bias = np.load(os.path.join(directory, 'failure_preprocess_bias.npy'), mmap_mode=mmap_mode)
+        model.failure_classes = np.load(os.path.join(directory, 'failure_classes.npy'), allow_pickle=False)
+        print("Model and preprocessing steps mapped from artifacts.")
+        return model
+
+    def compile_preprocessing(self):
+        """
+        Fold PCA and StandardScaler into one affine transform x @ weights + bias,
+        falling back to the original chain if the result does not match it.
+        """
+        components = self.pca.components_
+        if self.pca.whiten:
+            components = components / np.sqrt(self.pca.explained_variance_)[:, np.newaxis]
+        scaler_mean = self.scaler.mean_ if self.scaler.with_mean else 0.0
+        scaler_scale = self.scaler.scale_ if self.scaler.with_std else 1.0
+
+        self.preprocess_weights = components.T / scaler_scale
+        self.preprocess_bias = (-(self.pca.mean_ @ components.T) - scaler_mean) / scaler_scale
+
+        # Check the compiled transform against PCA + scaler on probe rows around the training mean
+        rng = np.random.default_rng(0)
+        probe = self.pca.mean_ * (1 + 0.1 * rng.standard_normal((32, self.pca.mean_.shape[0])))
+        expected = self.scaler.transform(self.pca.transform(probe))
+        if not np.allclose(probe @ self.preprocess_weights + self.preprocess_bias, expected, rtol=1e-9, atol=1e-9):
+            print("Compiled preprocessing does not match PCA and scaler; using the original transforms.")
+            self.preprocess_weights = None
+            self.preprocess_bias = None
+
+    def transform_batch(self, instances):
+        """
+        Apply the PCA and scaling steps to a 2D array of instances.
+        """
+        instances = np.asarray(instances, dtype=float)
+        if self.preprocess_weights is None:
+            return self.scaler.transform(self.pca.transform(instances))
+        return instances @ self.preprocess_weights + self.preprocess_bias
 
     def predict_failure(self, instance):
         """
         Predict failure type for a new instance.
         """
         instance = np.array(instance).reshape(1, -1)  # Reshape instance to a 2D array
-        instance_pca = self.pca.transform(instance)  # Apply PCA
-        instance_scaled = self.scaler.transform(instance_pca)  # Scale the instance
-        prediction = self.model.predict(instance_scaled)  # Make the prediction
-        return self.label_encoder.inverse_transform(prediction)[0]
+        return self.predict_failure_batch(instance)[0]
+
+    def predict_failure_batch(self, instances):
+        """
+        Predict failure types for a 2D array of instances, one instance per row.
+        """
+        instances_scaled = self.transform_batch(instances)  # Apply PCA and scaling
+        predictions = self.model.predict(instances_scaled)  # Make the predictions
+        return self.failure_classes[predictions]
+
+
+# Column pairs multiplied to build the engine interaction features, in featureLabels order
+# (raw columns: 0 Engine rpm, 1 Lub oil pressure, 2 Fuel pressure, 3 Coolant pressure, 4 lub oil temp, 5 Coolant temp)
+INTERACTION_LEFT = [1, 3, 4, 1, 0, 0, 0, 0]
+INTERACTION_RIGHT = [4, 5, 5, 3, 4, 5, 1, 3]
 
 
 class EngineConditionPredictor:
-    def __init__(self, model_file='knn_model.pkl', scaler_file='aknn_scaler.pkl', feature_importances_file='feature_importances.pkl'):
+    def __init__(self, model_file='knn_model.pkl', scaler_file='aknn_scaler.pkl', feature_importances_file='feature_importances.pkl',
+                 neighbor_index=None, search_trees=None):
         """
         Initializes the model, scaler, and feature importances from disk.
+
+        If neighbor_index names a directory written by build_index.py, neighbour search runs
+        on that index instead of the pickled KNeighborsClassifier, which is then not loaded.
         """
-        self.model = joblib.load(model_file)
+        if neighbor_index:
+            overrides = {'search_trees': search_trees} if search_trees else {}
+            self.model = load_index(neighbor_index, **overrides)
+        else:
+            self.model = joblib.load(model_file)
         self.scaler = joblib.load(scaler_file)
         self.feature_importances = joblib.load(feature_importances_file)
         self.featureLabels=['Engine rpm', 'Lub oil pressure', 'Fuel pressure', 'Coolant pressure',
@@ -47,43 +107,65 @@ class EngineConditionPredictor:
        'LubOilPressure_CoolantPressure', 'EngineRPM_LubOilTemp',
        'EngineRPM_CoolantTemp', 'EngineRPM_LubOilPressure',
        'EngineRPM_CoolantPressure']
+        # The scaler was fitted on importance-weighted features (engine_health/AKNN.py),
+        # so weighting and scaling collapse to x * (importance * scale) + min
+        self.feature_scale = np.asarray(self.feature_importances) * self.scaler.scale_
+        self.feature_offset = self.scaler.min_.copy()
+        self.feature_clip = self.scaler.feature_range if self.scaler.clip else None
         print("Model, Scaler, and Feature Importances loaded successfully.")
 
+    @classmethod
+    def from_artifacts(cls, directory, mmap_mode='r', search_trees=None):
+        """
+        Load the predictor from arrays written by artifacts.py, memory-mapped so that
+        worker processes share the neighbour training set instead of copying it.
+        """
+        predictor = cls.__new__(cls)
+        overrides = {'search_trees': search_trees} if search_trees else {}
+        predictor.model = load_index(os.path.join(directory, 'engine_index'), mmap_mode=mmap_mode, **overrides)
+        predictor.feature_scale = np.load(os.path.join(directory, 'engine_feature_scale.npy'))
+        predictor.feature_offset = np.load(os.path.join(directory, 'engine_feature_offset.npy'))
+        with open(os.path.join(directory, 'engine.json')) as f:
+            meta = json.load(f)
+        predictor.featureLabels = meta['feature_labels']
+        predictor.feature_clip = meta['feature_clip']
+        print("Model, Scaler, and Feature Importances mapped from artifacts.")
+        return predictor
+
 
     def predict_condition(self, instance):
         """
         Predicts the engine condition for a new instance.
         """
-        # Extract values
-        lub_oil_pressure = instance[0, 1]
-        lub_oil_temp = instance[0, 4]
-        coolant_pressure = instance[0, 3]
-        coolant_temp = instance[0, 5]
-        engine_rpm = instance[0, 0]
-
-        # Add feature engineered columns to the test instance
-        instance = np.append(instance, [
-            lub_oil_pressure * lub_oil_temp,
-            coolant_pressure * coolant_temp,
-            lub_oil_temp * coolant_temp,
-            lub_oil_pressure * coolant_pressure,
-            engine_rpm * lub_oil_temp,
-            engine_rpm * coolant_temp,
-            engine_rpm * lub_oil_pressure,
-            engine_rpm * coolant_pressure
-        ])
-
-        # Convert the test instance to a DataFrame with the same columns as the training data
-        instance_df = pd.DataFrame(instance.reshape(1, -1), columns=self.featureLabels)
-
-        # Scale the test instance using the same scaler fitted on the training data
-        instance_scaled = self.scaler.transform(instance_df)
-
-        # Make prediction
-        predicted_condition = self.model.predict(instance_scaled)
-        return predicted_condition[0]
+        instance = np.asarray(instance, dtype=float).reshape(1, -1)
+        return self.predict_condition_batch(instance)[0]
+
+    def predict_condition_batch(self, instances):
+        """
+        Predicts the engine condition for a 2D array of instances, one instance per row.
+        """
+        return self.model.predict(self.transform_batch(instances))
+
+    def transform_batch(self, instances):
+        """
+        Builds the scaled feature matrix for an (n, 6) array of raw engine readings.
+        """
+        instances = np.asarray(instances, dtype=float)
+        features = np.empty((instances.shape[0], len(self.featureLabels)))
+
+        # Raw readings followed by the feature engineered interaction columns
+        features[:, :6] = instances
+        np.multiply(instances[:, INTERACTION_LEFT], instances[:, INTERACTION_RIGHT], out=features[:, 6:])
+
+        # Importance weighting and MinMax scaling folded into one multiply-add
+        features *= self.feature_scale
+        features += self.feature_offset
+        if self.feature_clip is not None:
+            np.clip(features, *self.feature_clip, out=features)
+        return features
+
 '''   
-model = PredictiveMaintenanceModel()  # This loads the model, scaler, pca, label_encoder, and smote into memory
+model = PredictiveMaintenanceModel()  # This loads the model, scaler, pca and label_encoder into memory
 test_instance = [300, 350, 1500, 50, 200, 50, 75_000]  # Replace with actual test data
 predicted_failure = model.predict_failure(test_instance)
 print(f"Predicted Failure Type: {predicted_failure}")
@@ -0,0 +1,262 @@
+import json
+import os
+import numpy as np
+from sklearn.metrics import DistanceMetric
+from sklearn.neighbors import KDTree, BallTree
+
+INDEX_META_FILE = 'index.json'
+
+
+def _vote(labels, neighbor_indices, neighbor_distances, classes, weights):
+    """
+    Majority (or inverse-distance weighted) vote over the neighbours of every query.
+    """
+    neighbor_labels = labels[neighbor_indices]
+    if neighbor_labels.shape[1] == 1:
+        return classes[neighbor_labels[:, 0]]
+    if weights == 'distance':
+        with np.errstate(divide='ignore'):
+            vote_weights = 1.0 / neighbor_distances
+        # Exact matches take the whole vote, as in KNeighborsClassifier
+        exact = np.isinf(vote_weights)
+        vote_weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(float), vote_weights)
+    else:
+        vote_weights = np.ones(neighbor_labels.shape)
+    scores = np.zeros((neighbor_labels.shape[0], len(classes)))
+    np.add.at(scores, (np.arange(neighbor_labels.shape[0])[:, np.newaxis], neighbor_labels), vote_weights)
+    return classes[scores.argmax(axis=1)]
+
+
+class NeighborIndex:
+    """
+    Base class for the engine-condition neighbour search backends.
+
+    Training points are stored with their class codes (indices into classes), and
+    predict() mirrors KNeighborsClassifier.predict on already-scaled features.
+    """
+
+    kind = None
+
+    def __init__(self, data, labels, classes, n_neighbors=1, weights='uniform'):
+        self.data = data
+        self.labels = labels
+        self.classes = classes
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """
+        Build the index from the training set carried by a fitted KNeighborsClassifier.
+        """
+        if model.effective_metric_ != 'euclidean':
+            raise ValueError(f"Only euclidean KNN models are supported, got {model.effective_metric_}")
+        return cls(
+            np.ascontiguousarray(model._fit_X, dtype=float),
+            np.asarray(model._y, dtype=np.int64),
+            np.asarray(model.classes_),
+            n_neighbors=model.n_neighbors,
+            weights=model.weights,
+            **kwargs,
+        )
+
+    def query(self, X, k=None):
+        """
+        Return (distances, indices) of the k nearest training points of every row.
+        """
+        raise NotImplementedError
+
+    def predict(self, X):
+        distances, indices = self.query(X, self.n_neighbors)
+        return _vote(self.labels, indices, distances, self.classes, self.weights)
+
+    def _params(self):
+        return {}
+
+    def _arrays(self):
+        return {'data': self.data, 'labels': self.labels, 'classes': self.classes}
+
+    def save(self, directory):
+        """
+        Write the index as one .npy file per array plus a small JSON description.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self._arrays().items():
+            np.save(os.path.join(directory, f'{name}.npy'), array)
+        meta = {'kind': self.kind, 'n_neighbors': self.n_neighbors, 'weights': self.weights, 'params': self._params()}
+        with open(os.path.join(directory, INDEX_META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+
+class TreeIndex(NeighborIndex):
+    """
+    Exact search with a KD-tree or ball tree.
+
+    The built tree is saved with the index, and a loaded index restores it over the
+    stored (possibly memory-mapped) arrays, so workers share one copy of the tree
+    instead of each rebuilding it into private memory.
+    """
+
+    kind = 'tree'
+
+    # Arrays of a built tree, in the order of KDTree/BallTree.__getstate__ after the training points
+    TREE_ARRAYS = ('tree_idx_array', 'tree_node_data', 'tree_node_bounds')
+
+    def __init__(self, data, labels, classes, n_neighbors=1, weights='uniform', algorithm='kd_tree', leaf_size=30,
+                 tree=None):
+        super().__init__(data, labels, classes, n_neighbors, weights)
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        tree_class = KDTree if algorithm == 'kd_tree' else BallTree
+        if tree is None:
+            self.tree = tree_class(data, leaf_size=leaf_size)
+        else:
+            # Restore rather than rebuild: sklearn keeps references to the arrays it is given
+            *arrays, counters = tree
+            self.tree = tree_class.__new__(tree_class)
+            self.tree.__setstate__((data, *arrays, *(int(counter) for counter in counters),
+                                    DistanceMetric.get_metric('euclidean'), None))
+
+    def query(self, X, k=None):
+        return self.tree.query(np.asarray(X, dtype=float), k=k or self.n_neighbors)
+
+    def _params(self):
+        return {'algorithm': self.algorithm, 'leaf_size': self.leaf_size}
+
+    def _arrays(self):
+        arrays = super()._arrays()
+        state = self.tree.__getstate__()
+        arrays.update(zip(self.TREE_ARRAYS, state[1:4]))
+        # Tree depth, leaf and call counters, kept so the restored tree reports the same state
+        arrays['tree_counters'] = np.array(state[4:11], dtype=np.int64)
+        return arrays
+
+
+class RandomProjectionForestIndex(NeighborIndex):
+    """
+    Approximate search over a forest of random-projection trees.
+
+    Every tree is a complete binary tree stored in heap order: each node splits its
+    points at the median of their projection on a random direction, down to a depth
+    where leaves hold at most leaf_size points. A query descends search_trees trees
+    together and ranks the points of the leaves it lands in exactly. More trees or
+    bigger leaves raise recall at the cost of latency.
+    """
+
+    kind = 'rp_forest'
+
+    def __init__(self, data, labels, classes, n_neighbors=1, weights='uniform', n_trees=8, leaf_size=32,
+                 random_state=0, search_trees=None, forest=None):
+        super().__init__(data, labels, classes, n_neighbors, weights)
+        self.n_trees = n_trees
+        self.leaf_size = leaf_size
+        self.random_state = random_state
+        self.search_trees = n_trees if search_trees is None else search_trees
+        if not 1 <= self.search_trees <= n_trees:
+            raise ValueError(f"search_trees must be between 1 and n_trees ({n_trees}), got {self.search_trees}")
+        if forest is None:
+            forest = self._build()
+        self.node_normal, self.node_threshold, self.leaf_members = forest
+        self.depth = int(np.log2(self.leaf_members.shape[1]))
+
+    def _build(self):
+        rng = np.random.default_rng(self.random_state)
+        n_points, dimensions = self.data.shape
+        depth = max(0, int(np.ceil(np.log2(n_points / self.leaf_size))))
+        n_nodes = 2 ** depth - 1
+        node_normal = np.zeros((self.n_trees, n_nodes, dimensions))
+        node_threshold = np.zeros((self.n_trees, n_nodes))
+        leaf_members = np.full((self.n_trees, 2 ** depth, int(np.ceil(n_points / 2 ** depth))), -1, dtype=np.int64)
+
+        for tree in range(self.n_trees):
+            nodes = [np.arange(n_points)]
+            for node in range(n_nodes):
+                points = nodes[node]
+                normal = rng.standard_normal(dimensions)
+                projection = self.data[points] @ normal
+                # Sort by projection so ties at the median still split evenly
+                order = np.argsort(projection, kind='stable')
+                half = len(points) // 2
+                node_normal[tree, node] = normal
+                node_threshold[tree, node] = projection[order[half - 1]] if half else 0.0
+                nodes.append(points[order[:half]])
+                nodes.append(points[order[half:]])
+            for leaf, points in enumerate(nodes[n_nodes:]):
+                leaf_members[tree, leaf, :len(points)] = points
+        return node_normal, node_threshold, leaf_members
+
+    def _candidates(self, X):
+        # Descend every searched tree at once, one level per step
+        trees = np.arange(self.search_trees)
+        node = np.zeros((X.shape[0], self.search_trees), dtype=np.int64)
+        for _ in range(self.depth):
+            projection = np.einsum('nd,ntd->nt', X, self.node_normal[trees, node])
+            node = 2 * node + 1 + (projection > self.node_threshold[trees, node])
+        leaves = node - (2 ** self.depth - 1)
+        return self.leaf_members[trees, leaves].reshape(X.shape[0], -1)
+
+    def query(self, X, k=None, chunk_size=256):
+        k = k or self.n_neighbors
+        X = np.asarray(X, dtype=float)
+        distances = np.empty((X.shape[0], k))
+        indices = np.empty((X.shape[0], k), dtype=np.int64)
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = X[start:start + chunk_size]
+            candidates = self._candidates(chunk)
+            candidates.sort(axis=1)
+            # Padding slots and points found by several trees are ranked last
+            invalid = candidates < 0
+            invalid[:, 1:] |= candidates[:, 1:] == candidates[:, :-1]
+            difference = self.data[np.maximum(candidates, 0)] - chunk[:, np.newaxis, :]
+            candidate_distances = np.einsum('ijk,ijk->ij', difference, difference)
+            candidate_distances[invalid] = np.inf
+
+            if k < candidates.shape[1]:
+                nearest = np.argpartition(candidate_distances, k - 1, axis=1)[:, :k]
+            else:
+                nearest = np.argsort(candidate_distances, axis=1)[:, :k]
+            nearest_distances = np.take_along_axis(candidate_distances, nearest, axis=1)
+            order = np.argsort(nearest_distances, axis=1)
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            distances[start:start + chunk.shape[0]] = np.sqrt(np.take_along_axis(nearest_distances, order, axis=1))
+            indices[start:start + chunk.shape[0]] = np.take_along_axis(candidates, nearest, axis=1)
+        return distances, indices
+
+    def _params(self):
+        return {'n_trees': self.n_trees, 'leaf_size': self.leaf_size, 'random_state': self.random_state}
+
+    def _arrays(self):
+        arrays = super()._arrays()
+        arrays.update({
+            'node_normal': self.node_normal,
+            'node_threshold': self.node_threshold,
+            'leaf_members': self.leaf_members,
+        })
+        return arrays
+
+
+INDEX_KINDS = {
+    TreeIndex.kind: TreeIndex,
+    RandomProjectionForestIndex.kind: RandomProjectionForestIndex,
+}
+
+
+def load_index(directory, mmap_mode=None, **overrides):
+    """
+    Load an index written by NeighborIndex.save. Query-time settings such as
+    search_trees can be overridden.
+    """
+    with open(os.path.join(directory, INDEX_META_FILE)) as f:
+        meta = json.load(f)
+
+    def array(name):
+        return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+
+    params = dict(meta['params'], **overrides)
+    index_class = INDEX_KINDS[meta['kind']]
+    if index_class is RandomProjectionForestIndex:
+        params['forest'] = tuple(array(name) for name in ('node_normal', 'node_threshold', 'leaf_members'))
+    elif os.path.exists(os.path.join(directory, 'tree_counters.npy')):
+        params['tree'] = tuple(array(name) for name in TreeIndex.TREE_ARRAYS + ('tree_counters',))
+    return index_class(array('data'), array('labels'), array('classes'),
+                       n_neighbors=meta['n_neighbors'], weights=meta['weights'], **params)
@@ -0,0 +1,166 @@
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Rough per-entry bookkeeping cost (dict slot, tuple, key and value objects) added to the key and value sizes
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def parse_resolution(text, size):
+    """
+    Parse a comma-separated list of per-feature resolutions; a single value applies to every feature.
+    """
+    values = [float(value) for value in text.split(",")]
+    if len(values) == 1:
+        values = values * size
+    if len(values) != size or min(values) <= 0:
+        raise ValueError(f"Expected 1 or {size} positive resolutions, got {text!r}")
+    return np.asarray(values)
+
+
+class QuantizedCache:
+    """
+    LRU cache of one model's predictions keyed on inputs rounded to a per-feature resolution.
+
+    Rows that round to the same grid cell share a prediction. Entries expire after
+    ttl seconds, and the least recently used ones are evicted once the estimated
+    size of the cache exceeds max_bytes.
+    """
+
+    def __init__(self, resolution, max_bytes=16 * 1024 * 1024, ttl=300.0):
+        self.resolution = np.asarray(resolution, dtype=float)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+
+    def keys(self, X):
+        """
+        Return the cache key of every row of X.
+        """
+        cells = np.floor(np.asarray(X, dtype=float) / self.resolution + 0.5).astype(np.int64)
+        return [row.tobytes() for row in cells]
+
+    def get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires, _ = entry
+        if expires <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, now):
+        if key in self._entries:
+            self._remove(key)
+        size = len(key) + len(value) + ENTRY_OVERHEAD_BYTES
+        self._entries[key] = (value, now + self.ttl, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CachedPredictor:
+    """
+    Puts a QuantizedCache in front of each model of an inference executor.
+
+    Only rows missing from either cache are sent to the executor, and both caches
+    are cleared whenever the executor loads its models again.
+    """
+
+    def __init__(self, executor, predictive_cache, engine_cache):
+        self.executor = executor
+        self.predictive_cache = predictive_cache
+        self.engine_cache = engine_cache
+        self.model_version = None
+        self.rows = 0
+        self.rows_from_cache = 0
+        self.saved_ms = 0.0
+        # Running average of executor time per computed row, used to estimate saved time
+        self._ms_per_row = None
+
+    def invalidate(self):
+        self.predictive_cache.clear()
+        self.engine_cache.clear()
+
+    async def run(self, predictive_inputs, engine_condition_inputs):
+        """
+        Predict a batch like InferenceExecutor.run, answering from the caches where possible.
+        """
+        if self.model_version != self.executor.model_version:
+            self.invalidate()
+            self.model_version = self.executor.model_version
+
+        now = time.monotonic()
+        predictive_keys = self.predictive_cache.keys(predictive_inputs)
+        engine_keys = self.engine_cache.keys(engine_condition_inputs)
+        failures = [self.predictive_cache.get(key, now) for key in predictive_keys]
+        conditions = [self.engine_cache.get(key, now) for key in engine_keys]
+        missing = [row for row, (failure, condition) in enumerate(zip(failures, conditions))
+                   if failure is None or condition is None]
+
+        self.rows += len(failures)
+        cached_rows = len(failures) - len(missing)
+        self.rows_from_cache += cached_rows
+        if self._ms_per_row is not None:
+            self.saved_ms += cached_rows * self._ms_per_row
+
+        if missing:
+            started = time.perf_counter()
+            computed_failures, computed_conditions = await self.executor.run(
+                predictive_inputs[missing], engine_condition_inputs[missing])
+            ms_per_row = (time.perf_counter() - started) * 1000.0 / len(missing)
+            self._ms_per_row = ms_per_row if self._ms_per_row is None else 0.9 * self._ms_per_row + 0.1 * ms_per_row
+
+            now = time.monotonic()
+            for row, failure, condition in zip(missing, computed_failures, computed_conditions):
+                failures[row], conditions[row] = str(failure), str(condition)
+                self.predictive_cache.put(predictive_keys[row], failures[row], now)
+                self.engine_cache.put(engine_keys[row], conditions[row], now)
+        return np.asarray(failures), np.asarray(conditions)
+
+    def stats(self):
+        return {
+            "rows": self.rows,
+            "rows_from_cache": self.rows_from_cache,
+            "row_hit_ratio": self.rows_from_cache / self.rows if self.rows else 0.0,
+            "estimated_saved_ms": self.saved_ms,
+            "model_version": self.model_version,
+            "failure_type": self.predictive_cache.stats(),
+            "engine_condition": self.engine_cache.stats(),
+        }
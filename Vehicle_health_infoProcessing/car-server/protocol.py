@@ -0,0 +1,103 @@
+import json
+import numpy as np
+
+# WebSocket subprotocol a vehicle offers to send binary frames; JSON text frames stay the default
+BINARY_SUBPROTOCOL = "vhealth.bin.v1"
+
+# A binary telemetry frame is the 7 predictive-maintenance inputs followed by the
+# 6 engine-condition inputs as little-endian float32, then the UTF-8 vehicle ID.
+# The ID may be left out after the first frame of a connection.
+TELEMETRY_DTYPE = np.dtype('<f4')
+TELEMETRY_VALUES = 13
+TELEMETRY_SIZE = TELEMETRY_VALUES * TELEMETRY_DTYPE.itemsize
+PREDICTIVE_VALUES = 7
+MAX_VEHICLE_KEY_BYTES = 64
+
+# Separates failure type and engine condition in a binary response
+RESPONSE_SEPARATOR = b"\x1f"
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def decode_binary_frame(data, vehicle_id=None):
+    """
+    Split a binary frame into (vehicle_id, predictive_row, engine_row) without going
+    through Python floats; vehicle_id is kept when the frame carries no key.
+    """
+    if len(data) < TELEMETRY_SIZE:
+        raise ProtocolError(f"Binary frame is {len(data)} bytes, expected at least {TELEMETRY_SIZE}")
+    key = data[TELEMETRY_SIZE:]
+    if key:
+        if len(key) > MAX_VEHICLE_KEY_BYTES:
+            raise ProtocolError(f"Vehicle key is longer than {MAX_VEHICLE_KEY_BYTES} bytes")
+        try:
+            vehicle_id = key.decode()
+        except UnicodeDecodeError as e:
+            raise ProtocolError(f"Vehicle key is not valid UTF-8: {e}")
+    row = np.frombuffer(data, dtype=TELEMETRY_DTYPE, count=TELEMETRY_VALUES)
+    return vehicle_id, row[:PREDICTIVE_VALUES], row[PREDICTIVE_VALUES:]
+
+
+def decode_json_frame(message, vehicle_id=None, max_samples=None):
+    """
+    Split a JSON text frame into (vehicle_id, predictive_rows, engine_rows, timestamps).
+
+    A frame holds either one reading ("predictive_model_input" and
+    "engine_condition_input"), for which timestamps is None, or a "samples" list of
+    readings that each carry their own "timestamp".
+    """
+    try:
+        instance_data = json.loads(message)
+    except ValueError as e:
+        raise ProtocolError(f"Invalid JSON: {e}")
+    if not isinstance(instance_data, dict):
+        raise ProtocolError("Frame must be a JSON object")
+    if "vehicle_id" in instance_data:
+        vehicle_id = instance_data["vehicle_id"]
+        # IDs are matched by prefix and used as dict keys further on, so only strings are accepted
+        if not isinstance(vehicle_id, str):
+            raise ProtocolError("vehicle_id must be a string")
+    if "samples" not in instance_data:
+        try:
+            predictive_input = np.array(instance_data["predictive_model_input"], dtype=float).reshape(1, -1)
+            engine_condition_input = np.array(instance_data["engine_condition_input"], dtype=float).reshape(1, -1)
+        except KeyError as e:
+            raise ProtocolError(f"Missing {e}")
+        except (TypeError, ValueError) as e:
+            raise ProtocolError(f"Malformed reading: {e}")
+        if predictive_input.shape[1] != PREDICTIVE_VALUES or \
+                engine_condition_input.shape[1] != TELEMETRY_VALUES - PREDICTIVE_VALUES:
+            raise ProtocolError("A reading needs 7 predictive model inputs and 6 engine condition inputs")
+        return vehicle_id, predictive_input, engine_condition_input, None
+
+    samples = instance_data["samples"]
+    if not isinstance(samples, list) or not samples:
+        raise ProtocolError("samples must be a non-empty list")
+    if max_samples is not None and len(samples) > max_samples:
+        raise ProtocolError(f"Frame has {len(samples)} samples, the limit is {max_samples}")
+    try:
+        predictive_inputs = np.array([sample["predictive_model_input"] for sample in samples], dtype=float)
+        engine_condition_inputs = np.array([sample["engine_condition_input"] for sample in samples], dtype=float)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ProtocolError(f"Malformed samples: {e}")
+    if predictive_inputs.shape != (len(samples), PREDICTIVE_VALUES) or \
+            engine_condition_inputs.shape != (len(samples), TELEMETRY_VALUES - PREDICTIVE_VALUES):
+        raise ProtocolError("Every sample needs 7 predictive model inputs and 6 engine condition inputs")
+    return vehicle_id, predictive_inputs, engine_condition_inputs, [sample.get("timestamp") for sample in samples]
+
+
+def encode_binary_frame(predictive_input, engine_condition_input, vehicle_id=None):
+    """
+    Build a binary telemetry frame (used by tests and tools; the Pi clients pack it with struct).
+    """
+    values = np.concatenate([np.ravel(predictive_input), np.ravel(engine_condition_input)]).astype(TELEMETRY_DTYPE)
+    if values.size != TELEMETRY_VALUES:
+        raise ProtocolError(f"Expected {TELEMETRY_VALUES} values, got {values.size}")
+    return values.tobytes() + (vehicle_id.encode() if vehicle_id else b"")
+
+
+def encode_binary_response(response):
+    return (response["Predicted Failure Type"].encode() + RESPONSE_SEPARATOR
+            + response["Predicted Engine Condition"].encode())
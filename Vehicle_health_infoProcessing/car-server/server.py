@@ -1,23 +1,174 @@
 import json
-import numpy as np
 import logging
 import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from models import PredictiveMaintenanceModel, EngineConditionPredictor
+from fastapi.responses import JSONResponse, PlainTextResponse
+from admission import AdmissionController
+from batching import MicroBatcher
+from prediction_cache import CachedPredictor, QuantizedCache, parse_resolution
+from executors import create_executor, InferenceTimeoutError
+from broker import create_broker
+from fanout import MonitorFanout, TickBroadcaster
+from history import TelemetryHistory
+from metrics import StageMetrics, prometheus_text
+from telemetry_log import TelemetryLog
+from subscriptions import Subscription
+from protocol import BINARY_SUBPROTOCOL, ProtocolError, decode_binary_frame, decode_json_frame, encode_binary_response
+import config
 import warnings
 warnings.filterwarnings("ignore")
 
-# Initialize models
-predictive_model = PredictiveMaintenanceModel()
-engine_condition_predictor = EngineConditionPredictor()
+# Per-stage latency histograms for /metrics; None when instrumentation is switched off
+stages = StageMetrics() if config.METRICS_ENABLED else None
 
-# Maintain connected vehicles and monitoring clients
+# Run inference behind the configured executor; models load when it starts
+executor = create_executor(
+    config.INFERENCE_EXECUTOR,
+    workers=config.INFERENCE_WORKERS,
+    max_in_flight=config.INFERENCE_MAX_IN_FLIGHT,
+    timeout=config.INFERENCE_TIMEOUT_S,
+    stage_metrics=stages,
+)
+
+# Set once the models have loaded in the background; startup_error holds why they could not
+models_ready = asyncio.Event()
+startup_error = None
+
+# Optionally answer repeated, near-identical readings from a cache in front of the executor
+prediction_cache = None
+if config.PREDICTION_CACHE:
+    cache_bytes = int(config.PREDICTION_CACHE_MAX_MB * 1024 * 1024) // 2
+    prediction_cache = CachedPredictor(
+        executor,
+        QuantizedCache(parse_resolution(config.PREDICTION_CACHE_PREDICTIVE_RESOLUTION, 7),
+                       max_bytes=cache_bytes, ttl=config.PREDICTION_CACHE_TTL_S),
+        QuantizedCache(parse_resolution(config.PREDICTION_CACHE_ENGINE_RESOLUTION, 6),
+                       max_bytes=cache_bytes, ttl=config.PREDICTION_CACHE_TTL_S),
+    )
+
+# Gathers frames from all vehicle connections into batched predictions
+batcher = MicroBatcher(
+    prediction_cache.run if prediction_cache is not None else executor.run,
+    max_wait_ms=config.BATCH_MAX_WAIT_MS,
+    max_batch_size=config.BATCH_MAX_SIZE,
+    max_in_flight=config.INFERENCE_MAX_IN_FLIGHT,
+)
+
+# Rate-limits each vehicle and sheds frames when too much inference is pending
+admission = AdmissionController(
+    rate=config.ADMISSION_RATE_PER_S,
+    burst=config.ADMISSION_BURST,
+    max_delay_ms=config.ADMISSION_MAX_DELAY_MS,
+    max_pending_rows=config.ADMISSION_MAX_PENDING_ROWS,
+    overload_retry_ms=config.ADMISSION_OVERLOAD_RETRY_MS,
+)
+
+# Carries predictions from every worker to the monitors of every worker
+broker = create_broker(config.BROKER, config.BROKER_SOCKET)
+
+# Maintain connected vehicles (fleet-wide, mirrored from the broker) and this worker's monitoring clients
 connected_vehicles = {}
-monitoring_clients = set()
+monitoring_clients = MonitorFanout(max_queue=config.MONITOR_QUEUE_SIZE, overflow_policy=config.MONITOR_OVERFLOW_POLICY,
+                                   stage_metrics=stages)
+
+# Vehicle connections open on this worker
+vehicle_connections = 0
+
+# Ring buffers of each vehicle's recent readings, replayed to monitors on request
+history = TelemetryHistory(config.HISTORY_POINTS, config.HISTORY_MAX_VEHICLES) if config.HISTORY_POINTS > 0 else None
+
+# Durable log of every scored reading for retraining and audits
+telemetry_log = None
+if config.TELEMETRY_LOG_DIR:
+    telemetry_log = TelemetryLog(
+        config.TELEMETRY_LOG_DIR,
+        segment_rows=config.TELEMETRY_LOG_SEGMENT_ROWS,
+        commit_interval_ms=config.TELEMETRY_LOG_COMMIT_MS,
+        fsync=config.TELEMETRY_LOG_FSYNC,
+    )
+
+
+def record_readings(vehicle_id, timestamps, predictive_inputs, engine_condition_inputs, failures, conditions):
+    """
+    Keep scored readings in the vehicle's history and the telemetry log.
+    """
+    if history is not None:
+        history.record(vehicle_id, timestamps, predictive_inputs, engine_condition_inputs, failures, conditions)
+    if telemetry_log is not None:
+        telemetry_log.append(vehicle_id, timestamps, predictive_inputs, engine_condition_inputs, failures, conditions)
+
+# In tick mode, monitors get batched change-only frames instead of every prediction
+ticker = None
+if config.MONITOR_BROADCAST_MODE == "tick":
+    ticker = TickBroadcaster(monitoring_clients, connected_vehicles,
+                             interval_ms=config.MONITOR_TICK_MS, resync_ticks=config.MONITOR_RESYNC_TICKS)
+
+
+async def on_prediction(response):
+    """
+    Apply a prediction from the broker and queue it for this worker's monitoring clients.
+    """
+    started = time.perf_counter() if stages else None
+    connected_vehicles[response["vehicle_id"]] = response
+    if ticker is not None:
+        ticker.update(response)
+    elif monitoring_clients:
+        monitoring_clients.broadcast(response)
+    if stages:
+        stages.lap("monitor_fanout", started)
+
+
+def queue_snapshot(monitor):
+    """
+    Queue the current state of the vehicles a monitor is subscribed to.
+    """
+    if ticker is not None:
+        monitor.offer(None, ticker.snapshot_frame(monitor))
+    else:
+        for vehicle_data in monitoring_clients.matching(monitor, list(connected_vehicles.values())):
+            monitor.offer(vehicle_data["vehicle_id"], json.dumps(vehicle_data))
+
+
+async def load_models():
+    """
+    Start the executor, which loads the models, and mark the server ready once it has.
+    """
+    global startup_error
+    try:
+        await executor.start()
+    except Exception as e:
+        startup_error = str(e)
+        logger.error(f"Model loading failed: {e}")
+        return
+    models_ready.set()
+    logger.info(f"Models loaded in {executor.load_seconds:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load in the background so the port is bound (and /healthz answers) straight away
+    loading = asyncio.create_task(load_models())
+    await batcher.start()
+    await broker.start(on_prediction)
+    if ticker is not None:
+        await ticker.start()
+    if telemetry_log is not None:
+        await telemetry_log.start()
+    yield
+    if telemetry_log is not None:
+        await telemetry_log.stop()
+    if ticker is not None:
+        await ticker.stop()
+    await broker.stop()
+    await batcher.stop()
+    loading.cancel()
+    await executor.stop()
 
 # Create FastAPI instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure logging for better debugging and error reporting
 logging.basicConfig(level=logging.INFO)
@@ -32,22 +183,129 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def wait_for_models(websocket, vehicle_id):
+    """
+    Hold a frame that arrives while the models are loading for up to STARTUP_WAIT_S.
+
+    Returns False, after telling the vehicle when to retry, if they are still not ready.
+    """
+    if startup_error is None:
+        try:
+            await asyncio.wait_for(models_ready.wait(), config.STARTUP_WAIT_S)
+            return True
+        except asyncio.TimeoutError:
+            pass
+    await websocket.send_text(json.dumps({
+        "vehicle_id": vehicle_id, "error": "starting", "retry_after_ms": round(config.STARTUP_RETRY_MS),
+    }))
+    return False
+
+async def handle_sample_frame(websocket, vehicle_id, predictive_inputs, engine_condition_inputs, timestamps, mark):
+    """
+    Score a multi-sample frame and answer with the predictions in sample order.
+    """
+    try:
+        failures, conditions = await batcher.submit_many(predictive_inputs, engine_condition_inputs)
+    except InferenceTimeoutError as e:
+        logger.warning(f"Prediction timed out for vehicle {vehicle_id}")
+        await websocket.send_text(json.dumps({"vehicle_id": vehicle_id, "error": str(e)}))
+        return
+    if stages:
+        mark = stages.lap("predict", mark)
+
+    predictions = [
+        {"timestamp": timestamp, "Predicted Failure Type": str(failure), "Predicted Engine Condition": str(condition)}
+        for timestamp, failure, condition in zip(timestamps, failures, conditions)
+    ]
+    await websocket.send_text(json.dumps({"vehicle_id": vehicle_id, "predictions": predictions}))
+    if stages:
+        mark = stages.lap("send", mark)
+
+    # Samples without a numeric timestamp are recorded at arrival time
+    now = time.time()
+    sample_times = [t if isinstance(t, (int, float)) and not isinstance(t, bool) else now for t in timestamps]
+    record_readings(vehicle_id, sample_times, predictive_inputs, engine_condition_inputs, failures, conditions)
+    if stages:
+        mark = stages.lap("record", mark)
+
+    # Monitors track the current state of a vehicle, so only its latest sample is published
+    await broker.publish({
+        "vehicle_id": vehicle_id,
+        "Predicted Failure Type": predictions[-1]["Predicted Failure Type"],
+        "Predicted Engine Condition": predictions[-1]["Predicted Engine Condition"],
+    })
+    if stages:
+        stages.lap("publish", mark)
+
 # Handle vehicle WebSocket connections
 @app.websocket("/vehicle")
 async def handle_vehicle(websocket: WebSocket):
-    await websocket.accept()
+    # Vehicles offering the binary subprotocol send packed float32 frames; everyone else sends JSON
+    binary = BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=BINARY_SUBPROTOCOL if binary else None)
+    vehicle_id = str(websocket.client)
+    global vehicle_connections
+    vehicle_connections += 1
     try:
-        async for message in websocket.iter_text():
-            instance_data = json.loads(message)
-            vehicle_id = instance_data.get("vehicle_id", str(websocket.client))
+        frames = websocket.iter_bytes() if binary else websocket.iter_text()
+        async for message in frames:
+            # With metrics enabled, each stage is timed from the end of the previous one
+            mark = time.perf_counter() if stages else None
 
             # Prepare input for models
-            predictive_input = np.array(instance_data["predictive_model_input"]).reshape(1, -1)
-            engine_condition_input = np.array(instance_data["engine_condition_input"]).reshape(1, -1)
+            timestamps = None
+            try:
+                if binary:
+                    vehicle_id, predictive_input, engine_condition_input = decode_binary_frame(message, vehicle_id)
+                else:
+                    vehicle_id, predictive_input, engine_condition_input, timestamps = decode_json_frame(
+                        message, str(websocket.client), max_samples=config.MAX_FRAME_SAMPLES)
+            except ProtocolError as e:
+                await websocket.send_text(json.dumps({"vehicle_id": vehicle_id, "error": str(e)}))
+                continue
+            rows = len(timestamps) if timestamps is not None else 1
+            if stages:
+                mark = stages.lap("decode", mark)
+                stages.count("vehicle_frames")
+                stages.count("vehicle_samples", rows)
+            if not models_ready.is_set():
+                ready = await wait_for_models(websocket, vehicle_id)
+                # Held while the models load; only frames arriving during startup are timed here
+                if stages:
+                    mark = stages.lap("model_wait", mark)
+                if not ready:
+                    continue
 
-            # Predict failure type and engine condition
-            predicted_failure = predictive_model.predict_failure(predictive_input)
-            predicted_condition = engine_condition_predictor.predict_condition(engine_condition_input)
+            # Tell vehicles over their rate, or arriving while inference is backed up, when to retry
+            retry_after_ms = await admission.admit(vehicle_id, rows)
+            if stages:
+                mark = stages.lap("admission", mark)
+            if retry_after_ms is not None:
+                if stages:
+                    stages.count("vehicle_frames_shed")
+                await websocket.send_text(json.dumps({
+                    "vehicle_id": vehicle_id, "error": "overloaded", "retry_after_ms": round(retry_after_ms),
+                }))
+                continue
+
+            try:
+                # A multi-sample frame is scored as one block and answered with one array
+                if timestamps is not None:
+                    await handle_sample_frame(websocket, vehicle_id, predictive_input, engine_condition_input,
+                                              timestamps, mark)
+                    continue
+
+                # Predict failure type and engine condition as part of the next batch
+                try:
+                    predicted_failure, predicted_condition = await batcher.submit(predictive_input, engine_condition_input)
+                except InferenceTimeoutError as e:
+                    logger.warning(f"Prediction timed out for vehicle {vehicle_id}")
+                    await websocket.send_text(json.dumps({"vehicle_id": vehicle_id, "error": str(e)}))
+                    continue
+            finally:
+                admission.release(rows)
+            if stages:
+                mark = stages.lap("predict", mark)
 
             response = {
                 "vehicle_id": vehicle_id,
@@ -55,35 +313,87 @@ async def handle_vehicle(websocket: WebSocket):
                 "Predicted Engine Condition": str(predicted_condition),
             }
 
-            # Store the vehicle data in the connected vehicles dictionary
-            connected_vehicles[vehicle_id] = response
+            record_readings(vehicle_id, [time.time()], predictive_input, engine_condition_input,
+                            [response["Predicted Failure Type"]], [response["Predicted Engine Condition"]])
+            if stages:
+                mark = stages.lap("record", mark)
 
             # Send the prediction response to the vehicle
-            await websocket.send_text(json.dumps(response))
+            if binary:
+                await websocket.send_bytes(encode_binary_response(response))
+            else:
+                await websocket.send_text(json.dumps(response))
+            if stages:
+                mark = stages.lap("send", mark)
 
-            # Broadcast the new prediction to monitoring clients
-            if monitoring_clients:
-                broadcast_message = json.dumps(response)
-                await asyncio.gather(*[client.send_text(broadcast_message) for client in monitoring_clients])
+            # Publish the prediction so monitors on every worker see it
+            await broker.publish(response)
+            if stages:
+                stages.lap("publish", mark)
 
     except WebSocketDisconnect:
         logger.info(f"Vehicle client disconnected: {websocket.client}")
     except Exception as e:
         logger.error(f"Error in vehicle handler: {e}")
+    finally:
+        vehicle_connections -= 1
+
+def history_frame(request):
+    """
+    Build the reply to a history request: the last K points of each requested vehicle in one frame.
+    """
+    if history is None:
+        raise ValueError("History is disabled on this server")
+    vehicle_ids = request.get("vehicle_ids")
+    if not isinstance(vehicle_ids, list) or not all(isinstance(vehicle_id, str) for vehicle_id in vehicle_ids):
+        raise ValueError("vehicle_ids must be a list of vehicle IDs")
+    points = request.get("points", history.capacity)
+    if not isinstance(points, int) or points < 1:
+        raise ValueError("points must be a positive integer")
+    vehicles = [history.replay(vehicle_id, points) for vehicle_id in vehicle_ids]
+    return json.dumps({"type": "history", "vehicles": [vehicle for vehicle in vehicles if vehicle is not None]})
 
 # Handle monitoring client connections
 @app.websocket("/monitor")
 async def handle_monitor(websocket: WebSocket):
-    # Add monitoring client to the set
+    # Add monitoring client to the set; an initial subscription may be given as query parameters
     await websocket.accept()
-    monitoring_clients.add(websocket)
+    monitor = monitoring_clients.connect(websocket, Subscription.from_query(websocket.query_params))
+    writer = None
     try:
         # Send current vehicle data to the monitoring client
-        for vehicle_data in connected_vehicles.values():
-            await websocket.send_text(json.dumps(vehicle_data))
+        if ticker is not None:
+            await websocket.send_text(ticker.snapshot_frame(monitor))
+        else:
+            for vehicle_data in monitoring_clients.matching(monitor, list(connected_vehicles.values())):
+                await websocket.send_text(json.dumps(vehicle_data))
+
+        # Stream queued updates from a writer task of its own
+        writer = asyncio.create_task(monitor.run())
 
-        # Keep the connection open and listen for any messages (currently no actions needed for monitor)
-        await websocket.receive_text()
+        # Monitors may change their subscription ({"type": "subscribe", ...}) or ask for the
+        # recent history of some vehicles ({"type": "history", "vehicle_ids": [...], "points": K})
+        while True:
+            message = await websocket.receive_text()
+            started = time.perf_counter() if stages else None
+            try:
+                request = json.loads(message)
+                if not isinstance(request, dict) or request.get("type") not in ("subscribe", "history"):
+                    raise ValueError("Expected a subscribe or history message")
+                if request["type"] == "history":
+                    monitor.offer(None, history_frame(request))
+                    if stages:
+                        stages.lap("monitor_history", started)
+                    continue
+                subscription = Subscription.from_message(request)
+            except ValueError as e:
+                monitor.offer(None, json.dumps({"type": "error", "error": str(e)}))
+                continue
+            monitoring_clients.subscribe(monitor, subscription)
+            monitor.offer(None, json.dumps({"type": "subscribed", "subscription": subscription.to_dict()}))
+            queue_snapshot(monitor)
+            if stages:
+                stages.lap("monitor_subscribe", started)
 
     except WebSocketDisconnect:
         logger.info(f"Monitoring client disconnected: {websocket.client}")
@@ -91,9 +401,102 @@ async def handle_monitor(websocket: WebSocket):
         logger.error(f"Error in monitor handler: {e}")
     finally:
         # Remove the monitoring client from the set when disconnected
-        monitoring_clients.remove(websocket)
+        monitoring_clients.disconnect(monitor)
+        if writer is not None:
+            writer.cancel()
+
+# Expose the micro-batching distributions for tuning the batch window
+@app.get("/stats/batching")
+async def batching_stats():
+    stats = batcher.stats()
+    stats["executor"] = {
+        "mode": config.INFERENCE_EXECUTOR,
+        "in_flight": executor.in_flight,
+        "max_in_flight": executor.max_in_flight,
+    }
+    return stats
+
+# Expose accepted, delayed and shed frame counters
+@app.get("/stats/admission")
+async def admission_stats():
+    return admission.stats()
+
+# Expose prediction cache hit ratios and estimated time saved
+@app.get("/stats/cache")
+async def cache_stats():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return dict(prediction_cache.stats(), enabled=True)
+
+# Expose telemetry log commit sizes and latencies
+@app.get("/stats/telemetry-log")
+async def telemetry_log_stats():
+    if telemetry_log is None:
+        return {"enabled": False}
+    return dict(telemetry_log.stats(), enabled=True)
+
+# Expose per-monitor queue depths and dropped/coalesced message counters
+@app.get("/stats/monitors")
+async def monitor_stats():
+    return monitoring_clients.stats()
+
+# Liveness: the process is up and serving requests
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+# Readiness: vehicles can be scored; 503 while the models are loading or if they failed to load
+@app.get("/readyz")
+async def readyz():
+    if models_ready.is_set():
+        return {"status": "ready", "model_load_s": executor.load_seconds}
+    if startup_error is not None:
+        return JSONResponse({"status": "failed", "error": startup_error}, status_code=503)
+    return JSONResponse({"status": "loading"}, status_code=503)
+
+# Expose stage latencies, connection counts and queue depths for Prometheus
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    gauges = {
+        "models_ready": ("1 once the models have loaded.", int(models_ready.is_set())),
+        "vehicle_connections": ("Vehicle WebSocket connections open on this worker.", vehicle_connections),
+        "monitor_connections": ("Monitor WebSocket connections open on this worker.", len(monitoring_clients)),
+        "fleet_vehicles": ("Vehicles with a known latest prediction.", len(connected_vehicles)),
+        "batch_queue_rows": ("Rows waiting for a prediction batch.", batcher.queue_depth()),
+        "inference_in_flight": ("Prediction batches being scored.", executor.in_flight),
+        "admission_pending_rows": ("Admitted rows waiting for or in inference.", admission.pending_rows),
+        "monitor_queue_messages": ("Messages queued for monitors.", monitoring_clients.queue_depth()),
+    }
+    if prediction_cache is not None:
+        gauges["prediction_cache_row_hit_ratio"] = ("Share of rows answered from the prediction cache.",
+                                                    prediction_cache.stats()["row_hit_ratio"])
+    histograms = {
+        "batch_size_rows": ("Rows per prediction batch.", batcher.batch_sizes, 1.0),
+        "batch_queue_wait_seconds": ("Time rows wait for their batch.", batcher.queue_wait_ms, 0.001),
+    }
+    return prometheus_text(stages, gauges, histograms)
 
 # Start the FastAPI server using Uvicorn
 if __name__ == "__main__":
+    import argparse
+    import multiprocessing
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8765)
+    from broker import run_hub
+
+    parser = argparse.ArgumentParser(description="Vehicle health WebSocket server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS)
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Workers share fleet state through a broker hub running beside them
+        hub = multiprocessing.Process(target=run_hub, args=(config.BROKER_SOCKET,), daemon=True)
+        hub.start()
+        os.environ["BROKER"] = "unix"
+        os.environ["BROKER_SOCKET"] = config.BROKER_SOCKET
+        uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
+        hub.terminate()
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,186 @@
+from collections import defaultdict
+
+# Subscription message keys and the matching /monitor query parameters
+SUBSCRIPTION_FIELDS = {
+    "vehicle_ids": "vehicle_id",
+    "vehicle_prefixes": "vehicle_prefix",
+    "failure_types": "failure_type",
+    "exclude_failure_types": "exclude_failure_type",
+    "engine_conditions": "engine_condition",
+}
+
+
+class Subscription:
+    """
+    Which predictions a monitoring client wants to receive.
+
+    Each field is a list of accepted values and an empty list accepts anything.
+    A prediction matches when its vehicle is listed by ID or starts with one of the
+    prefixes, its failure type is listed and not excluded, and its engine condition
+    is listed.
+    """
+
+    def __init__(self, vehicle_ids=(), vehicle_prefixes=(), failure_types=(), exclude_failure_types=(),
+                 engine_conditions=()):
+        self.vehicle_ids = frozenset(str(value) for value in vehicle_ids)
+        self.vehicle_prefixes = frozenset(str(value) for value in vehicle_prefixes)
+        self.failure_types = frozenset(str(value) for value in failure_types)
+        self.exclude_failure_types = frozenset(str(value) for value in exclude_failure_types)
+        self.engine_conditions = frozenset(str(value) for value in engine_conditions)
+
+    @classmethod
+    def from_message(cls, message):
+        """
+        Build a subscription from a {"type": "subscribe", ...} message sent by a monitor.
+        """
+        unknown = set(message) - set(SUBSCRIPTION_FIELDS) - {"type"}
+        if unknown:
+            raise ValueError(f"Unknown subscription fields: {sorted(unknown)}")
+        fields = {}
+        for name in SUBSCRIPTION_FIELDS:
+            values = message.get(name, [])
+            if isinstance(values, str) or not isinstance(values, list):
+                raise ValueError(f"Subscription field {name} must be a list")
+            fields[name] = values
+        return cls(**fields)
+
+    @classmethod
+    def from_query(cls, query_params):
+        """
+        Build a subscription from repeated /monitor query parameters, e.g. ?vehicle_prefix=eu-
+        """
+        return cls(**{name: query_params.getlist(param) for name, param in SUBSCRIPTION_FIELDS.items()})
+
+    @property
+    def filters_vehicles(self):
+        return bool(self.vehicle_ids or self.vehicle_prefixes)
+
+    def is_empty(self):
+        return not any(getattr(self, name) for name in SUBSCRIPTION_FIELDS)
+
+    def matches(self, response):
+        vehicle_id = response["vehicle_id"]
+        if self.filters_vehicles and vehicle_id not in self.vehicle_ids and \
+                not any(vehicle_id.startswith(prefix) for prefix in self.vehicle_prefixes):
+            return False
+        failure = response["Predicted Failure Type"]
+        if (self.failure_types and failure not in self.failure_types) or failure in self.exclude_failure_types:
+            return False
+        return not self.engine_conditions or response["Predicted Engine Condition"] in self.engine_conditions
+
+    def to_dict(self):
+        return {name: sorted(getattr(self, name)) for name in SUBSCRIPTION_FIELDS}
+
+
+class SubscriptionIndex:
+    """
+    Finds the subscribers of a prediction without testing every subscription.
+
+    Subscribers are indexed per field: vehicle IDs in a dict, prefixes in a
+    character trie, failure types and engine conditions in dicts, each next to the
+    set of subscribers that accept any value. A prediction is matched with a few
+    lookups per field and an intersection of the resulting candidate sets.
+    """
+
+    def __init__(self):
+        self._any_vehicle = set()
+        self._by_vehicle = defaultdict(set)
+        # Trie nodes are (children, subscribers) pairs keyed by character
+        self._prefixes = ({}, set())
+        self._any_failure = set()
+        self._by_failure = defaultdict(set)
+        self._excluded_failure = defaultdict(set)
+        self._any_condition = set()
+        self._by_condition = defaultdict(set)
+
+    def _prefix_node(self, prefix):
+        node = self._prefixes
+        for character in prefix:
+            node = node[0].setdefault(character, ({}, set()))
+        return node
+
+    def add(self, subscriber, subscription):
+        if subscription.filters_vehicles:
+            for vehicle_id in subscription.vehicle_ids:
+                self._by_vehicle[vehicle_id].add(subscriber)
+            for prefix in subscription.vehicle_prefixes:
+                self._prefix_node(prefix)[1].add(subscriber)
+        else:
+            self._any_vehicle.add(subscriber)
+        if subscription.failure_types:
+            for failure in subscription.failure_types:
+                self._by_failure[failure].add(subscriber)
+        else:
+            self._any_failure.add(subscriber)
+        for failure in subscription.exclude_failure_types:
+            self._excluded_failure[failure].add(subscriber)
+        if subscription.engine_conditions:
+            for condition in subscription.engine_conditions:
+                self._by_condition[condition].add(subscriber)
+        else:
+            self._any_condition.add(subscriber)
+
+    def remove(self, subscriber, subscription):
+        self._any_vehicle.discard(subscriber)
+        for vehicle_id in subscription.vehicle_ids:
+            self._discard(self._by_vehicle, vehicle_id, subscriber)
+        for prefix in subscription.vehicle_prefixes:
+            self._discard_prefix(prefix, subscriber)
+        self._any_failure.discard(subscriber)
+        for failure in subscription.failure_types:
+            self._discard(self._by_failure, failure, subscriber)
+        for failure in subscription.exclude_failure_types:
+            self._discard(self._excluded_failure, failure, subscriber)
+        self._any_condition.discard(subscriber)
+        for condition in subscription.engine_conditions:
+            self._discard(self._by_condition, condition, subscriber)
+
+    @staticmethod
+    def _discard(index, key, subscriber):
+        subscribers = index.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del index[key]
+
+    def _discard_prefix(self, prefix, subscriber):
+        # Walk down without creating nodes, then prune the ones left with no subscribers and no children
+        path = [self._prefixes]
+        for character in prefix:
+            node = path[-1][0].get(character)
+            if node is None:
+                return
+            path.append(node)
+        path[-1][1].discard(subscriber)
+        for depth in range(len(prefix), 0, -1):
+            children, subscribers = path[depth]
+            if children or subscribers:
+                break
+            del path[depth - 1][0][prefix[depth - 1]]
+
+    def _vehicle_candidates(self, vehicle_id):
+        candidates = self._any_vehicle | self._by_vehicle.get(vehicle_id, set())
+        node = self._prefixes
+        for character in vehicle_id:
+            node = node[0].get(character)
+            if node is None:
+                break
+            candidates |= node[1]
+        return candidates
+
+    def match(self, response):
+        """
+        Return the subscribers whose subscription accepts the prediction.
+        """
+        failure = response["Predicted Failure Type"]
+        condition = response["Predicted Engine Condition"]
+        candidate_sets = sorted((
+            self._vehicle_candidates(response["vehicle_id"]),
+            self._any_failure | self._by_failure.get(failure, set()),
+            self._any_condition | self._by_condition.get(condition, set()),
+        ), key=len)
+        matched = candidate_sets[0].intersection(*candidate_sets[1:])
+        excluded = self._excluded_failure.get(failure)
+        if excluded:
+            matched -= excluded
+        return matched
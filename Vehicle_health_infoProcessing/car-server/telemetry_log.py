@@ -0,0 +1,636 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from metrics import Histogram, BATCH_SIZE_BUCKETS, LATENCY_MS_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Every segment is a directory with one fixed-width file per column; row i of the
+# segment is entry i of every column file
+COLUMNS = {
+    'timestamp': (np.dtype('<f8'), ()),
+    'vehicle': (np.dtype('<u4'), ()),
+    'inputs': (np.dtype('<f4'), (13,)),
+    'failure': (np.dtype('<u2'), ()),
+    'condition': (np.dtype('<u2'), ()),
+}
+PREDICTIVE_VALUES = 7
+DICTIONARY_FILE = 'dictionary.json'
+INDEX_FILE = 'index.json'
+SEGMENT_PREFIX = 'segment-'
+# Rows per block of the sparse index
+INDEX_BLOCK_ROWS = 4096
+# Columns stored as per-segment dictionary codes, with their dictionary
+CODED_COLUMNS = (('vehicle', 'vehicles'), ('failure', 'failures'), ('condition', 'conditions'))
+
+
+def _column_path(segment, name):
+    return os.path.join(segment, f'{name}.bin')
+
+
+def _row_bytes(name):
+    dtype, shape = COLUMNS[name]
+    return dtype.itemsize * int(np.prod(shape, dtype=int))
+
+
+def _write_json(path, data):
+    # Write then rename so readers never see a half-written file
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+
+def new_segment_name():
+    return f'{SEGMENT_PREFIX}{time.time_ns():020d}-{os.getpid()}'
+
+
+def segment_rows(segment):
+    """
+    Number of complete rows in a segment; a torn write at the end of one column is ignored.
+    """
+    sizes = []
+    for name in COLUMNS:
+        path = _column_path(segment, name)
+        sizes.append(os.path.getsize(path) // _row_bytes(name) if os.path.exists(path) else 0)
+    return min(sizes)
+
+
+def open_columns(segment, rows=None):
+    """
+    Memory-map the columns of a segment (read-only).
+    """
+    rows = segment_rows(segment) if rows is None else rows
+    columns = {}
+    for name, (dtype, shape) in COLUMNS.items():
+        if rows == 0:
+            columns[name] = np.zeros((0,) + shape, dtype=dtype)
+        else:
+            columns[name] = np.memmap(_column_path(segment, name), dtype=dtype, mode='r', shape=(rows,) + shape)
+    return columns
+
+
+def load_dictionary(segment):
+    path = os.path.join(segment, DICTIONARY_FILE)
+    if not os.path.exists(path):
+        return {'vehicles': [], 'failures': [], 'conditions': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_index(segment):
+    """
+    Build the sparse index of a segment: its time range, and per block of
+    INDEX_BLOCK_ROWS rows the time range, plus the blocks holding each vehicle.
+    """
+    rows = segment_rows(segment)
+    columns = open_columns(segment, rows)
+    dictionary = load_dictionary(segment)
+    timestamps = np.asarray(columns['timestamp'])
+    vehicles = np.asarray(columns['vehicle'])
+    starts = np.arange(0, rows, INDEX_BLOCK_ROWS)
+    index = {
+        'rows': rows,
+        'block_rows': INDEX_BLOCK_ROWS,
+        'min_ts': float(timestamps.min()) if rows else None,
+        'max_ts': float(timestamps.max()) if rows else None,
+        'blocks': [[float(timestamps[start:start + INDEX_BLOCK_ROWS].min()),
+                    float(timestamps[start:start + INDEX_BLOCK_ROWS].max())] for start in starts],
+        'vehicles': {},
+    }
+    blocks = np.arange(rows) // INDEX_BLOCK_ROWS
+    for code in np.unique(vehicles):
+        mask = vehicles == code
+        vehicle_times = timestamps[mask]
+        index['vehicles'][dictionary['vehicles'][code]] = {
+            'code': int(code),
+            'rows': int(mask.sum()),
+            'min_ts': float(vehicle_times.min()),
+            'max_ts': float(vehicle_times.max()),
+            'blocks': np.unique(blocks[mask]).tolist(),
+        }
+    return index
+
+
+def seal_segment(segment, compacted=False):
+    """
+    Write the sparse index of a finished segment; sealed segments are never appended to again.
+    """
+    index = build_index(segment)
+    index['compacted'] = compacted
+    _write_json(os.path.join(segment, INDEX_FILE), index)
+
+
+class SegmentWriter:
+    """
+    Appends rows to one segment directory. Used from a single thread.
+    """
+
+    def __init__(self, segment, fsync=False):
+        self.segment = segment
+        self.fsync = fsync
+        os.makedirs(segment, exist_ok=True)
+        self.rows = 0
+        self.dictionary = {'vehicles': [], 'failures': [], 'conditions': []}
+        self._codes = {kind: {} for kind in self.dictionary}
+        self._dictionary_changed = False
+        self._files = {name: open(_column_path(segment, name), 'ab') for name in COLUMNS}
+
+    def encode(self, kind, values):
+        """
+        Return the segment's codes for an array of values, adding new values to its dictionary.
+        """
+        uniques, inverse = np.unique(np.asarray(values).astype(str), return_inverse=True)
+        codes = self._codes[kind]
+        unique_codes = []
+        for value in uniques.tolist():
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self.dictionary[kind])
+                self.dictionary[kind].append(value)
+                self._dictionary_changed = True
+            unique_codes.append(code)
+        return np.asarray(unique_codes, dtype=np.int64)[inverse]
+
+    def write(self, columns):
+        """
+        Append column arrays holding the same number of rows, with one write per column.
+        """
+        # The dictionary goes before the data so every code on disk is already named,
+        # even if the writer dies between the two or a reader opens the segment meanwhile
+        if self._dictionary_changed:
+            _write_json(os.path.join(self.segment, DICTIONARY_FILE), self.dictionary)
+            self._dictionary_changed = False
+        try:
+            for name, (dtype, _) in COLUMNS.items():
+                self._files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+            for f in self._files.values():
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        except Exception:
+            self._truncate()
+            raise
+        self.rows += len(columns['timestamp'])
+
+    def _truncate(self):
+        """
+        Cut every column back to the rows committed so far, after a write that failed part way.
+        """
+        for name in COLUMNS:
+            try:
+                self._files[name].close()
+            except OSError:
+                # Bytes still buffered are being discarded anyway
+                pass
+            os.truncate(_column_path(self.segment, name), self.rows * _row_bytes(name))
+            self._files[name] = open(_column_path(self.segment, name), 'ab')
+
+    def close(self, seal=True, compacted=False):
+        for f in self._files.values():
+            f.close()
+        if seal:
+            seal_segment(self.segment, compacted)
+
+
+class TelemetryLog:
+    """
+    Durable, append-only log of the decoded telemetry and predictions of every frame.
+
+    append() only buffers rows on the event loop; every commit_interval_ms the
+    buffered rows are written by a single background thread in one group commit
+    (optionally fsynced). Segments rotate after segment_rows rows and are sealed
+    with a sparse index. Rows beyond max_pending_rows are dropped and counted if the
+    disk cannot keep up.
+    """
+
+    def __init__(self, directory, segment_rows=1_000_000, commit_interval_ms=100, fsync=False,
+                 max_pending_rows=1_000_000):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.commit_interval = commit_interval_ms / 1000.0
+        self.fsync = fsync
+        self.max_pending_rows = max_pending_rows
+        self.rows_written = 0
+        self.dropped = 0
+        self.segments_sealed = 0
+        self.commit_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.commit_rows = Histogram(BATCH_SIZE_BUCKETS)
+        self._pending = []
+        self._pending_rows = 0
+        self._writer = None
+        self._pool = None
+        self._task = None
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telemetry-log")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pool is not None:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Telemetry log commit failed: {e!r}")
+            await asyncio.get_running_loop().run_in_executor(self._pool, self._close_segment)
+            self._pool.shutdown()
+            self._pool = None
+
+    def append(self, vehicle_id, timestamps, predictive_inputs, engine_condition_inputs, failures, conditions):
+        """
+        Buffer a frame's rows for the next group commit.
+        """
+        rows = len(timestamps)
+        if self._pending_rows + rows > self.max_pending_rows:
+            self.dropped += rows
+            return
+        self._pending.append((vehicle_id, timestamps, predictive_inputs, engine_condition_inputs, failures, conditions))
+        self._pending_rows += rows
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        await asyncio.get_running_loop().run_in_executor(self._pool, self._commit, batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.commit_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                # The rows of the failed commit are already counted in dropped
+                logger.error(f"Telemetry log commit failed: {e!r}")
+
+    def _commit(self, batch):
+        frame_rows = [len(frame[1]) for frame in batch]
+        rows = sum(frame_rows)
+        rows_written = self.rows_written
+        try:
+            self._write_batch(batch, frame_rows, rows)
+        except Exception:
+            # Parts already written to earlier segments are kept; the rest of the batch is lost
+            self.dropped += rows - (self.rows_written - rows_written)
+            # Later commits go to a fresh segment rather than after whatever this one left behind
+            self._abandon_segment()
+            raise
+
+    def _write_batch(self, batch, frame_rows, rows):
+        started = time.perf_counter()
+        timestamps = np.concatenate([np.asarray(frame[1], dtype=float) for frame in batch])
+        inputs = np.vstack([
+            np.hstack([np.reshape(frame[2], (-1, PREDICTIVE_VALUES)), np.reshape(frame[3], (-1, 13 - PREDICTIVE_VALUES))])
+            for frame in batch
+        ])
+        vehicles = np.repeat(np.asarray([str(frame[0]) for frame in batch]), frame_rows)
+        failures = np.concatenate([np.asarray(frame[4]).astype(str) for frame in batch])
+        conditions = np.concatenate([np.asarray(frame[5]).astype(str) for frame in batch])
+
+        written = 0
+        while written < rows:
+            if self._writer is None:
+                self._writer = SegmentWriter(os.path.join(self.directory, new_segment_name()), self.fsync)
+            part = slice(written, written + min(rows - written, self.segment_rows - self._writer.rows))
+            # Codes are per segment, so they are assigned for the rows going into this one
+            self._writer.write({
+                'timestamp': timestamps[part],
+                'vehicle': self._writer.encode('vehicles', vehicles[part]),
+                'inputs': inputs[part],
+                'failure': self._writer.encode('failures', failures[part]),
+                'condition': self._writer.encode('conditions', conditions[part]),
+            })
+            written = part.stop
+            self.rows_written += part.stop - part.start
+            if self._writer.rows >= self.segment_rows:
+                self._close_segment()
+        self.commit_rows.observe(rows)
+        self.commit_ms.observe((time.perf_counter() - started) * 1000.0)
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.close(seal=self._writer.rows > 0)
+            self._writer = None
+            self.segments_sealed += 1
+
+    def _abandon_segment(self):
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        try:
+            writer.close(seal=writer.rows > 0)
+            self.segments_sealed += 1
+        except Exception as e:
+            # Left unsealed; readers index it on the fly and compact() picks it up once stale
+            logger.error(f"Could not seal telemetry segment {writer.segment}: {e!r}")
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "rows_written": self.rows_written,
+            "pending_rows": self._pending_rows,
+            "dropped": self.dropped,
+            "segments_sealed": self.segments_sealed,
+            "commit_rows": self.commit_rows.snapshot(),
+            "commit_ms": self.commit_ms.snapshot(),
+        }
+
+
+class Segment:
+    """
+    Read side of one segment; columns are memory-mapped, and the sparse index is
+    loaded from index.json or built on the fly for a segment still being written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sealed = os.path.exists(os.path.join(path, INDEX_FILE))
+        if self.sealed:
+            with open(os.path.join(path, INDEX_FILE)) as f:
+                self.index = json.load(f)
+        else:
+            self.index = build_index(path)
+        self.dictionary = load_dictionary(path)
+
+    @property
+    def rows(self):
+        return self.index['rows']
+
+    def columns(self):
+        return open_columns(self.path, self.rows)
+
+    def candidate_blocks(self, vehicle_ids=None, start=None, end=None):
+        """
+        Blocks that may hold rows of the given vehicles within [start, end].
+        """
+        index = self.index
+        if not index['rows'] or (start is not None and index['max_ts'] < start) or \
+                (end is not None and index['min_ts'] > end):
+            return []
+        if vehicle_ids is None:
+            blocks = range(len(index['blocks']))
+        else:
+            blocks = set()
+            for vehicle_id in vehicle_ids:
+                entry = index['vehicles'].get(vehicle_id)
+                if entry is not None and (start is None or entry['max_ts'] >= start) and \
+                        (end is None or entry['min_ts'] <= end):
+                    blocks.update(entry['blocks'])
+        return [block for block in sorted(blocks)
+                if (start is None or index['blocks'][block][1] >= start)
+                and (end is None or index['blocks'][block][0] <= end)]
+
+
+class TelemetryLogReader:
+    """
+    Scans the segments of a telemetry log for offline analytics and retraining.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def segment_paths(self):
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def segments(self):
+        return [Segment(path) for path in self.segment_paths()]
+
+    def scan(self, vehicle_ids=None, start=None, end=None):
+        """
+        Yield one dict of column arrays per run of matching blocks, touching only the
+        blocks the sparse index points at.
+        """
+        for segment in self.segments():
+            blocks = segment.candidate_blocks(vehicle_ids, start, end)
+            if not blocks:
+                continue
+            columns = segment.columns()
+            dictionary = segment.dictionary
+            codes = None
+            if vehicle_ids is not None:
+                codes = [segment.index['vehicles'][vehicle_id]['code'] for vehicle_id in vehicle_ids
+                         if vehicle_id in segment.index['vehicles']]
+
+            # Merge neighbouring blocks into contiguous row ranges
+            runs = []
+            for block in blocks:
+                if runs and runs[-1][1] == block:
+                    runs[-1][1] = block + 1
+                else:
+                    runs.append([block, block + 1])
+            for first, last in runs:
+                rows = slice(first * INDEX_BLOCK_ROWS, min(last * INDEX_BLOCK_ROWS, segment.rows))
+                timestamps = columns['timestamp'][rows]
+                mask = np.ones(len(timestamps), dtype=bool)
+                if codes is not None:
+                    mask &= np.isin(columns['vehicle'][rows], codes)
+                if start is not None:
+                    mask &= timestamps >= start
+                if end is not None:
+                    mask &= timestamps <= end
+                if not mask.any():
+                    continue
+                inputs = np.asarray(columns['inputs'][rows][mask])
+                yield {
+                    'vehicle_id': np.asarray(dictionary['vehicles'])[columns['vehicle'][rows][mask]],
+                    'timestamp': np.asarray(timestamps[mask]),
+                    'predictive_model_input': inputs[:, :PREDICTIVE_VALUES],
+                    'engine_condition_input': inputs[:, PREDICTIVE_VALUES:],
+                    'failure': np.asarray(dictionary['failures'])[columns['failure'][rows][mask]],
+                    'condition': np.asarray(dictionary['conditions'])[columns['condition'][rows][mask]],
+                }
+
+    def read(self, vehicle_ids=None, start=None, end=None):
+        """
+        Return all matching rows as one dict of arrays.
+        """
+        chunks = list(self.scan(vehicle_ids, start, end))
+        if not chunks:
+            return {
+                'vehicle_id': np.array([], dtype=str), 'timestamp': np.zeros(0),
+                'predictive_model_input': np.zeros((0, PREDICTIVE_VALUES), dtype=np.float32),
+                'engine_condition_input': np.zeros((0, 13 - PREDICTIVE_VALUES), dtype=np.float32),
+                'failure': np.array([], dtype=str), 'condition': np.array([], dtype=str),
+            }
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def _decoded_rows(path, dictionary, columns, start, stop):
+    """
+    Rows [start, stop) of a segment with its codes translated back into values, so
+    rows of different segments can be merged.
+    """
+    chunk = {name: np.asarray(columns[name][start:stop]) for name in COLUMNS}
+    for name, kind in CODED_COLUMNS:
+        chunk[name] = np.asarray(dictionary[kind], dtype=str)[chunk[name]]
+    return chunk
+
+
+def _write_segment(path, chunk, seal=True, compacted=False):
+    writer = SegmentWriter(path)
+    chunk = dict(chunk)
+    for name, kind in CODED_COLUMNS:
+        chunk[name] = writer.encode(kind, chunk[name])
+    writer.write(chunk)
+    writer.close(seal, compacted)
+
+
+def _sorted(chunk):
+    order = np.lexsort((chunk['timestamp'], chunk['vehicle']))
+    return {name: values[order] for name, values in chunk.items()}
+
+
+def _merge_runs(runs, buffer_rows):
+    """
+    Merge runs sorted by vehicle and time, holding about buffer_rows rows in memory.
+    Yields sorted chunks that together are in (vehicle, timestamp) order.
+    """
+    sources = []
+    for path in runs:
+        rows = segment_rows(path)
+        sources.append([path, load_dictionary(path), open_columns(path, rows), 0, rows])
+    block = max(1, buffer_rows // max(1, len(sources)))
+    buffers = [None] * len(sources)
+    while True:
+        for i, source in enumerate(sources):
+            path, dictionary, columns, position, rows = source
+            if (buffers[i] is None or not len(buffers[i]['timestamp'])) and position < rows:
+                buffers[i] = _decoded_rows(path, dictionary, columns, position, min(position + block, rows))
+                source[3] = min(position + block, rows)
+        active = [buffer for buffer in buffers if buffer is not None and len(buffer['timestamp'])]
+        if not active:
+            return
+        # Every row not yet loaded sorts after the last loaded row of its run, so all loaded
+        # rows up to the smallest of those can go out; one buffer at least is emptied
+        bound_vehicle, bound_time = min((buffer['vehicle'][-1], buffer['timestamp'][-1]) for buffer in active)
+        taken = []
+        for i, buffer in enumerate(buffers):
+            if buffer is None or not len(buffer['timestamp']):
+                continue
+            ready = int(np.count_nonzero((buffer['vehicle'] < bound_vehicle) |
+                                         ((buffer['vehicle'] == bound_vehicle) & (buffer['timestamp'] <= bound_time))))
+            taken.append({name: values[:ready] for name, values in buffer.items()})
+            buffers[i] = {name: values[ready:] for name, values in buffer.items()}
+        yield _sorted({name: np.concatenate([chunk[name] for chunk in taken]) for name in COLUMNS})
+
+
+def compact(directory, segment_rows=1_000_000, drop_before=None, stale_after=3600.0):
+    """
+    Rewrite the sealed segments of a log (and unsealed ones untouched for stale_after
+    seconds, left behind by a crashed writer) into full segments sorted by vehicle
+    and time, optionally dropping rows older than drop_before. Segments a previous
+    compaction already filled are left alone unless rows must be dropped from them.
+
+    Segments are first cut into sorted runs of at most segment_rows rows, then the
+    runs are merged, so memory stays proportional to segment_rows whatever the size
+    of the log. Returns (segments read, segments written, rows kept).
+    """
+    reader = TelemetryLogReader(directory)
+    now = time.time()
+    inputs = []
+    for path in reader.segment_paths():
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            if index.get('compacted') and index['rows'] >= segment_rows and \
+                    (drop_before is None or index['min_ts'] >= drop_before):
+                continue
+            inputs.append(path)
+        elif now - max(os.path.getmtime(_column_path(path, name)) for name in COLUMNS
+                       if os.path.exists(_column_path(path, name))) > stale_after:
+            inputs.append(path)
+    if not inputs:
+        return 0, 0, 0
+
+    staging = os.path.join(directory, '.compacting')
+    runs_directory = os.path.join(staging, 'runs')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(runs_directory)
+
+    # Cut every input into sorted runs
+    runs = []
+    for path in inputs:
+        segment = Segment(path)
+        columns = segment.columns()
+        for start in range(0, segment.rows, segment_rows):
+            chunk = _decoded_rows(path, segment.dictionary, columns, start, min(start + segment_rows, segment.rows))
+            if drop_before is not None:
+                keep = chunk['timestamp'] >= drop_before
+                chunk = {name: values[keep] for name, values in chunk.items()}
+            if len(chunk['timestamp']):
+                runs.append(os.path.join(runs_directory, f'run-{len(runs):08d}'))
+                _write_segment(runs[-1], _sorted(chunk), seal=False)
+
+    # Merge the runs into full segments
+    rows = 0
+    written = []
+    pending = []
+    pending_rows = 0
+
+    def write_pending(count):
+        nonlocal pending, pending_rows
+        merged = {name: np.concatenate([chunk[name] for chunk in pending]) for name in COLUMNS}
+        path = os.path.join(staging, new_segment_name())
+        _write_segment(path, {name: values[:count] for name, values in merged.items()}, compacted=True)
+        written.append(path)
+        pending = [{name: values[count:] for name, values in merged.items()}]
+        pending_rows -= count
+
+    for chunk in _merge_runs(runs, segment_rows):
+        pending.append(chunk)
+        pending_rows += len(chunk['timestamp'])
+        rows += len(chunk['timestamp'])
+        while pending_rows >= segment_rows:
+            write_pending(segment_rows)
+    if pending_rows:
+        write_pending(pending_rows)
+
+    # Publish the new segments before removing the ones they replace
+    for path in written:
+        os.replace(path, os.path.join(directory, os.path.basename(path)))
+    for path in inputs:
+        shutil.rmtree(path)
+    shutil.rmtree(staging, ignore_errors=True)
+    return len(inputs), len(written), rows
+
+
+# Inspect or compact a telemetry log written by the car-server
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tools for the car-server telemetry log.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    info_parser = subparsers.add_parser("info", help="List segments with their row counts and time ranges")
+    info_parser.add_argument("directory")
+    compact_parser = subparsers.add_parser("compact", help="Merge sealed segments sorted by vehicle and time")
+    compact_parser.add_argument("directory")
+    compact_parser.add_argument("--segment-rows", type=int, default=1_000_000)
+    compact_parser.add_argument("--drop-before", type=float, help="Drop rows older than this Unix timestamp")
+    compact_parser.add_argument("--stale-after", type=float, default=3600.0,
+                                help="Also compact unsealed segments untouched for this many seconds")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print(f"{'segment':<50}{'sealed':>8}{'rows':>10}{'vehicles':>10}  time range")
+        for segment in TelemetryLogReader(args.directory).segments():
+            index = segment.index
+            print(f"{os.path.basename(segment.path):<50}{str(segment.sealed):>8}{index['rows']:>10}"
+                  f"{len(index['vehicles']):>10}  {index['min_ts']} - {index['max_ts']}")
+    else:
+        started = time.perf_counter()
+        read, written, rows = compact(args.directory, args.segment_rows, args.drop_before, args.stale_after)
+        print(f"Compacted {read} segments into {written} ({rows} rows) in {time.perf_counter() - started:.1f}s")
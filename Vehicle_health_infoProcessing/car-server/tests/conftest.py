@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The server modules are flat scripts; make them importable from the tests
+CAR_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CAR_SERVER_DIR)
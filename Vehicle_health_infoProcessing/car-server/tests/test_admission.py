@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+
+from admission import AdmissionController
+
+
+def test_burst_then_shed_with_retry_hint():
+    async def scenario():
+        admission = AdmissionController(rate=10, burst=3, max_delay_ms=0)
+        results = [await admission.admit('spam') for _ in range(5)]
+        # Another vehicle has a bucket of its own
+        results.append(await admission.admit('quiet'))
+        return admission, results
+
+    admission, results = asyncio.run(scenario())
+    assert results[:3] == [None, None, None] and results[5] is None
+    assert all(0 < retry_after <= 100 for retry_after in results[3:5])
+    assert admission.accepted == 4 and admission.shed_rate_limited == 2
+
+
+def test_short_waits_are_delayed_instead_of_shed():
+    async def scenario():
+        admission = AdmissionController(rate=100, burst=1, max_delay_ms=50)
+        return admission, [await admission.admit('v1') for _ in range(3)]
+
+    admission, results = asyncio.run(scenario())
+    assert results == [None, None, None]
+    assert admission.delayed == 2 and admission.pending_rows == 3
+
+
+def test_pending_rows_cap_sheds_new_frames():
+    async def scenario():
+        admission = AdmissionController(max_pending_rows=100, overload_retry_ms=500)
+        first = await admission.admit('v1', rows=90)
+        second = await admission.admit('v2', rows=20)
+        admission.release(90)
+        third = await admission.admit('v2', rows=20)
+        return admission, (first, second, third)
+
+    admission, results = asyncio.run(scenario())
+    assert results == (None, 500, None)
+    assert admission.shed_overloaded == 1
+
+
+@pytest.mark.parametrize('rate', [0, -1])
+def test_non_positive_rate_is_rejected(rate):
+    with pytest.raises(ValueError, match='rate'):
+        AdmissionController(rate=rate)
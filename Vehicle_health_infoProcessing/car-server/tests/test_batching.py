@@ -0,0 +1,32 @@
+import asyncio
+import numpy as np
+
+from batching import MicroBatcher
+
+
+def test_sample_blocks_are_scored_whole_and_in_order():
+    batch_rows = []
+
+    async def predict_batch(predictive_inputs, engine_inputs):
+        batch_rows.append(predictive_inputs.shape[0])
+        # Echo the first input so every row can be traced back to its caller
+        return predictive_inputs[:, 0].copy(), engine_inputs[:, 0].copy()
+
+    async def scenario():
+        batcher = MicroBatcher(predict_batch, max_wait_ms=5, max_batch_size=8)
+        await batcher.start()
+        blocks = [np.arange(start, start + size, dtype=float) for start, size in ((0, 5), (100, 5), (200, 12))]
+        single = batcher.submit([7.0] * 7, [7.0] * 6)
+        frames = [batcher.submit_many(np.repeat(block[:, None], 7, axis=1), np.repeat(block[:, None], 6, axis=1))
+                  for block in blocks]
+        results = await asyncio.gather(single, *frames)
+        await batcher.stop()
+        return blocks, results
+
+    blocks, results = asyncio.run(scenario())
+    assert results[0] == (7.0, 7.0)
+    for block, (failures, conditions) in zip(blocks, results[1:]):
+        assert list(failures) == list(block) and list(conditions) == list(block)
+    # Blocks are never split; the oversized one gets a batch of its own
+    assert sum(batch_rows) == 23
+    assert max(rows for rows in batch_rows if rows != 12) <= 8
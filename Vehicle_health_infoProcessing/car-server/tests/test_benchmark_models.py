@@ -0,0 +1,18 @@
+
+from benchmark_models import allocated_bytes_per_call, find_regressions
+
+
+def test_only_metrics_beyond_their_tolerance_regress():
+    baseline = {'engine_condition.single_us': 1000.0, 'engine_condition.single_alloc_bytes': 1000.0,
+                'engine_condition.batch_us_per_row': 50.0, 'predictive_maintenance.single_us': 1000.0}
+    results = {'engine_condition.single_us': 1300.0, 'engine_condition.single_alloc_bytes': 1200.0,
+               'engine_condition.batch_us_per_row': 60.0}
+    regressions = find_regressions(results, baseline, tolerance=0.35, alloc_tolerance=0.1)
+    # 50 -> 60 us is +20% but within the absolute slack; the missing predictor is skipped
+    assert [metric for metric, *_ in regressions] == ['engine_condition.single_alloc_bytes']
+    assert find_regressions({'engine_condition.single_us': 1400.0}, baseline)[0][2] == 1400.0
+
+
+def test_allocations_are_measured_per_call():
+    assert allocated_bytes_per_call(lambda n: bytearray(n), 100_000) >= 100_000
+    assert allocated_bytes_per_call(lambda n: n + 1, 1) < 1000
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from broker import BrokerHub, UnixSocketBroker
+
+
+async def eventually(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_workers_share_predictions_across_a_hub_restart(tmp_path):
+    socket_path = str(tmp_path / "hub.sock")
+
+    async def scenario():
+        received = {"a": [], "b": []}
+
+        def collector(name):
+            async def on_message(message):
+                if message.get("fail"):
+                    raise RuntimeError("handler bug")
+                received[name].append(message["vehicle_id"])
+            return on_message
+
+        # A worker starting before its hub does not hang, and connects once the hub is up
+        a = UnixSocketBroker(socket_path, reconnect_delay=0.02, connect_timeout=0.05)
+        started = time.monotonic()
+        await a.start(collector("a"))
+        assert time.monotonic() - started < 1
+        hub = BrokerHub(socket_path)
+        await hub.start()
+        b = UnixSocketBroker(socket_path, reconnect_delay=0.02)
+        await b.start(collector("b"))
+        await eventually(lambda: len(hub.workers) == 2)
+
+        await a.publish({"vehicle_id": "v1"})
+        # A message the handler fails on is skipped, and later ones still arrive
+        await b.publish({"vehicle_id": "bad", "fail": True})
+        await b.publish({"vehicle_id": "v2"})
+        await eventually(lambda: received["a"] == ["v1", "v2"] and received["b"] == ["v1", "v2"])
+
+        # Publishing while the hub is down is counted, never raised to the vehicle's handler
+        await hub.stop()
+        for _ in range(20):
+            await a.publish({"vehicle_id": "lost"})
+            await asyncio.sleep(0.005)
+        assert a.dropped > 0
+
+        hub = BrokerHub(socket_path)
+        await hub.start()
+        await eventually(lambda: len(hub.workers) == 2)
+        await b.publish({"vehicle_id": "v3"})
+        await eventually(lambda: received["a"][-1:] == ["v3"] and received["b"][-1:] == ["v3"])
+        assert "lost" not in received["b"]
+
+        await a.stop()
+        await b.stop()
+        await hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_hub_disconnects_a_worker_that_stops_reading(tmp_path):
+    socket_path = str(tmp_path / "hub.sock")
+
+    async def scenario():
+        hub = BrokerHub(socket_path, max_buffer_bytes=64 * 1024)
+        await hub.start()
+        # Connected but never reads, so the hub's writes to it pile up
+        _, stalled = await asyncio.open_unix_connection(socket_path)
+        publisher = UnixSocketBroker(socket_path, reconnect_delay=0.02)
+        received = []
+
+        async def on_message(message):
+            received.append(message)
+
+        await publisher.start(on_message)
+        await eventually(lambda: len(hub.workers) == 2)
+        padding = "x" * 1000
+        for number in range(2000):
+            await publisher.publish({"vehicle_id": f"v{number}", "padding": padding})
+            # Let the publisher keep up with its own echoes; only the stalled worker falls behind
+            await asyncio.sleep(0)
+        await eventually(lambda: hub.slow_workers_dropped == 1 and len(hub.workers) == 1)
+        await eventually(lambda: len(received) == 2000)
+
+        stalled.close()
+        await publisher.stop()
+        await hub.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from models import EngineConditionPredictor
+
+CAR_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENGINE_DATA = os.path.join(CAR_SERVER_DIR, '..', 'engine_health', 'engine_data.csv')
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    return EngineConditionPredictor(
+        model_file=os.path.join(CAR_SERVER_DIR, 'knn_model.pkl'),
+        scaler_file=os.path.join(CAR_SERVER_DIR, 'aknn_scaler.pkl'),
+        feature_importances_file=os.path.join(CAR_SERVER_DIR, 'feature_importances.pkl'),
+    )
+
+
+@pytest.fixture(scope='module')
+def engine_readings():
+    data = pd.read_csv(ENGINE_DATA)
+    return data.drop(columns=['Engine Condition']).to_numpy()[:500]
+
+
+def reference_transform(predictor, instance):
+    """
+    Row-at-a-time path: np.append interactions, importance weighting, DataFrame, scaler.
+    """
+    lub_oil_pressure = instance[0, 1]
+    lub_oil_temp = instance[0, 4]
+    coolant_pressure = instance[0, 3]
+    coolant_temp = instance[0, 5]
+    engine_rpm = instance[0, 0]
+    instance = np.append(instance, [
+        lub_oil_pressure * lub_oil_temp,
+        coolant_pressure * coolant_temp,
+        lub_oil_temp * coolant_temp,
+        lub_oil_pressure * coolant_pressure,
+        engine_rpm * lub_oil_temp,
+        engine_rpm * coolant_temp,
+        engine_rpm * lub_oil_pressure,
+        engine_rpm * coolant_pressure
+    ])
+    instance_df = pd.DataFrame(instance.reshape(1, -1), columns=predictor.featureLabels)
+    return predictor.scaler.transform(instance_df * predictor.feature_importances)
+
+
+def test_fused_transform_matches_reference(predictor, engine_readings):
+    fused = predictor.transform_batch(engine_readings)
+    reference = np.vstack([reference_transform(predictor, row.reshape(1, -1)) for row in engine_readings])
+    np.testing.assert_allclose(fused, reference, rtol=1e-12, atol=1e-12)
+
+
+def test_batch_predictions_match_reference(predictor, engine_readings):
+    reference = np.vstack([reference_transform(predictor, row.reshape(1, -1)) for row in engine_readings])
+    np.testing.assert_array_equal(predictor.predict_condition_batch(engine_readings), predictor.model.predict(reference))
+
+
+def test_single_row_wraps_batch(predictor, engine_readings):
+    batch = predictor.predict_condition_batch(engine_readings[:20])
+    singles = [predictor.predict_condition(row.reshape(1, -1)) for row in engine_readings[:20]]
+    assert list(batch) == singles
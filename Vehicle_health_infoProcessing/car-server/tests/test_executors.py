@@ -0,0 +1,68 @@
+import asyncio
+import os
+import threading
+import time
+import numpy as np
+import pytest
+
+from executors import InferenceExecutor, InferenceTimeoutError, ProcessPoolInferenceExecutor
+
+CAR_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ensemble_model.pkl is not committed, so this only runs where the real models are present
+@pytest.mark.skipif(not os.path.exists(os.path.join(CAR_SERVER_DIR, 'ensemble_model.pkl')),
+                    reason='ensemble_model.pkl is not available')
+def test_process_pool_is_ready_only_once_every_worker_loaded(monkeypatch):
+    monkeypatch.chdir(CAR_SERVER_DIR)
+
+    async def scenario():
+        executor = ProcessPoolInferenceExecutor(workers=3, timeout=30)
+        await executor.start()
+        try:
+            pids = executor.worker_pids
+            failures, conditions = await executor.run(np.array([[298.5, 309.0, 1500, 45, 10, 10.5, 67500]]),
+                                                      np.array([[600, 3.5, 12, 3, 80, 80]]))
+            return pids, failures, conditions
+        finally:
+            await executor.stop()
+
+    pids, failures, conditions = asyncio.run(scenario())
+    assert len(set(pids)) == 3
+    assert len(failures) == len(conditions) == 1
+
+
+class SlowExecutor(InferenceExecutor):
+    """Predictions take 50 ms on a thread, however long the caller is willing to wait"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def _predict(self):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return ['No Failure'], ['1']
+
+    async def _submit(self, predictive_inputs, engine_condition_inputs, timed):
+        return await asyncio.to_thread(self._predict)
+
+
+def test_timed_out_work_still_counts_against_max_in_flight():
+    async def scenario():
+        executor = SlowExecutor(max_in_flight=2, timeout=0.005)
+        await executor.start()
+        results = await asyncio.gather(*[executor.run(None, None) for _ in range(10)], return_exceptions=True)
+        while executor.in_flight:
+            await asyncio.sleep(0.01)
+        return executor, results
+
+    executor, results = asyncio.run(scenario())
+    assert all(isinstance(result, InferenceTimeoutError) for result in results)
+    assert executor.peak == 2
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from fanout import SLOW_CONSUMER_CLOSE_CODE, MonitorConnection, MonitorFanout, TickBroadcaster
+from subscriptions import Subscription
+
+
+class FakeWebSocket:
+    client = 'monitor'
+
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def prediction(vehicle_id, failure='No Failure', condition='1'):
+    return {'vehicle_id': vehicle_id, 'Predicted Failure Type': failure, 'Predicted Engine Condition': condition}
+
+
+def drain(monitor):
+    """Run a monitor's writer until its queue is empty (or it closed itself)"""
+    async def scenario():
+        task = asyncio.create_task(monitor.run())
+        while monitor.queue_depth() and not task.done():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    return monitor.websocket.sent
+
+
+def test_drop_oldest_keeps_the_newest_messages_and_counts_drops():
+    monitor = MonitorConnection(FakeWebSocket(), max_queue=3, overflow_policy='drop_oldest')
+    for number in range(5):
+        monitor.offer('v1', f'm{number}')
+    assert monitor.dropped == 2
+    assert drain(monitor) == ['m2', 'm3', 'm4']
+
+
+def test_coalesce_keeps_the_latest_message_per_vehicle():
+    monitor = MonitorConnection(FakeWebSocket(), max_queue=2, overflow_policy='coalesce')
+    monitor.offer('v1', 'v1-a')
+    monitor.offer('v2', 'v2-a')
+    monitor.offer('v1', 'v1-b')
+    assert (monitor.coalesced, monitor.dropped) == (1, 0)
+    # A third vehicle does not fit, so the oldest vehicle's slot goes
+    monitor.offer('v3', 'v3-a')
+    assert monitor.dropped == 1
+    assert drain(monitor) == ['v2-a', 'v3-a']
+
+
+def test_disconnect_closes_a_slow_monitor_with_try_again_later():
+    monitor = MonitorConnection(FakeWebSocket(), max_queue=2, overflow_policy='disconnect')
+    for number in range(3):
+        monitor.offer('v1', f'm{number}')
+    assert monitor.closed and monitor.dropped == 3
+    monitor.offer('v1', 'late')
+    assert drain(monitor) == []
+    assert monitor.websocket.close_code == SLOW_CONSUMER_CLOSE_CODE == 1013
+
+
+def frames(monitor):
+    queued = list(monitor._queue.values()) if isinstance(monitor._queue, dict) else list(monitor._queue)
+    monitor._queue.clear()
+    return [json.loads(message) for message in queued]
+
+
+def test_deltas_list_only_changed_predictions_and_snapshots_resync():
+    fleet = {}
+    fanout = MonitorFanout(overflow_policy='drop_oldest')
+    monitor = fanout.connect(FakeWebSocket())
+    broadcaster = TickBroadcaster(fanout, fleet, resync_ticks=3)
+
+    def report(response):
+        fleet[response['vehicle_id']] = response
+        broadcaster.update(response)
+
+    report(prediction('v1'))
+    report(prediction('v2'))
+    broadcaster.tick()
+    assert [(frame['type'], [v['vehicle_id'] for v in frame['vehicles']]) for frame in frames(monitor)] == \
+        [('delta', ['v1', 'v2'])]
+
+    # The same predictions again: nothing changed, so nothing is sent
+    report(prediction('v1'))
+    report(prediction('v2'))
+    broadcaster.tick()
+    assert frames(monitor) == []
+
+    # Every resync_ticks ticks the whole fleet goes out as a snapshot instead
+    report(prediction('v2', failure='Power Failure'))
+    broadcaster.tick()
+    assert frames(monitor) == [{'type': 'snapshot', 'vehicles': [prediction('v1'), prediction('v2', 'Power Failure')]}]
+
+    report(prediction('v1', condition='0'))
+    report(prediction('v2', failure='Power Failure'))
+    broadcaster.tick()
+    assert frames(monitor) == [{'type': 'delta', 'vehicles': [prediction('v1', condition='0')]}]
+
+
+def test_frames_are_narrowed_to_each_subscription():
+    fanout = MonitorFanout(overflow_policy='drop_oldest')
+    everything = fanout.connect(FakeWebSocket())
+    eu = fanout.connect(FakeWebSocket(), Subscription(vehicle_prefixes=['eu-']))
+    failures = fanout.connect(FakeWebSocket(), Subscription(exclude_failure_types=['No Failure']))
+    responses = [prediction('eu-1'), prediction('us-1', 'Power Failure')]
+
+    fanout.broadcast_frame('delta', responses)
+    assert frames(everything) == [{'type': 'delta', 'vehicles': responses}]
+    assert frames(eu) == [{'type': 'delta', 'vehicles': [responses[0]]}]
+    assert frames(failures) == [{'type': 'delta', 'vehicles': [responses[1]]}]
+
+    # An empty delta is not sent, but a snapshot always is, even when empty
+    fanout.broadcast_frame('delta', [prediction('asia-1')])
+    assert frames(eu) == [] and frames(failures) == []
+    fanout.broadcast_frame('snapshot', [prediction('asia-1')])
+    assert frames(eu) == [{'type': 'snapshot', 'vehicles': []}]
@@ -0,0 +1,38 @@
+import numpy as np
+
+from history import TelemetryHistory
+
+
+def record(history, vehicle_id, times):
+    times = np.asarray(times, dtype=float)
+    history.record(vehicle_id, times, np.repeat(times[:, None], 7, axis=1), np.repeat(times[:, None], 6, axis=1),
+                   [f'failure {t:g}' for t in times], [str(int(t) % 2) for t in times])
+
+
+def test_ring_keeps_the_latest_points_in_order():
+    history = TelemetryHistory(capacity=4)
+    record(history, 'v1', [1, 2, 3])
+    record(history, 'v1', [4, 5])
+    record(history, 'v1', [6])
+    replay = history.replay('v1', 10)
+    assert replay['timestamps'] == [3, 4, 5, 6]
+    assert [row[0] for row in replay['predictive_model_input']] == [3, 4, 5, 6]
+    assert replay['Predicted Failure Type'] == ['failure 3', 'failure 4', 'failure 5', 'failure 6']
+    assert replay['Predicted Engine Condition'] == ['1', '0', '1', '0']
+    assert history.replay('v1', 2)['timestamps'] == [5, 6]
+
+
+def test_frames_larger_than_the_ring_keep_their_tail():
+    history = TelemetryHistory(capacity=3)
+    record(history, 'v1', range(10))
+    assert history.replay('v1', 3)['timestamps'] == [7, 8, 9]
+
+
+def test_least_recently_updated_vehicle_is_dropped():
+    history = TelemetryHistory(capacity=2, max_vehicles=2)
+    record(history, 'v1', [1])
+    record(history, 'v2', [1])
+    record(history, 'v1', [2])
+    record(history, 'v3', [1])
+    assert history.replay('v2', 2) is None
+    assert history.replay('v1', 2)['timestamps'] == [1, 2]
@@ -0,0 +1,27 @@
+
+from metrics import Histogram, StageMetrics, prometheus_text
+
+
+def test_stage_histograms_are_exported_cumulatively_in_seconds():
+    stages = StageMetrics()
+    for milliseconds in (0.2, 0.2, 4, 2000):
+        stages.observe_ms('predict', milliseconds)
+    stages.count('vehicle_frames', 4)
+    lines = prometheus_text(stages, {}, {}).splitlines()
+
+    assert 'car_server_stage_duration_seconds_bucket{stage="predict",le="0.00025"} 2' in lines
+    assert 'car_server_stage_duration_seconds_bucket{stage="predict",le="0.005"} 3' in lines
+    assert 'car_server_stage_duration_seconds_bucket{stage="predict",le="+Inf"} 4' in lines
+    assert 'car_server_stage_duration_seconds_count{stage="predict"} 4' in lines
+    assert 'car_server_vehicle_frames_total 4' in lines
+
+
+def test_gauges_and_plain_histograms_without_stage_metrics():
+    batch_sizes = Histogram([1, 4])
+    batch_sizes.observe(3)
+    text = prometheus_text(None, {'vehicle_connections': ('Open connections.', 7)},
+                           {'batch_size_rows': ('Rows per batch.', batch_sizes, 1.0)})
+    assert 'stage_duration' not in text
+    assert 'car_server_vehicle_connections 7.0' in text.splitlines()
+    assert 'car_server_batch_size_rows_bucket{le="4.0"} 1' in text.splitlines()
+    assert 'car_server_batch_size_rows_sum 3.0' in text.splitlines()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+
+from neighbors import RandomProjectionForestIndex, TreeIndex, load_index
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(3000, 6))
+    labels = np.where(data[:, 0] + 0.5 * data[:, 1] + rng.normal(scale=0.5, size=3000) > 0, 'Good', 'Bad')
+    queries = rng.normal(size=(500, 6))
+    return data, labels, queries
+
+
+def recall(exact, approximate):
+    return np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(exact, approximate)])
+
+
+@pytest.mark.parametrize('weights', ['uniform', 'distance'])
+@pytest.mark.parametrize('algorithm', ['kd_tree', 'ball_tree'])
+def test_tree_index_matches_kneighbors_classifier(fitted, weights, algorithm):
+    data, labels, queries = fitted
+    model = KNeighborsClassifier(n_neighbors=5, weights=weights).fit(data, labels)
+    index = TreeIndex.from_model(model, algorithm=algorithm)
+    assert np.array_equal(index.predict(queries), model.predict(queries))
+    assert np.array_equal(index.query(queries)[1], model.kneighbors(queries)[1])
+
+
+def test_rp_forest_recall_floor(fitted, tmp_path):
+    data, labels, queries = fitted
+    model = KNeighborsClassifier(n_neighbors=5).fit(data, labels)
+    exact = model.kneighbors(queries)[1]
+    index = RandomProjectionForestIndex.from_model(model, n_trees=8)
+
+    # Seeded, so these are regression floors rather than flaky bounds
+    assert recall(exact, index.query(queries)[1]) >= 0.85
+    assert np.mean(index.predict(queries) == model.predict(queries)) >= 0.95
+    # Searching fewer trees trades recall for latency
+    fewer = RandomProjectionForestIndex.from_model(model, n_trees=8, search_trees=2)
+    assert recall(exact, fewer.query(queries)[1]) < recall(exact, index.query(queries)[1])
+
+    index.save(str(tmp_path))
+    loaded = load_index(str(tmp_path), mmap_mode='r')
+    assert isinstance(loaded, RandomProjectionForestIndex)
+    assert np.array_equal(loaded.predict(queries), index.predict(queries))
+
+
+@pytest.mark.parametrize('algorithm', ['kd_tree', 'ball_tree'])
+def test_loaded_tree_index_runs_over_the_mapped_arrays(fitted, tmp_path, algorithm):
+    data, labels, queries = fitted
+    model = KNeighborsClassifier(n_neighbors=5).fit(data, labels)
+    index = TreeIndex.from_model(model, algorithm=algorithm)
+    index.save(str(tmp_path))
+
+    loaded = load_index(str(tmp_path), mmap_mode='r')
+    assert isinstance(loaded, TreeIndex)
+    assert np.array_equal(loaded.predict(queries), index.predict(queries))
+    assert np.array_equal(loaded.query(queries)[1], model.kneighbors(queries)[1])
+    # The tree is restored, not rebuilt, so it runs over the shared mapped files
+    assert all(isinstance(array, np.memmap) for array in loaded.tree.get_arrays())
+
+
+@pytest.mark.parametrize('search_trees', [0, -1, 9])
+def test_rp_forest_rejects_search_trees_outside_the_forest(fitted, tmp_path, search_trees):
+    data, labels, _ = fitted
+    model = KNeighborsClassifier(n_neighbors=5).fit(data, labels)
+    with pytest.raises(ValueError, match='search_trees'):
+        RandomProjectionForestIndex.from_model(model, n_trees=8, search_trees=search_trees)
+
+    RandomProjectionForestIndex.from_model(model, n_trees=8).save(str(tmp_path))
+    with pytest.raises(ValueError, match='search_trees'):
+        load_index(str(tmp_path), search_trees=search_trees)
@@ -0,0 +1,52 @@
+import asyncio
+import numpy as np
+
+from prediction_cache import ENTRY_OVERHEAD_BYTES, CachedPredictor, QuantizedCache
+
+
+class CountingExecutor:
+    model_version = 1
+
+    def __init__(self):
+        self.rows = 0
+
+    async def run(self, predictive_inputs, engine_condition_inputs):
+        self.rows += predictive_inputs.shape[0]
+        return predictive_inputs[:, 0].astype(str), engine_condition_inputs[:, 0].astype(str)
+
+
+def test_rows_in_the_same_cell_share_a_key():
+    cache = QuantizedCache([0.5, 10])
+    keys = cache.keys([[1.1, 104], [0.9, 96], [1.3, 104]])
+    assert keys[0] == keys[1] != keys[2]
+
+
+def test_lru_eviction_and_ttl():
+    entry_bytes = 2 * 8 + 1 + ENTRY_OVERHEAD_BYTES
+    cache = QuantizedCache([1, 1], max_bytes=2 * entry_bytes, ttl=10)
+    first, second, third = cache.keys([[1, 1], [2, 2], [3, 3]])
+    cache.put(first, 'a', now=0)
+    cache.put(second, 'b', now=0)
+    assert cache.get(first, now=1) == 'a'
+    # The least recently used entry goes first
+    cache.put(third, 'c', now=1)
+    assert cache.get(second, now=1) is None and cache.evictions == 1
+    assert cache.get(first, now=11) is None and cache.expirations == 1
+
+
+def test_cached_predictor_skips_hits_and_drops_cache_on_reload():
+    executor = CountingExecutor()
+    predictor = CachedPredictor(executor, QuantizedCache([1] * 7), QuantizedCache([1] * 6))
+    predictive = np.array([[1.0] * 7, [2.0] * 7, [3.0] * 7])
+    engine = np.array([[5.0] * 6, [6.0] * 6, [7.0] * 6])
+
+    failures, conditions = asyncio.run(predictor.run(predictive, engine))
+    assert list(failures) == ['1.0', '2.0', '3.0'] and executor.rows == 3
+    # Readings that round to cached cells are answered without the executor
+    failures, conditions = asyncio.run(predictor.run(predictive + 0.2, engine - 0.2))
+    assert list(failures) == ['1.0', '2.0', '3.0'] and list(conditions) == ['5.0', '6.0', '7.0']
+    assert executor.rows == 3 and predictor.rows_from_cache == 3
+
+    executor.model_version = 2
+    asyncio.run(predictor.run(predictive, engine))
+    assert executor.rows == 6
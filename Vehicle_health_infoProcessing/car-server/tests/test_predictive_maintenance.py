@@ -0,0 +1,63 @@
+import os
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from models import PredictiveMaintenanceModel
+
+CAR_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    # ensemble_model.pkl is not committed, so score with a small stand-in classifier
+    pca = joblib.load(os.path.join(CAR_SERVER_DIR, 'pca.pkl'))
+    label_encoder = joblib.load(os.path.join(CAR_SERVER_DIR, 'label_encoder.pkl'))
+    rng = np.random.default_rng(42)
+    X = rng.standard_normal((300, pca.n_components_))
+    y = rng.integers(0, len(label_encoder.classes_), 300)
+    model_file = tmp_path_factory.mktemp('models') / 'ensemble_model.pkl'
+    joblib.dump(LogisticRegression(max_iter=500).fit(X, y), model_file)
+
+    return PredictiveMaintenanceModel(
+        model_file=str(model_file),
+        scaler_file=os.path.join(CAR_SERVER_DIR, 'ensemble_scaler.pkl'),
+        pca_file=os.path.join(CAR_SERVER_DIR, 'pca.pkl'),
+        label_encoder_file=os.path.join(CAR_SERVER_DIR, 'label_encoder.pkl'),
+    )
+
+
+@pytest.fixture
+def instances():
+    rng = np.random.default_rng(7)
+    air_temp = rng.uniform(298, 300, 200)
+    process_temp = rng.uniform(308, 310, 200)
+    rotational_speed = rng.uniform(1400, 1600, 200)
+    torque = rng.uniform(30, 60, 200)
+    tool_wear = rng.integers(0, 15, 200)
+    return np.column_stack([air_temp, process_temp, rotational_speed, torque, tool_wear,
+                            process_temp - air_temp, torque * rotational_speed])
+
+
+def test_compiled_preprocessing_matches_pca_and_scaler(model, instances):
+    assert model.preprocess_weights.shape == (7, 5)
+    expected = model.scaler.transform(model.pca.transform(instances))
+    np.testing.assert_allclose(model.transform_batch(instances), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_single_and_batch_predictions_agree(model, instances):
+    batch = model.predict_failure_batch(instances[:20])
+    assert list(batch) == [model.predict_failure(row) for row in instances[:20]]
+
+
+def test_falls_back_when_compiled_transform_does_not_match(model, instances, monkeypatch):
+    # A scaler the fold does not model must disable the compiled path
+    monkeypatch.setattr(model.scaler, 'transform', lambda X: X * 2.0)
+    model.compile_preprocessing()
+    assert model.preprocess_weights is None
+    np.testing.assert_allclose(model.transform_batch(instances), model.pca.transform(instances) * 2.0)
+
+    monkeypatch.undo()
+    model.compile_preprocessing()
+    assert model.preprocess_weights is not None
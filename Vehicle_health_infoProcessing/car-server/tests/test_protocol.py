@@ -0,0 +1,66 @@
+import json
+import struct
+import numpy as np
+import pytest
+
+from protocol import ProtocolError, decode_binary_frame, decode_json_frame, encode_binary_frame
+
+PREDICTIVE_INPUT = [298.5, 309.0, 1500, 45, 10, 10.5, 67500]
+ENGINE_INPUT = [600, 3.5, 12, 3, 80, 80]
+
+
+def test_binary_frame_matches_json_frame():
+    # The Pi clients pack frames with struct rather than numpy
+    frame = struct.pack('<13f', *PREDICTIVE_INPUT, *ENGINE_INPUT) + b'KA-01'
+    vehicle_id, predictive, engine = decode_binary_frame(frame)
+    _, json_predictive, json_engine, _ = decode_json_frame(json.dumps({
+        'vehicle_id': 'KA-01', 'predictive_model_input': PREDICTIVE_INPUT, 'engine_condition_input': ENGINE_INPUT,
+    }))
+    assert vehicle_id == 'KA-01'
+    np.testing.assert_allclose(predictive, json_predictive.ravel(), rtol=1e-6)
+    np.testing.assert_allclose(engine, json_engine.ravel(), rtol=1e-6)
+
+
+def test_key_is_kept_when_frame_has_none():
+    frame = encode_binary_frame(PREDICTIVE_INPUT, ENGINE_INPUT)
+    assert len(frame) == 52
+    assert decode_binary_frame(frame, 'KA-01')[0] == 'KA-01'
+
+
+def test_short_frame_is_rejected():
+    with pytest.raises(ProtocolError):
+        decode_binary_frame(b'\x00' * 51)
+
+
+def test_non_utf8_key_is_a_protocol_error():
+    frame = encode_binary_frame(PREDICTIVE_INPUT, ENGINE_INPUT) + b'KA-\xff\xfe'
+    with pytest.raises(ProtocolError):
+        decode_binary_frame(frame)
+
+
+def test_sample_frame_keeps_sample_order():
+    samples = [
+        {'timestamp': t, 'predictive_model_input': [t] * 7, 'engine_condition_input': [t] * 6}
+        for t in range(5)
+    ]
+    vehicle_id, predictive, engine, timestamps = decode_json_frame(json.dumps({'vehicle_id': 'KA-01', 'samples': samples}))
+    assert predictive.shape == (5, 7) and engine.shape == (5, 6)
+    assert timestamps == list(range(5))
+    assert list(predictive[:, 0]) == list(range(5))
+    with pytest.raises(ProtocolError):
+        decode_json_frame(json.dumps({'samples': samples}), max_samples=4)
+
+
+@pytest.mark.parametrize('message', [
+    '{"vehicle_id": "KA-01", "predictive_model_input": [1, 2',
+    '["not", "an", "object"]',
+    json.dumps({'vehicle_id': 'KA-01', 'engine_condition_input': ENGINE_INPUT}),
+    json.dumps({'predictive_model_input': PREDICTIVE_INPUT, 'engine_condition_input': ENGINE_INPUT[:5]}),
+    json.dumps({'predictive_model_input': ['hot'] * 7, 'engine_condition_input': ENGINE_INPUT}),
+    json.dumps({'vehicle_id': 42, 'predictive_model_input': PREDICTIVE_INPUT, 'engine_condition_input': ENGINE_INPUT}),
+    json.dumps({'vehicle_id': ['KA-01'], 'samples': [
+        {'timestamp': 0, 'predictive_model_input': PREDICTIVE_INPUT, 'engine_condition_input': ENGINE_INPUT}]}),
+])
+def test_malformed_json_frame_is_a_protocol_error(message):
+    with pytest.raises(ProtocolError):
+        decode_json_frame(message)
@@ -0,0 +1,71 @@
+import random
+import pytest
+
+from subscriptions import Subscription, SubscriptionIndex
+
+FAILURE_TYPES = ['No Failure', 'Power Failure', 'Tool Wear Failure', 'Overstrain Failure']
+VEHICLE_IDS = [f'{region}-{number}' for region in ('eu', 'us', 'asia') for number in range(20)]
+
+
+def prediction(vehicle_id, failure='No Failure', condition='1'):
+    return {'vehicle_id': vehicle_id, 'Predicted Failure Type': failure, 'Predicted Engine Condition': condition}
+
+
+def random_subscription(rng):
+    return Subscription(
+        vehicle_ids=rng.sample(VEHICLE_IDS, rng.choice([0, 0, 2])),
+        vehicle_prefixes=rng.sample(['eu-', 'us-', 'asia-1', 'e'], rng.choice([0, 0, 1, 2])),
+        failure_types=rng.sample(FAILURE_TYPES, rng.choice([0, 0, 1, 2])),
+        exclude_failure_types=rng.sample(FAILURE_TYPES[:1], rng.choice([0, 1])),
+        engine_conditions=rng.sample(['0', '1'], rng.choice([0, 0, 1])),
+    )
+
+
+def test_index_agrees_with_matches():
+    rng = random.Random(0)
+    index = SubscriptionIndex()
+    subscriptions = {}
+    for subscriber in range(200):
+        subscriptions[subscriber] = random_subscription(rng)
+        index.add(subscriber, subscriptions[subscriber])
+    # Replacing some subscriptions must not leave stale entries behind
+    for subscriber in range(0, 200, 3):
+        index.remove(subscriber, subscriptions[subscriber])
+        subscriptions[subscriber] = random_subscription(rng)
+        index.add(subscriber, subscriptions[subscriber])
+
+    for _ in range(500):
+        response = prediction(rng.choice(VEHICLE_IDS), rng.choice(FAILURE_TYPES), rng.choice(['0', '1']))
+        expected = {subscriber for subscriber, subscription in subscriptions.items() if subscription.matches(response)}
+        assert index.match(response) == expected
+
+
+def test_removing_prefixes_prunes_the_trie():
+    index = SubscriptionIndex()
+    index.add('a', Subscription(vehicle_prefixes=['eu-']))
+    index.add('b', Subscription(vehicle_prefixes=['eu-north-', 'us-']))
+    index.remove('b', Subscription(vehicle_prefixes=['eu-north-', 'us-']))
+    # Only the path to the remaining 'eu-' subscriber is left
+    assert list(index._prefixes[0]) == ['e']
+    assert index._prefix_node('eu-')[0] == {}
+    assert index.match(prediction('eu-north-1')) == {'a'}
+
+    index.remove('a', Subscription(vehicle_prefixes=['eu-']))
+    # Removing a prefix nobody subscribed to does not create nodes either
+    index.remove('c', Subscription(vehicle_prefixes=['asia-']))
+    assert index._prefixes == ({}, set())
+
+
+def test_exclusion_filters_routine_predictions():
+    alerts = Subscription(vehicle_prefixes=['eu-'], exclude_failure_types=['No Failure'])
+    assert not alerts.matches(prediction('eu-1'))
+    assert alerts.matches(prediction('eu-1', 'Power Failure'))
+    assert not alerts.matches(prediction('us-1', 'Power Failure'))
+
+
+def test_from_message_rejects_bad_fields():
+    with pytest.raises(ValueError):
+        Subscription.from_message({'type': 'subscribe', 'vehicles': ['eu-1']})
+    with pytest.raises(ValueError):
+        Subscription.from_message({'type': 'subscribe', 'vehicle_ids': 'eu-1'})
+    assert Subscription.from_message({'type': 'subscribe'}).is_empty()
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import subprocess
+import sys
+import numpy as np
+
+from telemetry_log import TelemetryLog, TelemetryLogReader, compact
+
+CAR_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_log(directory, frames, segment_rows):
+    async def scenario():
+        log = TelemetryLog(str(directory), segment_rows=segment_rows, commit_interval_ms=1)
+        await log.start()
+        for vehicle_id, times in frames:
+            times = np.asarray(times, dtype=float)
+            log.append(vehicle_id, times, np.repeat(times[:, None], 7, axis=1), np.repeat(-times[:, None], 6, axis=1),
+                       ['Power Failure' if t % 5 == 0 else 'No Failure' for t in times], [1] * len(times))
+            await asyncio.sleep(0)
+        await log.stop()
+        return log
+
+    return asyncio.run(scenario())
+
+
+def test_rows_round_trip_across_rotated_segments(tmp_path):
+    frames = [(f'v{number % 3}', range(number * 10, number * 10 + 10)) for number in range(12)]
+    log = write_log(tmp_path, frames, segment_rows=25)
+    reader = TelemetryLogReader(str(tmp_path))
+    assert log.rows_written == 120
+    assert len(reader.segments()) == 5 and all(segment.sealed for segment in reader.segments())
+
+    rows = reader.read(['v1'], start=15, end=75)
+    assert sorted(rows['timestamp']) == list(range(15, 20)) + list(range(40, 50)) + list(range(70, 76))
+    assert set(rows['vehicle_id']) == {'v1'}
+    assert np.array_equal(rows['predictive_model_input'][:, 0], rows['timestamp'])
+    assert np.array_equal(rows['engine_condition_input'][:, 0], -rows['timestamp'])
+    assert list(rows['failure'] == 'Power Failure') == list(rows['timestamp'] % 5 == 0)
+    assert set(rows['condition']) == {'1'}
+
+
+def test_torn_column_write_is_ignored(tmp_path):
+    write_log(tmp_path, [('v1', range(10))], segment_rows=100)
+    segment = TelemetryLogReader(str(tmp_path)).segment_paths()[0]
+    with open(os.path.join(segment, 'timestamp.bin'), 'ab') as f:
+        f.write(b'\x00' * 4)
+    assert len(TelemetryLogReader(str(tmp_path)).read()['timestamp']) == 10
+
+
+def test_compaction_merges_and_sorts_by_vehicle(tmp_path):
+    frames = [(f'v{number % 4}', range(number * 10, number * 10 + 10)) for number in range(8)]
+    write_log(tmp_path, frames, segment_rows=10)
+    read, written, rows = compact(str(tmp_path), segment_rows=50, drop_before=20)
+    assert (read, written, rows) == (8, 2, 60)
+
+    reader = TelemetryLogReader(str(tmp_path))
+    segments = reader.segments()
+    assert [segment.rows for segment in segments] == [50, 10]
+    everything = reader.read()
+    assert list(everything['vehicle_id']) == sorted(everything['vehicle_id'])
+    assert everything['timestamp'].min() == 20
+    # Each vehicle now sits in a contiguous run of the compacted segment
+    assert segments[0].index['vehicles']['v0']['rows'] == 10
+
+
+def test_segment_of_a_killed_writer_reads_back(tmp_path):
+    # The child dies as soon as the last column is flushed, before anything else runs
+    script = f"""
+import os, sys
+import numpy as np
+sys.path.insert(0, {CAR_SERVER_DIR!r})
+from telemetry_log import SegmentWriter, new_segment_name
+
+writer = SegmentWriter(os.path.join({str(tmp_path)!r}, new_segment_name()))
+condition_file = writer._files['condition']
+class KilledAfterFlush:
+    def flush(self):
+        condition_file.flush()
+        os._exit(1)
+    def __getattr__(self, name):
+        return getattr(condition_file, name)
+writer._files['condition'] = KilledAfterFlush()
+writer.write({{
+    'timestamp': np.arange(3.0), 'vehicle': writer.encode('vehicles', ['v1', 'v2', 'v1']),
+    'inputs': np.zeros((3, 13)), 'failure': writer.encode('failures', ['No Failure'] * 3),
+    'condition': writer.encode('conditions', ['0', '1', '1']),
+}})
+"""
+    assert subprocess.run([sys.executable, '-c', script]).returncode == 1
+
+    rows = TelemetryLogReader(str(tmp_path)).read()
+    assert list(rows['vehicle_id']) == ['v1', 'v2', 'v1']
+    assert list(rows['condition']) == ['0', '1', '1']
+    assert compact(str(tmp_path), stale_after=0) == (1, 1, 3)
+
+
+def test_failed_commits_are_dropped_and_later_rows_stay_aligned(tmp_path):
+    def frame(log, times):
+        times = np.asarray(times, dtype=float)
+        log.append('v1', times, np.repeat(times[:, None], 7, axis=1), np.repeat(-times[:, None], 6, axis=1),
+                   ['No Failure'] * len(times), [0] * len(times))
+
+    async def committed(log, rows):
+        for _ in range(500):
+            if log.rows_written + log.dropped >= rows:
+                return
+            await asyncio.sleep(0.002)
+        raise AssertionError(f'{rows} rows never committed')
+
+    async def scenario():
+        log = TelemetryLog(str(tmp_path), segment_rows=1000, commit_interval_ms=1)
+        await log.start()
+        frame(log, range(0, 10))
+        await committed(log, 10)
+
+        # The disk fills up after the first two columns of the next commit are written
+        failing = log._writer._files['failure']
+        class DiskFull:
+            def write(self, data):
+                raise OSError(28, 'No space left on device')
+            def __getattr__(self, name):
+                return getattr(failing, name)
+        log._writer._files['failure'] = DiskFull()
+        frame(log, range(10, 15))
+        await committed(log, 15)
+
+        # A malformed frame fails in the commit itself, outside any file write
+        log.append('v1', [15.0, 16.0], [[1.0] * 5], [[1.0] * 6], ['No Failure'], [0])
+        await committed(log, 17)
+
+        frame(log, range(20, 30))
+        await committed(log, 27)
+        await log.stop()
+        return log
+
+    log = asyncio.run(scenario())
+    assert (log.rows_written, log.dropped) == (20, 7)
+    rows = TelemetryLogReader(str(tmp_path)).read()
+    assert sorted(rows['timestamp']) == list(range(10)) + list(range(20, 30))
+    assert np.array_equal(rows['predictive_model_input'][:, 0], rows['timestamp'])
+    assert np.array_equal(rows['engine_condition_input'][:, 0], -rows['timestamp'])
+
+
+def test_compaction_streams_runs_and_skips_full_compacted_segments(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = [(f'v{vehicle}', rng.permutation(100) + 100 * vehicle) for vehicle in rng.integers(0, 6, 30)]
+    write_log(tmp_path, frames, segment_rows=70)
+    expected = TelemetryLogReader(str(tmp_path)).read()
+
+    read, written, rows = compact(str(tmp_path), segment_rows=400)
+    assert (written, rows) == (8, 3000)
+    reader = TelemetryLogReader(str(tmp_path))
+    assert [segment.rows for segment in reader.segments()] == [400] * 7 + [200]
+    everything = reader.read()
+    order = np.lexsort((everything['timestamp'], everything['vehicle_id']))
+    assert np.array_equal(order, np.arange(3000))
+    assert sorted(zip(everything['vehicle_id'], everything['timestamp'], everything['failure'])) == \
+        sorted(zip(expected['vehicle_id'], expected['timestamp'], expected['failure']))
+    assert np.array_equal(everything['predictive_model_input'][:, 0], everything['timestamp'])
+
+    # Only the partly filled segment is compacted again, together with new rows
+    full = reader.segment_paths()[:7]
+    write_log(tmp_path, [('v9', range(50))], segment_rows=70)
+    assert compact(str(tmp_path), segment_rows=400) == (2, 1, 250)
+    assert TelemetryLogReader(str(tmp_path)).segment_paths()[:7] == full
+
+    # Dropping old rows rewrites the full segments that hold them, and only those
+    before = TelemetryLogReader(str(tmp_path)).read()['timestamp']
+    old = [segment.path for segment in TelemetryLogReader(str(tmp_path)).segments() if segment.index['min_ts'] < 150]
+    assert compact(str(tmp_path), segment_rows=400, drop_before=150)[0] == len(old) < 8
+    after = TelemetryLogReader(str(tmp_path)).read()['timestamp']
+    assert sorted(after) == sorted(before[before >= 150])
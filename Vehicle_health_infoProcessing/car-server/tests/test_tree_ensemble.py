@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier, VotingClassifier
+from sklearn.linear_model import LogisticRegression
+
+from tree_ensemble import ArrayVotingClassifier
+
+
+def fitted_ensemble(n_classes):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(600, 7))
+    score = data[:, 0] + data[:, 1] * data[:, 2] + rng.normal(scale=0.3, size=600)
+    labels = np.digitize(score, np.quantile(score, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    names = np.array(['No Failure', 'Power Failure', 'Tool Wear Failure'])[labels]
+    voting = VotingClassifier([
+        ('forest', RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0)),
+        ('extra', ExtraTreesClassifier(n_estimators=10, max_depth=6, random_state=0)),
+        ('boosting', GradientBoostingClassifier(n_estimators=15, max_depth=3, random_state=0)),
+        ('linear', LogisticRegression(max_iter=1000)),
+    ], voting='soft', weights=[1, 1, 2, 1]).fit(data, names)
+    return voting, rng.normal(size=(300, 7))
+
+
+# Boosting members are rebuilt from sklearn's private _raw_predict_init, so an sklearn
+# upgrade that changes it shows up here rather than as silently different predictions
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_arrays_reproduce_the_sklearn_ensemble(n_classes, tmp_path):
+    voting, queries = fitted_ensemble(n_classes)
+    ensemble = ArrayVotingClassifier.from_sklearn(voting)
+    np.testing.assert_allclose(ensemble.predict_proba(queries), voting.predict_proba(queries), rtol=1e-9, atol=1e-12)
+    assert np.array_equal(ensemble.predict(queries), voting.predict(queries))
+
+    ensemble.save(str(tmp_path))
+    loaded = ArrayVotingClassifier.load(str(tmp_path), mmap_mode='r')
+    np.testing.assert_allclose(loaded.predict_proba(queries), voting.predict_proba(queries), rtol=1e-9, atol=1e-12)
+
+
+def test_hard_voting_is_refused():
+    voting, _ = fitted_ensemble(2)
+    voting.voting = 'hard'
+    with pytest.raises(ValueError):
+        ArrayVotingClassifier.from_sklearn(voting)
@@ -0,0 +1,156 @@
+import json
+import os
+import numpy as np
+
+ENSEMBLE_META_FILE = 'ensemble.json'
+
+
+def _softmax(raw):
+    raw = raw - raw.max(axis=1, keepdims=True)
+    np.exp(raw, out=raw)
+    raw /= raw.sum(axis=1, keepdims=True)
+    return raw
+
+
+def _binary_proba(raw):
+    positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+    return np.column_stack([1.0 - positive, positive])
+
+
+def _flatten_trees(trees, normalize):
+    """
+    Concatenate sklearn Tree objects into flat node arrays with global child indices.
+    """
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        tree_left = tree.children_left.astype(np.int64)
+        tree_right = tree.children_right.astype(np.int64)
+        leaf = tree_left < 0
+        left.append(np.where(leaf, -1, tree_left + offset))
+        right.append(np.where(leaf, -1, tree_right + offset))
+        feature.append(np.where(leaf, 0, tree.feature).astype(np.int64))
+        threshold.append(tree.threshold)
+        node_value = tree.value[:, 0, :]
+        if normalize:
+            node_value = node_value / node_value.sum(axis=1, keepdims=True)
+        value.append(node_value)
+        roots.append(offset)
+        offset += tree.node_count
+    return {
+        'left': np.concatenate(left),
+        'right': np.concatenate(right),
+        'feature': np.concatenate(feature),
+        'threshold': np.concatenate(threshold),
+        'value': np.concatenate(value),
+        'roots': np.asarray(roots, dtype=np.int64),
+    }
+
+
+def _tree_leaves(X, arrays):
+    """
+    Return the leaf reached by every row in every tree, shape (n_rows, n_trees).
+    """
+    # sklearn compares float32 features against the split thresholds
+    X = X.astype(np.float32)
+    left, right, feature, threshold = arrays['left'], arrays['right'], arrays['feature'], arrays['threshold']
+    node = np.repeat(np.asarray(arrays['roots'])[np.newaxis, :], X.shape[0], axis=0)
+    rows, trees = np.nonzero(left[node] >= 0)
+    while rows.size:
+        current = node[rows, trees]
+        go_left = X[rows, feature[current]] <= threshold[current]
+        node[rows, trees] = np.where(go_left, left[current], right[current])
+        still_internal = left[node[rows, trees]] >= 0
+        rows, trees = rows[still_internal], trees[still_internal]
+    return node
+
+
+class ArrayVotingClassifier:
+    """
+    Soft-voting ensemble evaluated from plain numpy arrays.
+
+    Mirrors a fitted VotingClassifier(voting='soft') built from tree forests,
+    GradientBoostingClassifier and LogisticRegression members, so its arrays can
+    be saved as .npy files and memory-mapped instead of unpickled.
+    """
+
+    def __init__(self, members, classes, weights=None):
+        # members: list of (kind, params, arrays)
+        self.members = members
+        self.classes_ = classes
+        self.weights = weights
+
+    @classmethod
+    def from_sklearn(cls, voting):
+        """
+        Extract the arrays of a fitted soft VotingClassifier.
+        """
+        from sklearn.ensemble import GradientBoostingClassifier
+        from sklearn.linear_model import LogisticRegression
+
+        if voting.voting != 'soft':
+            raise ValueError("Only soft-voting ensembles can be exported")
+        members = []
+        for estimator in voting.estimators_:
+            if isinstance(estimator, GradientBoostingClassifier):
+                init = estimator._raw_predict_init(np.zeros((1, estimator.n_features_in_)))[0]
+                arrays = _flatten_trees([tree.tree_ for tree in estimator.estimators_.ravel()], normalize=False)
+                arrays['init'] = np.asarray(init, dtype=float)
+                members.append(('boosting', {'learning_rate': estimator.learning_rate}, arrays))
+            elif isinstance(estimator, LogisticRegression):
+                members.append(('linear', {}, {'coef': estimator.coef_, 'intercept': estimator.intercept_}))
+            elif hasattr(estimator, 'estimators_') and all(hasattr(tree, 'tree_') for tree in estimator.estimators_):
+                members.append(('forest', {}, _flatten_trees([tree.tree_ for tree in estimator.estimators_], normalize=True)))
+            else:
+                raise ValueError(f"Unsupported ensemble member: {type(estimator).__name__}")
+        return cls(members, np.asarray(voting.classes_), voting.weights)
+
+    def _member_proba(self, kind, params, arrays, X):
+        if kind == 'forest':
+            leaves = _tree_leaves(X, arrays)
+            return np.asarray(arrays['value'])[leaves].mean(axis=1)
+        if kind == 'boosting':
+            leaves = _tree_leaves(X, arrays)
+            n_outputs = np.asarray(arrays['init']).shape[0]
+            # Trees are stored stage by stage, one per class output
+            stage_values = np.asarray(arrays['value'])[leaves, 0].reshape(X.shape[0], -1, n_outputs)
+            raw = arrays['init'] + params['learning_rate'] * stage_values.sum(axis=1)
+            return _softmax(raw) if n_outputs > 1 else _binary_proba(raw)
+        raw = X @ np.asarray(arrays['coef']).T + arrays['intercept']
+        return _softmax(raw) if raw.shape[1] > 1 else _binary_proba(raw)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=float)
+        probas = [self._member_proba(kind, params, arrays, X) for kind, params, arrays in self.members]
+        return np.average(probas, axis=0, weights=self.weights)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, directory):
+        """
+        Write every member array as a .npy file plus a JSON description of the ensemble.
+        """
+        os.makedirs(directory, exist_ok=True)
+        members = []
+        for position, (kind, params, arrays) in enumerate(self.members):
+            for name, array in arrays.items():
+                np.save(os.path.join(directory, f'member{position}_{name}.npy'), array)
+            members.append({'kind': kind, 'params': params, 'arrays': sorted(arrays)})
+        np.save(os.path.join(directory, 'classes.npy'), self.classes_)
+        meta = {'members': members, 'weights': self.weights}
+        with open(os.path.join(directory, ENSEMBLE_META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        with open(os.path.join(directory, ENSEMBLE_META_FILE)) as f:
+            meta = json.load(f)
+        members = []
+        for position, member in enumerate(meta['members']):
+            arrays = {
+                name: np.load(os.path.join(directory, f'member{position}_{name}.npy'), mmap_mode=mmap_mode)
+                for name in member['arrays']
+            }
+            members.append((member['kind'], member['params'], arrays))
+        return cls(members, np.load(os.path.join(directory, 'classes.npy')), meta['weights'])
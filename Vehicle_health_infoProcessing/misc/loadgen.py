@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import resource
+import struct
+import time
+import numpy as np
+import websockets
+
+# Binary telemetry subprotocol of the car server (see car-server/protocol.py)
+BINARY_SUBPROTOCOL = "vhealth.bin.v1"
+
+
+# Same distributions as generate_engine_health_data in the Raspberry Pi clients, from a seeded generator
+def generate_engine_health_data(rng):
+    engine_rpm = rng.uniform(400, 900)
+    lub_oil_pressure = rng.uniform(2, 6)
+    fuel_pressure = rng.uniform(6, 20)
+    coolant_pressure = rng.uniform(1, 5)
+    lub_oil_temp = rng.uniform(70, 90)
+    coolant_temp = rng.uniform(70, 90)
+    return [engine_rpm, lub_oil_pressure, fuel_pressure, coolant_pressure, lub_oil_temp, coolant_temp]
+
+
+# Same distributions as generate_predictive_maintenance_data in the Raspberry Pi clients
+def generate_predictive_maintenance_data(rng):
+    air_temp = rng.uniform(298, 300)
+    process_temp = rng.uniform(308, 310)
+    rotational_speed = rng.uniform(1400, 1600)
+    torque = rng.uniform(30, 60)
+    tool_wear = rng.randint(0, 15)
+    return [air_temp, process_temp, rotational_speed, torque, tool_wear,
+            process_temp - air_temp, torque * rotational_speed]
+
+
+def build_frame(rng, vehicle_id, binary, samples, first_frame):
+    """
+    One telemetry frame: packed float32 values for the binary subprotocol, JSON otherwise.
+    """
+    if binary:
+        frame = struct.pack("<13f", *generate_predictive_maintenance_data(rng), *generate_engine_health_data(rng))
+        return frame + vehicle_id.encode() if first_frame else frame
+    if samples > 1:
+        now = time.time()
+        return json.dumps({"vehicle_id": vehicle_id, "samples": [
+            {"timestamp": now, "predictive_model_input": generate_predictive_maintenance_data(rng),
+             "engine_condition_input": generate_engine_health_data(rng)}
+            for _ in range(samples)
+        ]})
+    return json.dumps({
+        "vehicle_id": vehicle_id,
+        "predictive_model_input": generate_predictive_maintenance_data(rng),
+        "engine_condition_input": generate_engine_health_data(rng),
+    })
+
+
+class Recorder:
+    """
+    Raw observations of one load-generating process.
+    """
+
+    def __init__(self):
+        self.round_trip_ms = []
+        self.monitor_lag_ms = []
+        self.monitor_messages = 0
+        self.sent = 0
+        self.answered = 0
+        self.errors = 0
+        self.shed = 0
+        self.late_sends = 0
+        # Answers received once every vehicle has connected, for the steady-state throughput
+        self.steady_answered = 0
+        self.steady_from = 0.0
+        self.connect_failures = 0
+        self.disconnects = 0
+        # Wall-clock time each vehicle last got its prediction back, for the monitor fan-out lag
+        self.answered_at = {}
+
+
+async def run_vehicle(args, recorder, vehicle_id, start_at, stop_at, rng):
+    """
+    Send frames at the configured rate until stop_at, timing each round trip.
+
+    Frames are scheduled on a fixed grid; a frame that is due while the previous one is
+    still in flight goes out as soon as the answer arrives and is counted as late.
+    """
+    await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+    try:
+        ws = await websockets.connect(f"{args.url}/vehicle", open_timeout=args.connect_timeout, ping_interval=None,
+                                      subprotocols=[BINARY_SUBPROTOCOL] if args.binary else None, max_size=None)
+    except Exception:
+        recorder.connect_failures += 1
+        return
+    binary = ws.subprotocol == BINARY_SUBPROTOCOL
+    interval = 1.0 / args.rate
+    next_send = time.monotonic() + rng.uniform(0, interval)
+    first_frame = True
+    try:
+        while True:
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < 0:
+                # Due before the previous answer arrived
+                recorder.late_sends += 1
+            if time.monotonic() >= stop_at:
+                break
+            next_send += interval
+
+            frame = build_frame(rng, vehicle_id, binary, args.samples, first_frame)
+            first_frame = False
+            started = time.perf_counter()
+            await ws.send(frame)
+            recorder.sent += 1
+            reply = await ws.recv()
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+            if isinstance(reply, bytes):
+                recorder.answered += 1
+            else:
+                reply = json.loads(reply)
+                if reply.get("error") == "overloaded":
+                    # Back off as the server asked, like the Raspberry Pi client does
+                    recorder.shed += 1
+                    next_send = max(next_send, time.monotonic() + reply["retry_after_ms"] / 1000.0)
+                    continue
+                if "error" in reply:
+                    recorder.errors += 1
+                    continue
+                recorder.answered += 1
+            if time.monotonic() >= recorder.steady_from:
+                recorder.steady_answered += 1
+            recorder.round_trip_ms.append(elapsed_ms)
+            recorder.answered_at[vehicle_id] = time.time()
+    except websockets.exceptions.ConnectionClosed:
+        recorder.disconnects += 1
+    finally:
+        await ws.close()
+
+
+async def run_monitor(args, recorder, stop_at):
+    """
+    Count monitor messages and time how long after its vehicle each prediction arrives.
+    """
+    try:
+        ws = await websockets.connect(f"{args.url}/monitor", open_timeout=args.connect_timeout, max_size=None)
+    except Exception:
+        recorder.connect_failures += 1
+        return
+    try:
+        while True:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(ws.recv(), remaining)
+            except asyncio.TimeoutError:
+                break
+            received_at = time.time()
+            recorder.monitor_messages += 1
+            data = json.loads(message)
+            # Tick mode sends {"type": "delta" | "snapshot", "vehicles": [...]} frames
+            vehicles = data.get("vehicles", []) if "type" in data else [data]
+            for vehicle in vehicles:
+                answered_at = recorder.answered_at.get(vehicle.get("vehicle_id"))
+                if answered_at is not None and data.get("type") != "snapshot":
+                    recorder.monitor_lag_ms.append((received_at - answered_at) * 1000.0)
+    except websockets.exceptions.ConnectionClosed:
+        recorder.disconnects += 1
+    finally:
+        await ws.close()
+
+
+async def generate_load(args, first_vehicle, vehicles, monitors):
+    recorder = Recorder()
+    rng = random.Random(args.seed + first_vehicle)
+    now = time.monotonic()
+    stop_at = now + 0.2 + args.ramp + args.duration
+    recorder.steady_from = now + 0.2 + args.ramp
+    # Monitors connect first so they see the whole run; vehicles are spread evenly over the ramp
+    tasks = [asyncio.create_task(run_monitor(args, recorder, stop_at)) for _ in range(monitors)]
+    for number in range(vehicles):
+        start_at = now + 0.2 + args.ramp * number / max(vehicles, 1)
+        vehicle_id = f"{args.prefix}-{first_vehicle + number:05d}"
+        tasks.append(asyncio.create_task(
+            run_vehicle(args, recorder, vehicle_id, start_at, stop_at, random.Random(rng.random()))))
+    await asyncio.gather(*tasks)
+    recorder.answered_at = None
+    return recorder
+
+
+def run_share(args, first_vehicle, vehicles, monitors):
+    return asyncio.run(generate_load(args, first_vehicle, vehicles, monitors))
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+        "mean": round(float(values.mean()), 3),
+    }
+
+
+def summarise(args, recorders, wall_s):
+    """
+    Merge the per-process observations into one JSON-serialisable result.
+    """
+    total = lambda name: sum(getattr(recorder, name) for recorder in recorders)
+    round_trips = [value for recorder in recorders for value in recorder.round_trip_ms]
+    monitor_lags = [value for recorder in recorders for value in recorder.monitor_lag_ms]
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(time.time() - wall_s)),
+        "label": args.label,
+        "config": {
+            "url": args.url,
+            "vehicles": args.vehicles,
+            "monitors": args.monitors,
+            "rate_hz": args.rate,
+            "samples_per_frame": args.samples,
+            "binary": args.binary,
+            "ramp_s": args.ramp,
+            "duration_s": args.duration,
+            "processes": args.processes,
+            "seed": args.seed,
+        },
+        "wall_s": round(wall_s, 3),
+        "frames_sent": total("sent"),
+        "frames_answered": total("answered"),
+        "frames_shed": total("shed"),
+        "errors": total("errors"),
+        "late_sends": total("late_sends"),
+        "connect_failures": total("connect_failures"),
+        "disconnects": total("disconnects"),
+        # Offered load and throughput once the ramp is over
+        "offered_frames_per_s": args.vehicles * args.rate,
+        "throughput_frames_per_s": round(total("steady_answered") / args.duration, 2),
+        "throughput_samples_per_s": round(total("steady_answered") * args.samples / args.duration, 2),
+        "round_trip_ms": percentiles(round_trips),
+        "monitor_messages": total("monitor_messages"),
+        "monitor_fanout_lag_ms": percentiles(monitor_lags),
+    }
+
+
+def raise_file_limit():
+    """
+    Every simulated vehicle holds a socket, so lift the open-file limit as far as allowed.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+# Simulate a fleet of vehicles (and optionally monitors) against a running car server
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the vehicle health WebSocket server.")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765")
+    parser.add_argument("--vehicles", type=int, default=1000, help="Simulated vehicles")
+    parser.add_argument("--monitors", type=int, default=0, help="Monitor clients (run in the first process)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Frames per second per vehicle")
+    parser.add_argument("--samples", type=int, default=1, help="Samples per JSON frame")
+    parser.add_argument("--binary", action="store_true", help="Offer the binary subprotocol")
+    parser.add_argument("--ramp", type=float, default=10.0, help="Seconds over which vehicles connect")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run once all vehicles are connected")
+    parser.add_argument("--processes", type=int, default=1, help="Client processes to spread the vehicles over")
+    parser.add_argument("--connect-timeout", type=float, default=30.0)
+    parser.add_argument("--prefix", default="loadgen")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="Free-form tag stored with the results")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+    if args.samples > 1 and args.binary:
+        parser.error("--samples needs JSON frames; the binary subprotocol carries one sample per frame")
+
+    raise_file_limit()
+    started = time.monotonic()
+    if args.processes > 1:
+        share = -(-args.vehicles // args.processes)
+        jobs = [(args, first, min(share, args.vehicles - first), args.monitors if first == 0 else 0)
+                for first in range(0, args.vehicles, share)]
+        with multiprocessing.Pool(len(jobs)) as pool:
+            recorders = pool.starmap(run_share, jobs)
+    else:
+        recorders = [run_share(args, 0, args.vehicles, args.monitors)]
+    results = summarise(args, recorders, time.monotonic() - started)
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
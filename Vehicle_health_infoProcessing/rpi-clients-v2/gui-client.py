@@ -5,6 +5,10 @@ import random
 import tkinter as tk
 from tkinter import messagebox
 import threading
+import struct
+
+# Binary telemetry subprotocol offered to the server; JSON is used if the server does not accept it
+BINARY_SUBPROTOCOL = "vhealth.bin.v1"
 
 # Global flag to control whether the system is running
 running = False
@@ -45,12 +49,26 @@ async def generate_test_instance(vehicle_id):
 
     return json.dumps(test_instance)
 
+# Function to pack the test instance as 13 little-endian float32 values; the vehicle ID only goes in the first frame
+def generate_binary_instance(vehicle_id, first_frame):
+    values = generate_predictive_maintenance_data() + generate_engine_health_data()
+    frame = struct.pack("<13f", *values)
+    if first_frame:
+        frame += vehicle_id.encode()
+    return frame
+
 # Function to send the data over WebSocket and update the GUI
 async def send_data(ws, vehicle_id, label_status, label_failure, label_condition):
+    binary = ws.subprotocol == BINARY_SUBPROTOCOL
+    first_frame = True
     while running:
-        test_instance = await generate_test_instance(vehicle_id)
+        if binary:
+            test_instance = generate_binary_instance(vehicle_id, first_frame)
+            first_frame = False
+        else:
+            test_instance = await generate_test_instance(vehicle_id)
         try:
-            # Send the data as a JSON string to the WebSocket server
+            # Send the data to the WebSocket server
             await ws.send(test_instance)
             print(f"Data sent successfully for vehicle {vehicle_id}")
 
@@ -58,9 +76,13 @@ async def send_data(ws, vehicle_id, label_status, label_failure, label_condition
             response = await ws.recv()
 
             # Update the label with the server response
-            response_data = json.loads(response)
-            predicted_failure = response_data.get("Predicted Failure Type", "N/A")
-            predicted_condition = response_data.get("Predicted Engine Condition", "N/A")
+            if isinstance(response, bytes):
+                # Binary responses are "<failure type>\x1f<engine condition>"
+                predicted_failure, predicted_condition = response.decode().split("\x1f")
+            else:
+                response_data = json.loads(response)
+                predicted_failure = response_data.get("Predicted Failure Type", "N/A")
+                predicted_condition = response_data.get("Predicted Engine Condition", "N/A")
 
             # Update the GUI with the results
             label_status.config(text="Data sent successfully!")
@@ -76,7 +98,7 @@ async def send_data(ws, vehicle_id, label_status, label_failure, label_condition
 async def run_client(vehicle_id, label_status, label_failure, label_condition):
     uri = "ws://16.170.232.142:8765/vehicle"  # WebSocket server address
     try:
-        async with websockets.connect(uri) as websocket:
+        async with websockets.connect(uri, subprotocols=[BINARY_SUBPROTOCOL]) as websocket:
             await send_data(websocket, vehicle_id, label_status, label_failure, label_condition)
     except Exception as e:
         label_status.config(text=f"Connection error: {e}")
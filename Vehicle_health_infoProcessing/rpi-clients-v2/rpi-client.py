@@ -3,8 +3,15 @@ import websockets
 import json
 import random
 import numpy as np
+import struct
 import time
 
+# Binary telemetry subprotocol offered to the server; JSON is used if the server does not accept it
+BINARY_SUBPROTOCOL = "vhealth.bin.v1"
+
+# Monotonic time before which the server has asked us not to send (see retry_after_ms)
+resume_at = 0.0
+
 # Function to generate synthetic data from the engine health dataset
 def generate_engine_health_data():
     engine_rpm = random.uniform(400, 900)  # Random RPM between 400 and 900
@@ -41,10 +48,30 @@ async def generate_test_instance(vehicle_id):
 
     return json.dumps(test_instance)
 
+# Function to pack the test instance as 13 little-endian float32 values; the vehicle ID only goes in the first frame
+def generate_binary_instance(vehicle_id, first_frame):
+    values = generate_predictive_maintenance_data() + generate_engine_health_data()
+    frame = struct.pack("<13f", *values)
+    if first_frame:
+        frame += vehicle_id.encode()
+    return frame
+
 # Function to send the data over WebSocket
 async def send_data(ws, vehicle_id):
+    binary = ws.subprotocol == BINARY_SUBPROTOCOL
+    first_frame = True
     while True:
-        test_instance = await generate_test_instance(vehicle_id)
+        # Honour the server's overload/backoff message before sending the next reading
+        delay = resume_at - time.monotonic()
+        if delay > 0:
+            print(f"Server is overloaded, waiting {delay:.1f} seconds")
+            await asyncio.sleep(delay)
+
+        if binary:
+            test_instance = generate_binary_instance(vehicle_id, first_frame)
+            first_frame = False
+        else:
+            test_instance = await generate_test_instance(vehicle_id)
 
         try:
             await ws.send(test_instance)
@@ -71,14 +98,22 @@ async def connect_to_server():
 
     while True:  # Loop indefinitely to handle reconnect attempts
         try:
-            async with websockets.connect(uri, ping_interval=10, ping_timeout=30) as ws:  # Send pings every 10 seconds, wait for pong response for 30 seconds
-                print(f"Connected to {uri}")
+            async with websockets.connect(uri, ping_interval=10, ping_timeout=30, subprotocols=[BINARY_SUBPROTOCOL]) as ws:  # Send pings every 10 seconds, wait for pong response for 30 seconds
+                print(f"Connected to {uri} ({ws.subprotocol or 'json'})")
 
                 # Listen for incoming messages and handle pongs explicitly
                 async def receive_messages():
+                    global resume_at
                     while True:
                         message = await ws.recv()
+                        if isinstance(message, bytes):
+                            # Binary responses are "<failure type>\x1f<engine condition>"
+                            predicted_failure, predicted_condition = message.decode().split("\x1f")
+                            print(f"Received prediction: {predicted_failure}, engine condition {predicted_condition}")
+                            continue
                         print(f"Received message: {message}")
+                        if "retry_after_ms" in message:
+                            resume_at = time.monotonic() + json.loads(message)["retry_after_ms"] / 1000.0
                         # Handle pong (optional if server pings)
                         if message.startswith("ping"):
                             ping_data = message
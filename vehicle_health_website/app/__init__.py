@@ -7,7 +7,7 @@ import logging
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config=None):
     # Configure logging
     logging.basicConfig(
         level=logging.INFO,
@@ -18,6 +18,16 @@ def create_app():
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default-secret-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///vehicle_health.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Largest number of parameter sets accepted by /api/predict-failure/batch
+    app.config['PREDICTION_BATCH_MAX_ROWS'] = int(os.environ.get('PREDICTION_BATCH_MAX_ROWS', 1000))
+    # Largest number of records accepted by /api/vehicle-health/bulk
+    app.config['HEALTH_BULK_MAX_ROWS'] = int(os.environ.get('HEALTH_BULK_MAX_ROWS', 50000))
+    # Largest body accepted by /api/vehicle-health/bulk, checked before anything is parsed
+    app.config['HEALTH_BULK_MAX_BYTES'] = int(os.environ.get('HEALTH_BULK_MAX_BYTES', 32 * 1024 * 1024))
+    # Most buckets returned by /api/vehicle/<id>/health/history, whatever the range
+    app.config['HEALTH_HISTORY_MAX_POINTS'] = int(os.environ.get('HEALTH_HISTORY_MAX_POINTS', 500))
+    # Overrides, e.g. a test database
+    app.config.update(config or {})
 
     db.init_app(app)
     login_manager.init_app(app)
@@ -2,6 +2,9 @@ from app import db
 from datetime import datetime
 
 class ServiceHistory(db.Model):
+    # Service history and the latest-service lookup filter by vehicle and order by date
+    __table_args__ = (db.Index('ix_service_history_vehicle_id_service_date', 'vehicle_id', 'service_date'),)
+
     id = db.Column(db.Integer, primary_key=True)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
     service_date = db.Column(db.DateTime, nullable=False)
@@ -1,8 +1,31 @@
 from app import db
 from datetime import datetime
-from app.utils.predictive_analytics import PredictiveAnalytics
+from app.services.model_registry import get_predictive_analytics
+
+# Reading parameters, and the value recorded when a reading does not report one
+PARAMETER_DEFAULTS = {
+    'engine_rpm': 0,
+    'oil_pressure': 0,
+    'fuel_pressure': 0,
+    'coolant_pressure': 0,
+    'oil_temperature': 0,
+    'coolant_temperature': 0,
+    'air_temperature': 298,  # ~25°C
+    'process_temperature': 308,  # ~35°C
+    'rotation_speed': 1500,
+    'torque': 40,
+    'tool_wear': 0,
+}
+
+# Parameter order of the engine and maintenance model inputs
+ENGINE_PARAMETERS = ['engine_rpm', 'oil_pressure', 'fuel_pressure', 'coolant_pressure', 'oil_temperature',
+                     'coolant_temperature']
+MAINTENANCE_PARAMETERS = ['air_temperature', 'process_temperature', 'rotation_speed', 'torque', 'tool_wear']
 
 class VehicleHealth(db.Model):
+    # History reads filter by vehicle and order by time; the index serves both without a sort
+    __table_args__ = (db.Index('ix_vehicle_health_vehicle_id_timestamp', 'vehicle_id', 'timestamp'),)
+
     id = db.Column(db.Integer, primary_key=True)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -31,24 +54,15 @@ class VehicleHealth(db.Model):
 
     def __init__(self, vehicle_id, **params):
         self.vehicle_id = vehicle_id
-        self.engine_rpm = params.get('engine_rpm', 0)
-        self.oil_pressure = params.get('oil_pressure', 0)
-        self.fuel_pressure = params.get('fuel_pressure', 0)
-        self.coolant_pressure = params.get('coolant_pressure', 0)
-        self.oil_temperature = params.get('oil_temperature', 0)
-        self.coolant_temperature = params.get('coolant_temperature', 0)
-        self.air_temperature = params.get('air_temperature', 298)  # ~25°C
-        self.process_temperature = params.get('process_temperature', 308)  # ~35°C
-        self.rotation_speed = params.get('rotation_speed', 1500)
-        self.torque = params.get('torque', 40)
-        self.tool_wear = params.get('tool_wear', 0)
+        for name, default in PARAMETER_DEFAULTS.items():
+            setattr(self, name, params.get(name, default))
         
         # Run predictive analysis
         self.analyze_health()
 
     def analyze_health(self):
         """Analyze vehicle health using predictive analytics"""
-        analyzer = PredictiveAnalytics()
+        analyzer = get_predictive_analytics()
         
         # Analyze engine condition
         engine_result = analyzer.predict_engine_condition({
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required, current_user
 from app.models.user import Vehicle,ServiceHistory
 from app.models.vehicle_health import VehicleHealth
@@ -95,12 +95,64 @@ def update_vehicle_health(vehicle_id):
     response['action_items'] = action_items
     return jsonify(response)
 
+@api.route('/vehicle-health/bulk', methods=['POST'])
+@login_required
+def bulk_ingest_vehicle_health():
+    """Store many health records at once, sent as JSON lines, CSV or a JSON array
+
+    Every record names its vehicle_id; the other fields are those of a single
+    /vehicle/<id>/health POST plus an optional ISO 8601 timestamp.
+    """
+    from app.services.health_ingestion_service import detect_format, ingest_health_records, parse_health_records
+
+    # Enforce the limits before the body is read whole or parsed into a DataFrame
+    max_bytes = current_app.config['HEALTH_BULK_MAX_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({'error': f'Request body larger than {max_bytes} bytes'}), 413
+    body = request.stream.read(max_bytes + 1)
+    if len(body) > max_bytes:
+        return jsonify({'error': f'Request body larger than {max_bytes} bytes'}), 413
+
+    max_rows = current_app.config['HEALTH_BULK_MAX_ROWS']
+    try:
+        body_format = detect_format(request.mimetype, request.args.get('format'))
+        body = body.decode('utf-8')
+        # A line per record (plus the CSV header); JSON arrays are counted once parsed
+        if body_format != 'json' and body.count('\n') > max_rows + 1:
+            return jsonify({'error': f'At most {max_rows} records per request'}), 400
+        records, rejects = parse_health_records(body, body_format)
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Request body must be UTF-8'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if len(records) + len(rejects) > max_rows:
+        return jsonify({'error': f'At most {max_rows} records per request'}), 400
+
+    return jsonify(ingest_health_records(records, current_user.id, rejects))
+
 @api.route('/vehicle/<int:vehicle_id>/health/history', methods=['GET'])
 @login_required
 def get_vehicle_health_history(vehicle_id):
+    """Health history, bucketed when 'from', 'to' or 'resolution' is given
+
+    Without any of them this returns the latest 24 raw records as before. With
+    them, min/mean/max of every parameter and counts of each condition and failure
+    type per bucket, never more than HEALTH_HISTORY_MAX_POINTS buckets.
+    """
     vehicle = Vehicle.query.get_or_404(vehicle_id)
     if vehicle.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
+
+    if any(request.args.get(name) for name in ('from', 'to', 'resolution')):
+        from app.services.health_history_service import health_history, history_range
+
+        try:
+            start, end, resolution = history_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(health_history(vehicle_id, start, end, resolution,
+                                      current_app.config['HEALTH_HISTORY_MAX_POINTS']))
     
     # Get last 24 hours of health records
     health_records = VehicleHealth.query.filter_by(vehicle_id=vehicle_id)\
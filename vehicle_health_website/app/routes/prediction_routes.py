@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 import logging
 
 prediction_bp = Blueprint('prediction', __name__)
@@ -22,8 +22,8 @@ def predict_failure():
                    f"rot_speed={rot_speed}, torque={torque}, tool_wear={tool_wear}")
         
         # Import here to avoid circular import
-        from app.services.failure_prediction_service import FailurePredictionService
-        failure_predictor = FailurePredictionService()
+        from app.services.failure_prediction_service import get_failure_prediction_service
+        failure_predictor = get_failure_prediction_service()
         
         # Get prediction
         prediction = failure_predictor.predict_failure(
@@ -37,6 +37,38 @@ def predict_failure():
         logger.error(f"Error in predict_failure: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 400
 
+@prediction_bp.route('/api/predict-failure/batch', methods=['POST'])
+def predict_failure_batch():
+    try:
+        data = request.get_json()
+        
+        # Accept a bare array or {"parameters": [...]}, one parameter set per row
+        parameter_sets = data.get('parameters') if isinstance(data, dict) else data
+        if not isinstance(parameter_sets, list) or not parameter_sets:
+            return jsonify({'error': 'Expected a non-empty array of parameter sets'}), 400
+        max_rows = current_app.config['PREDICTION_BATCH_MAX_ROWS']
+        if len(parameter_sets) > max_rows:
+            return jsonify({'error': f'At most {max_rows} parameter sets per request'}), 400
+        
+        # Import here to avoid circular import
+        from app.services.failure_prediction_service import FEATURE_NAMES, get_failure_prediction_service
+        
+        rows = []
+        for index, parameters in enumerate(parameter_sets):
+            try:
+                rows.append([float(parameters[name]) for name in FEATURE_NAMES])
+            except (KeyError, TypeError, ValueError):
+                return jsonify({'error': f'Parameter set {index} needs numeric {", ".join(FEATURE_NAMES)}'}), 400
+        
+        predictions = get_failure_prediction_service().predict_failure_batch(rows)
+        logger.info(f"Scored {len(predictions)} parameter sets")
+        
+        return jsonify({'predictions': predictions})
+    
+    except Exception as e:
+        logger.error(f"Error in predict_failure_batch: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 400
+
 @prediction_bp.route('/api/find-garages', methods=['POST'])
 def find_garages():
     try:
@@ -1,6 +1,13 @@
 import joblib
 import numpy as np
+import threading
 from pathlib import Path
+from flask import current_app
+
+# Order of the model's input features
+FEATURE_NAMES = ['air_temperature', 'process_temperature', 'rotational_speed', 'torque', 'tool_wear']
+
+_service_lock = threading.Lock()
 
 class FailurePredictionService:
     def __init__(self):
@@ -8,29 +15,51 @@ class FailurePredictionService:
         self.model = joblib.load(model_dir / 'failure_predictor.joblib')
         self.scaler = joblib.load(model_dir / 'failure_scaler.joblib')
         self.label_encoder = joblib.load(model_dir / 'failure_type_encoder.joblib')
-    
+
     def predict_failure(self, air_temp, process_temp, rot_speed, torque, tool_wear):
-        # Prepare input features
-        features = np.array([[air_temp, process_temp, rot_speed, torque, tool_wear]])
-        
-        # Scale features
+        return self.predict_failure_batch([[air_temp, process_temp, rot_speed, torque, tool_wear]])[0]
+
+    def predict_failure_batch(self, rows):
+        """Predict failure types for many parameter sets with a single predict_proba call
+
+        Args:
+            rows: sequence of [air_temp, process_temp, rot_speed, torque, tool_wear]
+
+        Returns:
+            list: one prediction result per row, in input order
+        """
+        # Scale the whole matrix at once
+        features = np.asarray(rows, dtype=float).reshape(-1, len(FEATURE_NAMES))
         features_scaled = self.scaler.transform(features)
-        
+
         # Get prediction probabilities
-        probabilities = self.model.predict_proba(features_scaled)[0]
-        
-        # Get predicted class
-        predicted_class_idx = np.argmax(probabilities)
-        predicted_class = self.label_encoder.inverse_transform([predicted_class_idx])[0]
-        
-        # Create prediction result
-        result = {
-            'predicted_failure': predicted_class,
-            'probability': float(probabilities[predicted_class_idx]),
-            'all_probabilities': {
-                failure_type: float(prob)
-                for failure_type, prob in zip(self.label_encoder.classes_, probabilities)
+        probabilities = self.model.predict_proba(features_scaled)
+
+        # Get predicted classes
+        predicted_class_idx = probabilities.argmax(axis=1)
+        predicted_classes = self.label_encoder.inverse_transform(predicted_class_idx)
+        failure_types = list(self.label_encoder.classes_)
+
+        # Create prediction results
+        return [
+            {
+                'predicted_failure': predicted_class,
+                'probability': float(row[class_idx]),
+                'all_probabilities': {
+                    failure_type: float(prob)
+                    for failure_type, prob in zip(failure_types, row)
+                }
             }
-        }
-        
-        return result
+            for predicted_class, class_idx, row in zip(predicted_classes, predicted_class_idx, probabilities)
+        ]
+
+
+def get_failure_prediction_service():
+    """Return the app's FailurePredictionService, loading the model files on first use only"""
+    service = current_app.extensions.get('failure_prediction_service')
+    if service is None:
+        with _service_lock:
+            service = current_app.extensions.get('failure_prediction_service')
+            if service is None:
+                service = current_app.extensions['failure_prediction_service'] = FailurePredictionService()
+    return service
@@ -0,0 +1,116 @@
+import math
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models.vehicle_health import PARAMETER_DEFAULTS, VehicleHealth
+
+# Range charted when a request gives no 'from'
+DEFAULT_RANGE = timedelta(hours=24)
+
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_timestamp(value, name):
+    """Parse an ISO 8601 timestamp into the naive UTC datetime the health table stores"""
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 date and time")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def parse_resolution(value):
+    """Parse a bucket width such as '30', '30s', '5m', '1h' or '1d' into seconds"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', value)
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError("'resolution' must be a positive number of seconds, or end in s, m, h or d")
+    return float(match.group(1)) * UNIT_SECONDS[match.group(2) or 's']
+
+
+def health_history(vehicle_id, start, end, resolution=None, max_points=500):
+    """Aggregate a vehicle's health records between start and end into time buckets
+
+    Buckets are aligned to start and are at least wide enough that the range fits in
+    max_points, so the response size does not grow with the range. The aggregation
+    runs in SQL over the (vehicle_id, timestamp) index; only buckets holding records
+    are returned.
+
+    Returns:
+        dict: the range, the bucket width used and one point per non-empty bucket
+    """
+    span = (end - start).total_seconds()
+    # Whole milliseconds, so bucket arithmetic is exact
+    resolution_ms = math.ceil(max(resolution or 0, span / max_points, 1) * 1000)
+
+    # Milliseconds since start, from SQLite's julian day number of each timestamp. The
+    # offset is rounded before the integer division: julian days carry floating-point
+    # error, and truncating it would put readings on a bucket boundary one bucket early
+    offset_ms = db.cast(
+        db.func.round((db.func.julianday(VehicleHealth.timestamp) - db.func.julianday(start)) * 86400000),
+        db.Integer,
+    )
+    bucket = (offset_ms // resolution_ms).label('bucket')
+    in_range = (
+        VehicleHealth.vehicle_id == vehicle_id,
+        VehicleHealth.timestamp >= start,
+        VehicleHealth.timestamp < end,
+    )
+
+    stats = []
+    for name in PARAMETER_DEFAULTS:
+        column = getattr(VehicleHealth, name)
+        stats += [db.func.min(column), db.func.avg(column), db.func.max(column)]
+    rows = db.session.execute(
+        db.select(bucket, db.func.count(), *stats).where(*in_range).group_by(bucket).order_by(bucket)
+    ).all()
+
+    counts = db.session.execute(
+        db.select(bucket, VehicleHealth.condition, VehicleHealth.failure_type, db.func.count())
+        .where(*in_range)
+        .group_by(bucket, VehicleHealth.condition, VehicleHealth.failure_type)
+    ).all()
+    conditions = defaultdict(lambda: defaultdict(int))
+    failure_types = defaultdict(lambda: defaultdict(int))
+    for index, condition, failure_type, count in counts:
+        conditions[index][condition] += count
+        failure_types[index][failure_type] += count
+
+    points = []
+    for index, count, *values in rows:
+        points.append({
+            'timestamp': (start + timedelta(milliseconds=index * resolution_ms)).isoformat(),
+            'count': count,
+            'parameters': {
+                name: {'min': values[i * 3], 'mean': values[i * 3 + 1], 'max': values[i * 3 + 2]}
+                for i, name in enumerate(PARAMETER_DEFAULTS)
+            },
+            'conditions': dict(conditions[index]),
+            'failure_types': dict(failure_types[index]),
+        })
+
+    return {
+        'vehicle_id': vehicle_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'resolution_seconds': resolution_ms / 1000,
+        'max_points': max_points,
+        'points': points,
+    }
+
+
+def history_range(args, now=None):
+    """Read from, to and resolution from request arguments, defaulting to the last day
+
+    Returns:
+        tuple: (start, end, resolution in seconds or None)
+    """
+    end = parse_timestamp(args['to'], 'to') if args.get('to') else (now or datetime.utcnow())
+    start = parse_timestamp(args['from'], 'from') if args.get('from') else end - DEFAULT_RANGE
+    if start >= end:
+        raise ValueError("'from' must be before 'to'")
+    resolution = parse_resolution(args['resolution']) if args.get('resolution') else None
+    return start, end, resolution
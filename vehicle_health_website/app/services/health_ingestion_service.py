@@ -0,0 +1,178 @@
+import io
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app import db
+from app.models.user import Vehicle
+from app.models.vehicle_health import (
+    ENGINE_PARAMETERS, MAINTENANCE_PARAMETERS, PARAMETER_DEFAULTS, VehicleHealth
+)
+from app.services.model_registry import get_predictive_analytics
+
+FORMATS = ('jsonl', 'csv', 'json')
+
+
+def detect_format(mimetype, requested=None):
+    """Pick the body format from ?format= or the Content-Type header"""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown format '{requested}'; expected one of {', '.join(FORMATS)}")
+        return requested
+    if mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    if mimetype == 'application/json':
+        return 'json'
+    return 'jsonl'
+
+
+def parse_health_records(body, body_format):
+    """Parse a JSON lines, CSV or JSON array body into a DataFrame indexed by source row number
+
+    Rows count from 1 as a client would: lines for JSON lines, data lines after the
+    header for CSV (so the first record is row 2), and array positions for JSON.
+
+    Returns:
+        tuple: (DataFrame of records, list of rejects for lines that could not be parsed)
+    """
+    rejects = []
+    if body_format == 'csv':
+        try:
+            frame = pd.read_csv(io.StringIO(body), dtype=str, skipinitialspace=True)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            raise ValueError(f"Invalid CSV: {e}")
+        frame.index = frame.index + 2
+        return frame, rejects
+
+    if body_format == 'json':
+        try:
+            records = json.loads(body)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of records")
+        numbered = list(enumerate(records, start=1))
+    else:
+        numbered = []
+        for line_number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                numbered.append((line_number, json.loads(line)))
+            except ValueError:
+                rejects.append({'row': line_number, 'error': 'Invalid JSON'})
+
+    rows = []
+    for row, record in numbered:
+        if isinstance(record, dict):
+            rows.append((row, record))
+        else:
+            rejects.append({'row': row, 'error': 'Expected a JSON object'})
+    frame = pd.DataFrame.from_records([record for _, record in rows], index=[row for row, _ in rows])
+    return frame, rejects
+
+
+def _validate(frame):
+    """Coerce columns to their types, returning (clean frame, Series of errors for bad rows)"""
+    errors = pd.Series(None, index=frame.index, dtype=object)
+
+    def reject(mask, message):
+        errors[mask & errors.isna()] = message
+
+    vehicle_ids = pd.to_numeric(frame['vehicle_id'], errors='coerce') \
+        if 'vehicle_id' in frame else pd.Series(np.nan, index=frame.index)
+    # NaN, infinities and values beyond int64 cannot be cast, so they are rejected and zeroed first
+    valid_ids = np.isfinite(vehicle_ids) & (vehicle_ids % 1 == 0) & (vehicle_ids.abs() < 2 ** 63)
+    reject(~valid_ids, 'vehicle_id must be an integer')
+
+    clean = pd.DataFrame({'vehicle_id': vehicle_ids.where(valid_ids, 0).astype(np.int64)}, index=frame.index)
+    for name, default in PARAMETER_DEFAULTS.items():
+        if name not in frame:
+            clean[name] = float(default)
+            continue
+        missing = frame[name].isna()
+        values = pd.to_numeric(frame[name], errors='coerce')
+        reject((values.isna() & ~missing) | np.isinf(values), f'{name} must be a number')
+        clean[name] = values.fillna(default).astype(float)
+
+    now = datetime.utcnow()
+    if 'timestamp' in frame:
+        missing = frame['timestamp'].isna()
+        timestamps = pd.to_datetime(frame['timestamp'], errors='coerce', utc=True, format='ISO8601')
+        reject(timestamps.isna() & ~missing, 'timestamp must be an ISO 8601 date and time')
+        clean['timestamp'] = timestamps.dt.tz_convert(None).astype(object).where(~timestamps.isna(), now)
+    else:
+        clean['timestamp'] = now
+    return clean, errors
+
+
+def ingest_health_records(frame, user_id, rejects=()):
+    """Analyse and store many health records in one transaction
+
+    Ownership is checked once per vehicle, both models score the accepted rows as
+    matrices and the rows are written with a single bulk INSERT.
+
+    Returns:
+        dict: inserted/rejected counts, per-row results and per-row rejects
+    """
+    rejects = list(rejects)
+    if frame.empty:
+        return {'inserted': 0, 'rejected': len(rejects), 'results': [], 'rejects': rejects}
+
+    clean, errors = _validate(frame)
+
+    # One query for the owners of every vehicle in the batch
+    vehicle_ids = [int(vehicle_id) for vehicle_id in clean.loc[errors.isna(), 'vehicle_id'].unique()]
+    owners = dict(db.session.execute(
+        db.select(Vehicle.id, Vehicle.user_id).where(Vehicle.id.in_(vehicle_ids))
+    ).all()) if vehicle_ids else {}
+    owner = clean['vehicle_id'].map(owners)
+    errors[owner.isna() & errors.isna()] = 'Vehicle not found'
+    errors[owner.notna() & (owner != user_id) & errors.isna()] = 'Unauthorized'
+
+    rejects += [{'row': int(row), 'error': error} for row, error in errors.dropna().items()]
+    rejects.sort(key=lambda reject: reject['row'])
+    accepted = clean[errors.isna()]
+    if accepted.empty:
+        return {'inserted': 0, 'rejected': len(rejects), 'results': [], 'rejects': rejects}
+
+    # Score the whole batch as two matrices
+    analyzer = get_predictive_analytics()
+    engine_results = analyzer.predict_engine_condition_batch(accepted[ENGINE_PARAMETERS].to_numpy())
+    maintenance_results = analyzer.predict_maintenance_needs_batch(accepted[MAINTENANCE_PARAMETERS].to_numpy())
+
+    records = accepted.to_dict('records')
+    for record, engine_result, maintenance_result in zip(records, engine_results, maintenance_results):
+        record['vehicle_id'] = int(record['vehicle_id'])
+        record['condition'] = engine_result['condition']
+        record['severity'] = engine_result['severity']
+        record['critical_components'] = engine_result['components']
+        record['failure_type'] = maintenance_result['failure_type']
+        record['maintenance_needed'] = maintenance_result['maintenance_needed']
+
+    try:
+        ids = db.session.scalars(
+            db.insert(VehicleHealth).returning(VehicleHealth.id, sort_by_parameter_order=True), records
+        ).all()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    results = [
+        {
+            'row': int(row),
+            'id': record_id,
+            'vehicle_id': record['vehicle_id'],
+            'timestamp': record['timestamp'].isoformat(),
+            'condition': record['condition'],
+            'severity': record['severity'],
+            'failure_type': record['failure_type'],
+            'maintenance_needed': record['maintenance_needed'],
+            'critical_components': record['critical_components'],
+        }
+        for row, record_id, record in zip(accepted.index, ids, records)
+    ]
+    return {'inserted': len(results), 'rejected': len(rejects), 'results': results, 'rejects': rejects}
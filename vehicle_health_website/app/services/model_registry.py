@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import sklearn
+
+from app.utils.predictive_analytics import PredictiveAnalytics
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DEFAULT_MODEL_DIR = BASE_DIR / 'data' / 'ml_models'
+DEFAULT_TRAINING_DATA = {
+    'engine_data_file': BASE_DIR / 'engine_data.csv',
+    'maintenance_data_file': BASE_DIR / 'predictive_maintenance.csv',
+}
+
+
+class ModelRegistry:
+    """Trains or loads each model once per process and shares the instance.
+
+    Artifacts are versioned by a hash of their training data and the scikit-learn
+    version, so editing a dataset or upgrading scikit-learn trains a new version
+    instead of loading a stale or incompatible one. Instances handed out are shared
+    by every request and thread and must be treated as read-only.
+    """
+
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, training_data=None):
+        self.model_dir = Path(model_dir)
+        self.training_data = {name: Path(path) for name, path in (training_data or DEFAULT_TRAINING_DATA).items()}
+        self._analytics = None
+        self._lock = threading.Lock()
+
+    def version(self):
+        """Version of the artifact the current training data and scikit-learn would produce"""
+        digest = hashlib.sha256(sklearn.__version__.encode())
+        for name in sorted(self.training_data):
+            with open(self.training_data[name], 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()[:12]
+
+    def artifact_path(self, version):
+        return self.model_dir / f'predictive_analytics-{version}.joblib'
+
+    def predictive_analytics(self):
+        """Return the shared PredictiveAnalytics, loading or training it on first use"""
+        if self._analytics is None:
+            with self._lock:
+                if self._analytics is None:
+                    self._analytics = self._load_or_train()
+        return self._analytics
+
+    def _load_or_train(self):
+        version = self.version()
+        path = self.artifact_path(version)
+        if path.exists():
+            logger.info(f"Loading predictive analytics models version {version}")
+            return PredictiveAnalytics.load(path)
+
+        logger.info(f"Training predictive analytics models version {version}")
+        analytics = PredictiveAnalytics(**{name: str(file) for name, file in self.training_data.items()})
+        self._save(analytics, version)
+        return analytics
+
+    def _save(self, analytics, version):
+        # Written under a temporary name and renamed, so a worker never loads a partial file
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.model_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            analytics.save(tmp_path)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.artifact_path(version))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with open(self.model_dir / f'predictive_analytics-{version}.json', 'w') as f:
+            json.dump({
+                'version': version,
+                'trained_at': datetime.utcnow().isoformat(),
+                'sklearn_version': sklearn.__version__,
+                'training_data': {name: file.name for name, file in self.training_data.items()},
+            }, f, indent=2)
+
+
+registry = ModelRegistry()
+
+
+def get_predictive_analytics():
+    """Shared PredictiveAnalytics instance for this process"""
+    return registry.predictive_analytics()
@@ -2,12 +2,32 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
+import joblib
 import os
 
+# Safe operating range of each engine parameter
+COMPONENT_THRESHOLDS = {
+    'rpm': {'min': 500, 'max': 2000, 'name': 'Engine RPM'},
+    'oil_pressure': {'min': 2.0, 'max': 4.5, 'name': 'Oil Pressure'},
+    'fuel_pressure': {'min': 3.0, 'max': 10.0, 'name': 'Fuel System'},
+    'coolant_pressure': {'min': 1.0, 'max': 3.5, 'name': 'Cooling System'},
+    'oil_temp': {'min': 70, 'max': 85, 'name': 'Oil Temperature'},
+    'coolant_temp': {'min': 65, 'max': 90, 'name': 'Engine Temperature'}
+}
+
+ENGINE_COLUMNS = ['Engine rpm', 'Lub oil pressure', 'Fuel pressure', 'Coolant pressure', 'lub oil temp', 'Coolant temp']
+MAINTENANCE_COLUMNS = ['Air temperature [K]', 'Process temperature [K]', 'Rotational speed [rpm]', 'Torque [Nm]',
+                       'Tool wear [min]']
+
 class PredictiveAnalytics:
-    def __init__(self):
-        self.engine_data = pd.read_csv('engine_data.csv')
-        self.maintenance_data = pd.read_csv('predictive_maintenance.csv')
+    def __init__(self, engine_data_file='engine_data.csv', maintenance_data_file='predictive_maintenance.csv'):
+        """Train the engine and maintenance models from the CSV datasets.
+
+        Training takes seconds; request handlers should use the shared instance from
+        app.services.model_registry instead of constructing their own.
+        """
+        self.engine_data = pd.read_csv(engine_data_file)
+        self.maintenance_data = pd.read_csv(maintenance_data_file)
         
         # Train models
         self.engine_model = self._train_engine_model()
@@ -24,6 +44,26 @@ class PredictiveAnalytics:
             'Rotational speed [rpm]', 'Torque [Nm]', 'Tool wear [min]'
         ]])
 
+        # The datasets are only needed for training
+        del self.engine_data, self.maintenance_data
+
+    def save(self, path):
+        """Write the fitted models and scalers to a single joblib file"""
+        joblib.dump({
+            'engine_model': self.engine_model,
+            'maintenance_model': self.maintenance_model,
+            'engine_scaler': self.engine_scaler,
+            'maintenance_scaler': self.maintenance_scaler,
+        }, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load models written by save() without retraining"""
+        analyzer = cls.__new__(cls)
+        for name, value in joblib.load(path).items():
+            setattr(analyzer, name, value)
+        return analyzer
+
     def _train_engine_model(self):
         X = self.engine_data.drop(['Engine Condition'], axis=1)
         y = self.engine_data['Engine Condition']
@@ -123,19 +163,81 @@ class PredictiveAnalytics:
             'maintenance_needed': failure_type != 'No Failure'
         }
 
+    def predict_engine_condition_batch(self, engine_matrix):
+        """
+        Vectorized predict_engine_condition for many readings at once
+        
+        Args:
+            engine_matrix: (n, 6) array with columns rpm, oil_pressure, fuel_pressure,
+                coolant_pressure, oil_temp, coolant_temp
+        
+        Returns:
+            list: one result per row, as returned by predict_engine_condition
+        """
+        engine_matrix = np.asarray(engine_matrix, dtype=float).reshape(-1, len(ENGINE_COLUMNS))
+        scaled_data = self.engine_scaler.transform(pd.DataFrame(engine_matrix, columns=ENGINE_COLUMNS))
+        probabilities = self.engine_model.predict_proba(scaled_data)
+        predictions = self.engine_model.classes_[probabilities.argmax(axis=1)]
+        critical = probabilities[:, 1]
+        severities = np.where(critical > 0.7, 'high', np.where(critical > 0.3, 'medium', 'low'))
+        components = self._identify_critical_components_batch(engine_matrix)
+        
+        return [
+            {
+                'condition': 'critical' if prediction == 1 else 'normal',
+                'severity': str(severity),
+                'probability': float(probability),
+                'components': row_components
+            }
+            for prediction, severity, probability, row_components in zip(predictions, severities, critical, components)
+        ]
+
+    def predict_maintenance_needs_batch(self, maintenance_matrix):
+        """
+        Vectorized predict_maintenance_needs for many readings at once
+        
+        Args:
+            maintenance_matrix: (n, 5) array with columns air_temp, process_temp,
+                rotation_speed, torque, tool_wear
+        
+        Returns:
+            list: one result per row, as returned by predict_maintenance_needs
+        """
+        data = pd.DataFrame(np.asarray(maintenance_matrix, dtype=float).reshape(-1, len(MAINTENANCE_COLUMNS)),
+                            columns=MAINTENANCE_COLUMNS)
+        scaled_data = self.maintenance_scaler.transform(data)
+        probabilities = self.maintenance_model.predict_proba(scaled_data)
+        failure_types = self.maintenance_model.classes_[probabilities.argmax(axis=1)]
+        
+        return [
+            {
+                'failure_type': str(failure_type),
+                'probability': float(probability),
+                'maintenance_needed': failure_type != 'No Failure'
+            }
+            for failure_type, probability in zip(failure_types, probabilities.max(axis=1))
+        ]
+
+    def _identify_critical_components_batch(self, engine_matrix):
+        """Critical components of every row, checking each threshold once over the whole column"""
+        critical_components = [[] for _ in range(engine_matrix.shape[0])]
+        for column, threshold in enumerate(COMPONENT_THRESHOLDS.values()):
+            values = engine_matrix[:, column]
+            for row in np.flatnonzero((values < threshold['min']) | (values > threshold['max'])):
+                critical_components[row].append({
+                    'name': threshold['name'],
+                    'current': float(values[row]),
+                    'min': threshold['min'],
+                    'max': threshold['max']
+                })
+        return critical_components
+
     def _identify_critical_components(self, params):
         """Identify which components are in critical condition"""
         critical_components = []
         
         # Define thresholds for each parameter
-        thresholds = {
-            'rpm': {'min': 500, 'max': 2000, 'name': 'Engine RPM'},
-            'oil_pressure': {'min': 2.0, 'max': 4.5, 'name': 'Oil Pressure'},
-            'fuel_pressure': {'min': 3.0, 'max': 10.0, 'name': 'Fuel System'},
-            'coolant_pressure': {'min': 1.0, 'max': 3.5, 'name': 'Cooling System'},
-            'oil_temp': {'min': 70, 'max': 85, 'name': 'Oil Temperature'},
-            'coolant_temp': {'min': 65, 'max': 90, 'name': 'Engine Temperature'}
-        }
+        thresholds = COMPONENT_THRESHOLDS
         
         for param, value in params.items():
             threshold = thresholds.get(param)
@@ -2,10 +2,33 @@ from app import create_app, db
 from app.models.user import User, Vehicle
 from app.models.vehicle_health import VehicleHealth
 from app.models.service_history import ServiceHistory
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
 
 app = create_app()
 
+def create_missing_indexes(engine):
+    """Add indexes declared on the models to an existing database that predates them
+
+    Returns:
+        list: names of the indexes that were created
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(engine)
+                created.append(index.name)
+    if created and engine.dialect.name == 'sqlite':
+        # Refresh the planner statistics so the new indexes are picked up
+        with engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+    return created
+
 def init_db():
     with app.app_context():
         inspector = inspect(db.engine)
@@ -17,6 +40,8 @@ def init_db():
             print("Database initialized with new tables!")
         else:
             print("Database tables already exist, skipping initialization.")
+            for name in create_missing_indexes(db.engine):
+                print(f"Created index {name}")
 
 if __name__ == '__main__':
     init_db()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Import the app package from the website root however pytest was started
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WEBSITE_DIR)
+
+
+@pytest.fixture
+def training_data(tmp_path):
+    """Small engine and maintenance datasets in the layout of the real CSVs"""
+    rng = np.random.default_rng(0)
+    engine = pd.DataFrame(rng.uniform(1, 100, (60, 6)), columns=[
+        'Engine rpm', 'Lub oil pressure', 'Fuel pressure', 'Coolant pressure', 'lub oil temp', 'Coolant temp'])
+    engine['Engine Condition'] = rng.integers(0, 2, 60)
+    maintenance = pd.DataFrame(rng.uniform(1, 100, (60, 5)), columns=[
+        'Air temperature [K]', 'Process temperature [K]', 'Rotational speed [rpm]', 'Torque [Nm]', 'Tool wear [min]'])
+    maintenance['Failure Type'] = rng.choice(['No Failure', 'Power Failure'], 60)
+    files = {'engine_data_file': tmp_path / 'engine.csv', 'maintenance_data_file': tmp_path / 'maintenance.csv'}
+    engine.to_csv(files['engine_data_file'], index=False)
+    maintenance.to_csv(files['maintenance_data_file'], index=False)
+    return files
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db
+from app.models.service_history import ServiceHistory
+from app.models.vehicle_health import VehicleHealth
+from init_db import create_missing_indexes
+
+INDEXES = ['ix_vehicle_health_vehicle_id_timestamp', 'ix_service_history_vehicle_id_service_date']
+
+
+def history_queries():
+    """The health history, service history and latest-service reads, with the index each should use"""
+    return [
+        (VehicleHealth.query.filter_by(vehicle_id=1).order_by(VehicleHealth.timestamp.desc()).limit(24),
+         'ix_vehicle_health_vehicle_id_timestamp'),
+        (ServiceHistory.query.filter_by(vehicle_id=1).order_by(ServiceHistory.service_date.desc()),
+         'ix_service_history_vehicle_id_service_date'),
+        (ServiceHistory.query.filter_by(vehicle_id=1).order_by(ServiceHistory.service_date.desc()).limit(1),
+         'ix_service_history_vehicle_id_service_date'),
+    ]
+
+
+def query_plan(query):
+    sql = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    return [row.detail for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        yield app
+
+
+def assert_history_reads_use_indexes():
+    for query, index in history_queries():
+        plan = query_plan(query)
+        assert any(f'USING INDEX {index}' in step for step in plan), f'{query.statement} scans: {plan}'
+        assert not any('TEMP B-TREE' in step for step in plan), f'{query.statement} sorts: {plan}'
+
+
+def test_history_reads_use_composite_indexes(app):
+    db.create_all()
+    assert_history_reads_use_indexes()
+
+
+def test_existing_database_gains_missing_indexes(app):
+    db.create_all()
+    with db.engine.begin() as connection:
+        for name in INDEXES:
+            connection.execute(text(f'DROP INDEX {name}'))
+        # Enough history across vehicles for ANALYZE to have something to measure
+        connection.execute(db.insert(ServiceHistory), [
+            {'vehicle_id': i % 20, 'service_date': datetime(2020, 1, 1) + timedelta(days=i),
+             'service_type': 'Oil change', 'description': '', 'mileage': i * 100}
+            for i in range(500)
+        ])
+
+    assert sorted(create_missing_indexes(db.engine)) == sorted(INDEXES)
+    assert create_missing_indexes(db.engine) == []
+    assert_history_reads_use_indexes()
@@ -0,0 +1,52 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.model_registry import ModelRegistry
+from app.utils.predictive_analytics import PredictiveAnalytics
+
+ENGINE_PARAMS = {'rpm': 700, 'oil_pressure': 3, 'fuel_pressure': 6, 'coolant_pressure': 2,
+                 'oil_temp': 80, 'coolant_temp': 80}
+MAINTENANCE_PARAMS = {'air_temp': 298, 'process_temp': 308, 'rotation_speed': 1500, 'torque': 40,
+                      'tool_wear': 10}
+
+
+def test_registry_trains_once_and_reloads_the_saved_version(tmp_path, training_data, monkeypatch):
+    registry = ModelRegistry(tmp_path / 'models', training_data)
+    instances = []
+    threads = [threading.Thread(target=lambda: instances.append(registry.predictive_analytics())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(instance) for instance in instances}) == 1
+    assert registry.artifact_path(registry.version()).exists()
+
+    # A new process finds the artifact and never trains
+    monkeypatch.setattr(PredictiveAnalytics, '__init__', lambda *args, **kwargs: pytest.fail('retrained'))
+    reloaded = ModelRegistry(tmp_path / 'models', training_data).predictive_analytics()
+    assert reloaded.predict_engine_condition(ENGINE_PARAMS) == instances[0].predict_engine_condition(ENGINE_PARAMS)
+    assert reloaded.predict_maintenance_needs(MAINTENANCE_PARAMS) == \
+        instances[0].predict_maintenance_needs(MAINTENANCE_PARAMS)
+
+
+def test_changed_training_data_is_a_new_version(tmp_path, training_data):
+    registry = ModelRegistry(tmp_path / 'models', training_data)
+    before = registry.version()
+    with open(training_data['engine_data_file'], 'a') as f:
+        f.write('1,2,3,4,5,6,1\n')
+    assert registry.version() != before
+
+
+def test_batch_analysis_matches_single_readings(tmp_path, training_data):
+    analyzer = ModelRegistry(tmp_path / 'models', training_data).predictive_analytics()
+    rng = np.random.default_rng(1)
+    engine = rng.uniform(0, 100, (20, 6))
+    maintenance = rng.uniform(0, 100, (20, 5))
+    engine_results = analyzer.predict_engine_condition_batch(engine)
+    maintenance_results = analyzer.predict_maintenance_needs_batch(maintenance)
+    for row, result in zip(engine, engine_results):
+        assert analyzer.predict_engine_condition(dict(zip(ENGINE_PARAMS, map(float, row)))) == result
+    for row, result in zip(maintenance, maintenance_results):
+        assert analyzer.predict_maintenance_needs(dict(zip(MAINTENANCE_PARAMS, map(float, row)))) == result
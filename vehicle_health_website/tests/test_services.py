@@ -0,0 +1,180 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.models.user import User, Vehicle
+from app.models.vehicle_health import VehicleHealth
+from app.services import model_registry
+
+SCENARIOS = [
+    {'air_temperature': 298, 'process_temperature': 308, 'rotational_speed': 1500, 'torque': 40, 'tool_wear': 10},
+    {'air_temperature': 302, 'process_temperature': 311, 'rotational_speed': 1300, 'torque': 65, 'tool_wear': 220},
+    {'air_temperature': 300, 'process_temperature': 309, 'rotational_speed': 2800, 'torque': 12, 'tool_wear': 90},
+]
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    return app.test_client()
+
+
+def test_batch_matches_single_predictions_and_reuses_the_service(client):
+    response = client.post('/api/predict-failure/batch', json={'parameters': SCENARIOS})
+    assert response.status_code == 200
+    batch = response.get_json()['predictions']
+    assert batch == [client.post('/api/predict-failure', json=scenario).get_json() for scenario in SCENARIOS]
+    assert abs(sum(batch[1]['all_probabilities'].values()) - 1) < 1e-9
+
+    service = client.application.extensions['failure_prediction_service']
+    client.post('/api/predict-failure/batch', json=SCENARIOS)
+    assert client.application.extensions['failure_prediction_service'] is service
+
+
+def test_batch_rejects_malformed_rows(client):
+    response = client.post('/api/predict-failure/batch', json=[SCENARIOS[0], {'torque': 'high'}])
+    assert response.status_code == 400
+    assert 'Parameter set 1' in response.get_json()['error']
+    assert client.post('/api/predict-failure/batch', json=[]).status_code == 400
+
+
+@pytest.fixture
+def fleet_client(tmp_path, training_data, monkeypatch):
+    """A client logged in as the owner of vehicle 1; vehicle 2 belongs to someone else"""
+    monkeypatch.setattr(model_registry, 'registry', model_registry.ModelRegistry(tmp_path / 'models', training_data))
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        db.create_all()
+        owner, other = User(email='owner@example.com'), User(email='other@example.com')
+        db.session.add_all([owner, other])
+        db.session.flush()
+        db.session.add_all([
+            Vehicle(id=1, registration_number='KA01', make='A', model='B', year=2020, user_id=owner.id),
+            Vehicle(id=2, registration_number='KA02', make='A', model='B', year=2020, user_id=other.id),
+        ])
+        db.session.commit()
+        owner_id = owner.id
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(owner_id)
+    return client
+
+
+def test_bulk_json_lines_insert_with_per_row_rejects(fleet_client):
+    lines = [
+        json.dumps({'vehicle_id': 1, 'engine_rpm': 700, 'oil_pressure': 3, 'timestamp': '2026-01-01T10:00:00Z'}),
+        'not json',
+        json.dumps({'vehicle_id': 2, 'engine_rpm': 700}),
+        json.dumps({'vehicle_id': 1, 'torque': 'strong'}),
+        json.dumps({'vehicle_id': 9}),
+        json.dumps({'vehicle_id': 1, 'engine_rpm': 2600, 'coolant_temperature': 95}),
+        json.dumps({'vehicle_id': float('inf')}),
+        json.dumps({'vehicle_id': 1e30}),
+        json.dumps({'vehicle_id': 1.5}),
+    ]
+    response = fleet_client.post('/api/vehicle-health/bulk', data='\n'.join(lines),
+                                 content_type='application/x-ndjson')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['inserted'], body['rejected']) == (2, 7)
+    assert [result['row'] for result in body['results']] == [1, 6]
+    assert body['results'][0]['timestamp'] == '2026-01-01T10:00:00'
+    assert {'Engine RPM', 'Engine Temperature'} <= {c['name'] for c in body['results'][1]['critical_components']}
+    assert body['rejects'] == [
+        {'row': 2, 'error': 'Invalid JSON'},
+        {'row': 3, 'error': 'Unauthorized'},
+        {'row': 4, 'error': 'torque must be a number'},
+        {'row': 5, 'error': 'Vehicle not found'},
+        {'row': 7, 'error': 'vehicle_id must be an integer'},
+        {'row': 8, 'error': 'vehicle_id must be an integer'},
+        {'row': 9, 'error': 'vehicle_id must be an integer'},
+    ]
+
+    with fleet_client.application.app_context():
+        stored = db.session.get(VehicleHealth, body['results'][0]['id'])
+        assert (stored.engine_rpm, stored.oil_pressure, stored.torque) == (700, 3, 40)
+        assert stored.condition == body['results'][0]['condition']
+
+
+def test_bulk_csv_matches_single_record_analysis(fleet_client):
+    csv = 'vehicle_id,engine_rpm,oil_pressure,fuel_pressure,tool_wear\n1,650,2.5,7,20\n1,1200,5,12,200\n'
+    body = fleet_client.post('/api/vehicle-health/bulk', data=csv, content_type='text/csv').get_json()
+    assert body['inserted'] == 2 and body['rejects'] == []
+
+    with fleet_client.application.app_context():
+        single = VehicleHealth(vehicle_id=1, engine_rpm=1200, oil_pressure=5, fuel_pressure=12, tool_wear=200)
+    result = body['results'][1]
+    assert (result['row'], result['condition'], result['severity'], result['failure_type']) == \
+        (3, single.condition, single.severity, single.failure_type)
+
+    csv = 'vehicle_id,engine_rpm\ninf,650\n-inf,650\n'
+    body = fleet_client.post('/api/vehicle-health/bulk', data=csv, content_type='text/csv').get_json()
+    assert body['rejected'] == 2 and {reject['error'] for reject in body['rejects']} == {'vehicle_id must be an integer'}
+
+
+def test_health_history_buckets_a_time_range(fleet_client):
+    readings = [
+        {'vehicle_id': 1, 'engine_rpm': 600 + 100 * i, 'timestamp': f'2026-01-01T10:{i:02d}:30'}
+        for i in range(6)
+    ] + [{'vehicle_id': 1, 'engine_rpm': 9000, 'timestamp': '2026-01-01T12:00:00'}]
+    inserted = fleet_client.post('/api/vehicle-health/bulk', json=readings).get_json()
+    assert inserted['inserted'] == 7
+
+    response = fleet_client.get('/api/vehicle/1/health/history'
+                                '?from=2026-01-01T10:00:00Z&to=2026-01-01T11:00:00Z&resolution=2m')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['resolution_seconds'] == 120
+    assert [point['timestamp'] for point in body['points']] == \
+        ['2026-01-01T10:00:00', '2026-01-01T10:02:00', '2026-01-01T10:04:00']
+    first = body['points'][0]
+    assert first['count'] == 2
+    assert first['parameters']['engine_rpm'] == {'min': 600, 'mean': 650, 'max': 700}
+    assert first['parameters']['torque'] == {'min': 40, 'mean': 40, 'max': 40}
+    assert sum(first['conditions'].values()) == sum(first['failure_types'].values()) == 2
+    expected = {r['condition'] for r in inserted['results'][:2]}
+    assert set(first['conditions']) == expected
+
+    # A range too long for the requested resolution is widened to stay within the point cap
+    fleet_client.application.config['HEALTH_HISTORY_MAX_POINTS'] = 4
+    body = fleet_client.get('/api/vehicle/1/health/history'
+                            '?from=2026-01-01T10:00:00&to=2026-01-01T14:00:00&resolution=1s').get_json()
+    assert body['resolution_seconds'] == 3600
+    assert [point['count'] for point in body['points']] == [6, 1]
+
+    assert fleet_client.get('/api/vehicle/1/health/history?resolution=fast').status_code == 400
+    assert fleet_client.get('/api/vehicle/1/health/history'
+                            '?from=2026-01-02T00:00:00&to=2026-01-01T00:00:00').status_code == 400
+    assert len(fleet_client.get('/api/vehicle/1/health/history').get_json()) == 7
+
+
+def test_health_history_keeps_boundary_readings_in_their_bucket(fleet_client):
+    # A 1 Hz stream: every fifth reading falls exactly on a 5 s bucket boundary
+    start = datetime(2026, 3, 7, 13, 21, 40)
+    readings = [{'vehicle_id': 1, 'engine_rpm': second, 'timestamp': (start + timedelta(seconds=second)).isoformat()}
+                for second in range(400)]
+    assert fleet_client.post('/api/vehicle-health/bulk', json=readings).get_json()['inserted'] == 400
+
+    body = fleet_client.get(f'/api/vehicle/1/health/history?from={start.isoformat()}'
+                            f'&to={(start + timedelta(seconds=400)).isoformat()}&resolution=5').get_json()
+    assert len(body['points']) == 80
+    for number, point in enumerate(body['points']):
+        assert point['timestamp'] == (start + timedelta(seconds=5 * number)).isoformat()
+        assert point['count'] == 5
+        assert point['parameters']['engine_rpm'] == {'min': 5 * number, 'mean': 5 * number + 2, 'max': 5 * number + 4}
+
+
+def test_bulk_limits_apply_before_parsing(fleet_client):
+    fleet_client.application.config.update(HEALTH_BULK_MAX_ROWS=3, HEALTH_BULK_MAX_BYTES=200)
+    line = json.dumps({'vehicle_id': 1}) + '\n'
+    too_many = fleet_client.post('/api/vehicle-health/bulk', data=line * 4, content_type='application/x-ndjson')
+    assert too_many.status_code == 400 and too_many.get_json()['error'] == 'At most 3 records per request'
+    assert fleet_client.post('/api/vehicle-health/bulk', data=line * 3,
+                             content_type='application/x-ndjson').get_json()['inserted'] == 3
+
+    too_large = fleet_client.post('/api/vehicle-health/bulk', data=' ' * 201, content_type='application/x-ndjson')
+    assert too_large.status_code == 413
+    assert fleet_client.post('/api/vehicle-health/bulk', data=b'\xff\xfe',
+                             content_type='text/csv').status_code == 400